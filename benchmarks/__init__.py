@@ -0,0 +1,3 @@
+"""
+Reproducible performance benchmarks (see scripts/benchmark_suite.py)
+"""
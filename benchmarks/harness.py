@@ -0,0 +1,125 @@
+"""
+Benchmark harness: measurements, JSON results and baseline comparison
+
+Every measurement names the section 9 claim of
+docs/ver_0_1/Feature_1_PricePrediction/01_Architecture_Overview.md it
+checks, with the target in the same unit, so a results file can be read next
+to the doc. ``compare`` flags values that got worse than the stored baseline
+by more than a tolerance.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class Measurement:
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = False
+    target: Optional[float] = None
+    claim: str = ""
+    detail: Dict = field(default_factory=dict)
+
+    @property
+    def meets_target(self) -> Optional[bool]:
+        if self.target is None:
+            return None
+        return self.value >= self.target if self.higher_is_better else self.value <= self.target
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    value: float
+    change: float  # fraction, positive = worse
+
+    def __str__(self):
+        return f"{self.name}: {self.baseline:.4g} -> {self.value:.4g} ({self.change:+.0%} worse)"
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 10) -> List[float]:
+    """Per-call durations in seconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+class BenchmarkReport:
+    def __init__(self, meta: Optional[Dict] = None):
+        self.meta = {**environment(), **(meta or {})}
+        self.measurements: Dict[str, Measurement] = {}
+
+    def add(self, measurement: Measurement) -> Measurement:
+        self.measurements[measurement.name] = measurement
+        return measurement
+
+    def to_dict(self) -> Dict:
+        return {"meta": self.meta, "results": {name: asdict(m) for name, m in self.measurements.items()}}
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkReport":
+        data = json.loads(Path(path).read_text())
+        report = cls()
+        report.meta = data.get("meta", {})
+        for name, values in data.get("results", {}).items():
+            report.add(Measurement(**values))
+        return report
+
+    def compare(self, baseline: "BenchmarkReport", tolerance: float = DEFAULT_TOLERANCE) -> List[Regression]:
+        """Measurements worse than the baseline by more than `tolerance` (a fraction)"""
+        regressions = []
+        for name, m in self.measurements.items():
+            base = baseline.measurements.get(name)
+            if base is None or base.value == 0:
+                continue
+            change = (base.value - m.value) / base.value if m.higher_is_better else (m.value - base.value) / base.value
+            if change > tolerance:
+                regressions.append(Regression(name, base.value, m.value, change))
+        return regressions
+
+    def format_table(self) -> str:
+        lines = [f"{'benchmark':<34} {'value':>12} {'unit':<10} {'target':>10}  claim"]
+        for m in self.measurements.values():
+            target = "" if m.target is None else f"{m.target:g}"
+            status = {True: "[OK]", False: "[WARN]", None: ""}[m.meets_target]
+            lines.append(f"{m.name:<34} {m.value:>12.4g} {m.unit:<10} {target:>10}  {status} {m.claim}".rstrip())
+        return "\n".join(lines)
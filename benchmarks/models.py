@@ -0,0 +1,52 @@
+"""
+Synthetic models and feature rows shared by the benchmarks
+"""
+
+import numpy as np
+
+FEATURE_NAMES = [
+    "return_1d", "return_5d", "return_20d", "return_60d", "return_120d", "return_252d",
+    "volatility_5d", "volatility_20d", "volatility_60d",
+    "volume_ratio_5d", "volume_ratio_20d", "dollar_volume",
+    "market_beta", "market_return", "market_volatility",
+    "rsi_14", "macd", "sma_50_200_cross", "bollinger_position", "atr",
+]
+
+
+def build_synthetic_model(path: str, n_features: int, hidden: int = 128, layers: int = 3):
+    """Dense ReLU MLP, [batch, n_features] -> [batch, 1]"""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    nodes, weights = [], []
+    current, width = "features", n_features
+    for i in range(layers):
+        out_width = 1 if i == layers - 1 else hidden
+        w = numpy_helper.from_array(rng.standard_normal((width, out_width)).astype(np.float32) * 0.1, f"w{i}")
+        b = numpy_helper.from_array(np.zeros(out_width, dtype=np.float32), f"b{i}")
+        weights += [w, b]
+        last = i == layers - 1
+        nodes.append(helper.make_node("MatMul", [current, f"w{i}"], [f"mm{i}"]))
+        nodes.append(helper.make_node("Add", [f"mm{i}", f"b{i}"], ["predicted_return" if last else f"pre{i}"]))
+        if not last:
+            nodes.append(helper.make_node("Relu", [f"pre{i}"], [f"h{i}"]))
+        current, width = f"h{i}", out_width
+
+    graph = helper.make_graph(
+        nodes, "normal_day_mlp",
+        [helper.make_tensor_value_info("features", TensorProto.FLOAT, ["batch", n_features])],
+        [helper.make_tensor_value_info("predicted_return", TensorProto.FLOAT, ["batch", 1])],
+        initializer=weights,
+    )
+    # IR 8 / opset 17 loads on any onnxruntime >= 1.14
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), path)
+
+
+def make_rows(count: int):
+    """Feature hashes shaped like Redis `features:{symbol}` (bytes keys and values)"""
+    rng = np.random.default_rng(1)
+    return [
+        {name.encode(): str(v).encode() for name, v in zip(FEATURE_NAMES, rng.standard_normal(len(FEATURE_NAMES)))}
+        for _ in range(count)
+    ]
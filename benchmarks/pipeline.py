@@ -0,0 +1,328 @@
+"""
+End-to-end prediction pipeline benchmark
+
+Drives one synthetic quote per symbol through
+
+    ingestion -> features -> routing -> inference -> Redis write -> API read
+
+and measures each stage against the section 9 targets. Routing
+(``StreamingRouter``), inference (``ModelSession``), tracing and the API
+gateway are the real service code. The ingestion agent and feature store are
+not in this tree yet, so stand-ins play those stages: a quote publisher and
+a NumPy feature computation over a per-symbol price history, writing
+``features:{symbol}`` hashes the way the design specifies.
+
+By default every hop is in-process (``LocalNats``, ``LocalRedis``) so results
+reflect code cost only. ``live=True`` sends every hop through the
+docker-compose NATS and Redis instead, which adds real network and
+serialization cost.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from prometheus_client import CollectorRegistry
+
+from benchmarks.harness import BenchmarkReport, Measurement, time_calls
+from benchmarks.models import FEATURE_NAMES, build_synthetic_model
+from services.common.inference_runtime import ModelSession, SessionConfig
+from services.common.local_backends import LocalNats, LocalRedis
+from services.common.metrics import percentile
+from services.common.subjects import FEATURES_READY, MARKET_QUOTE, PREDICT_EARNINGS, PREDICT_NORMAL
+from services.common.tracing import (
+    END_TO_END,
+    STAGE_FEATURES,
+    STAGE_INFERENCE,
+    STAGE_REDIS,
+    Trace,
+    TraceRecorder,
+)
+from services.routing_agent.calendar_checker import EarningsCalendarIndex, market_today
+from services.routing_agent.router import SymbolRouter
+from services.routing_agent.streaming import StreamingRouter
+
+HISTORY_DAYS = 260
+PREDICTION_TTL = 300
+
+CLAIM_FEATURES = "Feature computation (per symbol) <50ms"
+CLAIM_INFERENCE = "LSTM inference (batch of 128) <100ms"
+CLAIM_PIPELINE = "Full pipeline update (5000 symbols) <10 sec"
+CLAIM_CACHE_HIT = "Prediction retrieval (cache hit) <10ms"
+CLAIM_API_QPS = "API Gateway (predictions) 1,000 QPS"
+CLAIM_FEATURE_QPS = "Feature computation 1,000 symbols/sec"
+CLAIM_INFERENCE_QPS = "LSTM inference 500 symbols/sec"
+
+
+class FeatureStage:
+    """Stand-in feature store: vectorized indicators over each symbol's price history"""
+
+    def __init__(self, symbols: List[str], rng: np.random.Generator):
+        self.index = {s: i for i, s in enumerate(symbols)}
+        steps = rng.normal(0, 0.01, (len(symbols), HISTORY_DAYS))
+        self.closes = 100 * np.exp(np.cumsum(steps, axis=1))
+        self.volumes = rng.lognormal(14, 0.5, (len(symbols), HISTORY_DAYS))
+        self.market = self.closes.mean(axis=0)
+
+    def update(self, symbol: str, close: float, volume: float) -> Dict[str, float]:
+        i = self.index[symbol]
+        prices, volumes = self.closes[i], self.volumes[i]
+        prices[:-1] = prices[1:]
+        prices[-1] = close
+        volumes[:-1] = volumes[1:]
+        volumes[-1] = volume
+
+        returns = np.diff(np.log(prices))
+        market_returns = np.diff(np.log(self.market))
+        gains = np.clip(returns[-14:], 0, None).sum()
+        losses = -np.clip(returns[-14:], None, 0).sum()
+        sma20, std20 = prices[-20:].mean(), prices[-20:].std()
+        ema12 = np.average(prices[-12:], weights=np.arange(1, 13))
+        ema26 = np.average(prices[-26:], weights=np.arange(1, 27))
+        values = [
+            *(prices[-1] / prices[-1 - n] - 1 for n in (1, 5, 20, 60, 120, 252)),
+            *(returns[-n:].std() for n in (5, 20, 60)),
+            volumes[-1] / volumes[-5:].mean(), volumes[-1] / volumes[-20:].mean(), prices[-1] * volumes[-1],
+            np.cov(returns[-60:], market_returns[-60:])[0, 1] / (market_returns[-60:].var() or 1.0),
+            market_returns[-1], market_returns[-20:].std(),
+            100 - 100 / (1 + gains / (losses or 1e-9)),
+            (ema12 - ema26) / prices[-1],
+            prices[-50:].mean() / prices[-200:].mean() - 1,
+            (prices[-1] - sma20) / (2 * std20 or 1.0),
+            np.abs(np.diff(prices[-15:])).mean() / prices[-1],
+        ]
+        return dict(zip(FEATURE_NAMES, map(float, values)))
+
+
+class PipelineBenchmark:
+    def __init__(
+        self,
+        symbols: int,
+        bus=None,
+        redis=None,
+        model_path: Optional[str] = None,
+        earnings_fraction: float = 0.02,
+        max_batch: int = 128,
+        seed: int = 7,
+    ):
+        self.symbols = [f"S{i:05d}" for i in range(symbols)]
+        self.bus = bus or LocalNats()
+        self.redis = redis or LocalRedis()
+        self.rng = np.random.default_rng(seed)
+        self.features = FeatureStage(self.symbols, self.rng)
+
+        self._tmp = None
+        if model_path is None:
+            self._tmp = tempfile.TemporaryDirectory()
+            model_path = str(Path(self._tmp.name) / "synthetic.onnx")
+            build_synthetic_model(model_path, len(FEATURE_NAMES))
+        self.model = ModelSession("normal", model_path, SessionConfig.from_env(), max_batch_size=max_batch)
+
+        calendar = EarningsCalendarIndex()
+        for symbol in self.symbols[:int(len(self.symbols) * earnings_fraction)]:
+            calendar.add(symbol, market_today())
+        self.recorder = TraceRecorder(CollectorRegistry())
+        self.router = StreamingRouter(self.bus, SymbolRouter(calendar), max_batch=max_batch, recorder=self.recorder)
+
+        self.feature_times: List[float] = []
+        self.inference_batches: List[float] = []
+        self.written = 0
+        self._done = asyncio.Event()
+
+    def close(self):
+        if self._tmp:
+            self._tmp.cleanup()
+
+    async def start(self):
+        await self.bus.subscribe(MARKET_QUOTE, cb=self.on_quote)
+        await self.bus.subscribe(FEATURES_READY, cb=self.router.on_features_ready)
+        await self.bus.subscribe(PREDICT_NORMAL, cb=self.on_predict_job)
+        await self.bus.subscribe(PREDICT_EARNINGS, cb=self.on_predict_job)
+
+    # Ingestion (stand-in): one quote per symbol
+    async def publish_quotes(self):
+        closes = self.features.closes[:, -1] * np.exp(self.rng.normal(0, 0.002, len(self.symbols)))
+        for symbol, close in zip(self.symbols, closes):
+            trace = Trace.start()
+            await self.bus.publish(MARKET_QUOTE, json.dumps({
+                "correlation_id": trace.correlation_id,
+                "payload": {
+                    "ticker": symbol, "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "close": float(close), "volume": float(self.rng.lognormal(14, 0.5)),
+                },
+            }).encode(), headers=trace.headers())
+            await asyncio.sleep(0)  # let the router's max_delay timers fire as they would between ticks
+
+    # Features (stand-in): compute, store the hash, announce
+    async def on_quote(self, msg):
+        event = json.loads(msg.data)
+        payload = event["payload"]
+        start = time.perf_counter()
+        features = self.features.update(payload["ticker"], payload["close"], payload["volume"])
+        self.feature_times.append(time.perf_counter() - start)
+
+        await self.redis.hset(f"features:{payload['ticker']}", mapping=features)
+        trace = Trace.from_headers(msg.headers, event["correlation_id"]).mark(STAGE_FEATURES)
+        self.recorder.record(trace)
+        await self.bus.publish(FEATURES_READY, json.dumps({
+            "correlation_id": trace.correlation_id,
+            "payload": {"ticker": payload["ticker"], "timestamp": payload["timestamp"]},
+        }).encode(), headers=trace.headers())
+
+    # Inference: batch read features, one model call per batch, pipelined prediction writes
+    async def on_predict_job(self, msg):
+        entries = json.loads(msg.data)["payload"]["symbols"]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry in entries:
+                pipe.hgetall(f"features:{entry['ticker']}")
+            rows = await pipe.execute()
+
+        start = time.perf_counter()
+        predicted = self.model.predict_rows(rows, FEATURE_NAMES)
+        self.inference_batches.append(time.perf_counter() - start)
+        now = time.time()
+
+        traces = [Trace.decode(entry.get("trace")).mark(STAGE_INFERENCE, now) for entry in entries]
+        for trace in traces:
+            self.recorder.record(trace)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry, value in zip(entries, predicted[:, 0]):
+                pipe.set(f"pred:{entry['ticker']}", json.dumps({
+                    "ticker": entry["ticker"], "predicted_return": float(value),
+                    "prediction_time": datetime.now(timezone.utc).isoformat(), "model_version": "benchmark",
+                }), ex=PREDICTION_TTL)
+            await pipe.execute()
+
+        now = time.time()
+        for trace in traces:
+            self.recorder.record(trace.mark(STAGE_REDIS, now), final=True)
+        self.written += len(entries)
+        if self.written >= len(self.symbols):
+            self._done.set()
+
+    async def run_update(self, timeout: float = 120.0) -> float:
+        """One full update for every symbol; returns seconds until the last prediction is written"""
+        self.written = 0
+        self._done.clear()
+        start = time.perf_counter()
+        await self.publish_quotes()
+        await self.router.flush_all()
+        await asyncio.wait_for(self._done.wait(), timeout)
+        return time.perf_counter() - start
+
+
+async def measure_api_reads(redis, symbols: List[str], reads: int, api_url: Optional[str] = None) -> List[float]:
+    """Per-request latency of GET /api/prediction/{symbol} (in-process ASGI, or a running gateway)"""
+    samples = []
+    if api_url:
+        import httpx
+
+        async with httpx.AsyncClient(base_url=api_url, timeout=10) as client:
+            for i in range(reads):
+                start = time.perf_counter()
+                (await client.get(f"/api/prediction/{symbols[i % len(symbols)]}")).raise_for_status()
+                samples.append(time.perf_counter() - start)
+        return samples
+
+    from scripts.benchmark_api import call_asgi
+    from services.api_gateway import main
+
+    async def get_redis():
+        return redis
+
+    async def get_db():
+        yield None  # every read is a cache hit
+
+    main.app.dependency_overrides[main.get_redis] = get_redis
+    main.app.dependency_overrides[main.get_db] = get_db
+    try:
+        for i in range(min(200, reads)):
+            await call_asgi(main.app, f"/api/prediction/{symbols[i % len(symbols)]}")
+        for i in range(reads):
+            start = time.perf_counter()
+            status = await call_asgi(main.app, f"/api/prediction/{symbols[i % len(symbols)]}")
+            samples.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"GET /api/prediction returned {status}")
+    finally:
+        main.app.dependency_overrides.clear()
+    return samples
+
+
+async def run_suite(
+    symbols: int = 5000,
+    reads: int = 5000,
+    live: bool = False,
+    api_url: Optional[str] = None,
+    model_path: Optional[str] = None,
+) -> BenchmarkReport:
+    report = BenchmarkReport({"symbols": symbols, "reads": reads, "mode": "live" if live else "in-process"})
+
+    bus, redis_client = LocalNats(), LocalRedis()
+    if live:
+        import redis.asyncio as redis
+        from nats.aio.client import Client as NATS
+
+        bus = NATS()
+        await bus.connect(servers=[os.getenv("NATS_URL", "nats://localhost:4222")])
+        redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+
+    bench = PipelineBenchmark(symbols, bus=bus, redis=redis_client, model_path=model_path)
+    try:
+        await bench.start()
+        await bench.run_update()  # warm-up: allocations, model, caches
+        bench.feature_times.clear()
+        bench.inference_batches.clear()
+        bench.recorder.samples.clear()
+
+        elapsed = await bench.run_update()
+        report.add(Measurement(
+            "pipeline.update_seconds", elapsed, "s", target=10.0 * symbols / 5000, claim=CLAIM_PIPELINE,
+            detail={"symbols": symbols, "target_scaled_from_5000": symbols != 5000},
+        ))
+        report.add(Measurement("pipeline.throughput", symbols / elapsed, "symbols/s", higher_is_better=True))
+        end_to_end = list(bench.recorder.samples.get(END_TO_END, ()))
+        report.add(Measurement("pipeline.tick_latency_p50_ms", percentile(end_to_end, 0.5) * 1000, "ms"))
+        report.add(Measurement("pipeline.tick_latency_p99_ms", percentile(end_to_end, 0.99) * 1000, "ms"))
+
+        report.add(Measurement(
+            "features.per_symbol_p99_ms", percentile(bench.feature_times, 0.99) * 1000, "ms",
+            target=50.0, claim=CLAIM_FEATURES,
+        ))
+        report.add(Measurement(
+            "features.symbols_per_sec", len(bench.feature_times) / sum(bench.feature_times), "symbols/s",
+            higher_is_better=True, target=1000.0, claim=CLAIM_FEATURE_QPS,
+        ))
+
+        batch = np.random.default_rng(3).standard_normal((128, len(FEATURE_NAMES))).astype(np.float32)
+        batch_times = time_calls(lambda: bench.model.predict(batch), iterations=200)
+        report.add(Measurement(
+            "inference.batch128_p99_ms", percentile(batch_times, 0.99) * 1000, "ms",
+            target=100.0, claim=CLAIM_INFERENCE, detail={"model": "synthetic MLP" if model_path is None else model_path},
+        ))
+        report.add(Measurement(
+            "inference.symbols_per_sec", 128 / percentile(batch_times, 0.5), "symbols/s",
+            higher_is_better=True, target=500.0, claim=CLAIM_INFERENCE_QPS,
+        ))
+
+        read_times = await measure_api_reads(bench.redis, bench.symbols, reads, api_url)
+        report.add(Measurement(
+            "api.cache_hit_p50_ms", percentile(read_times, 0.5) * 1000, "ms", target=10.0, claim=CLAIM_CACHE_HIT,
+        ))
+        report.add(Measurement("api.cache_hit_p99_ms", percentile(read_times, 0.99) * 1000, "ms"))
+        report.add(Measurement(
+            "api.requests_per_sec", len(read_times) / sum(read_times), "req/s",
+            higher_is_better=True, target=1000.0, claim=CLAIM_API_QPS, detail={"sequential": True},
+        ))
+    finally:
+        bench.close()
+        await bus.close()
+        await redis_client.close()
+    return report
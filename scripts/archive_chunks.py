@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Cold-Tier Chunk Archival
+Export hypertable chunks to Parquet before the retention policy drops them
+
+Usage:
+  python scripts/archive_chunks.py              # chunks the retention policy drops within ARCHIVE_LEAD_DAYS
+  python scripts/archive_chunks.py --all        # every sealed chunk not archived yet (first run / backfill)
+  python scripts/archive_chunks.py --dry-run    # list what would be archived
+
+The retention policies in 01_init_schema.sql drop a chunk 90 days after its
+time range closes. Each run reads drop_after from every hypertable's policy
+and archives the chunks due to be dropped within ARCHIVE_LEAD_DAYS (default
+7). Run it daily and a chunk gets a week of attempts before its data is gone.
+Archived chunks are listed in archive/<hypertable>/_manifest.json and are not
+exported again.
+
+Files go to archive/<hypertable>/date=YYYY-MM-DD/<chunk>.parquet. See
+services/common/cold_storage.py for the layout and for the read API that
+training and backtests use.
+
+Requires pyarrow (pip install -e ".[archive]").
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.pg_backup import CHUNKS_QUERY, connect, is_sealed, quote_ident  # noqa: E402
+from services.common.cold_storage import (  # noqa: E402
+    ARCHIVE_DIR,
+    ROW_GROUP_ROWS,
+    ParquetArchive,
+    arrow_schema,
+    records_to_table,
+    table_columns,
+)
+
+ARCHIVE_LEAD_DAYS = float(os.getenv("ARCHIVE_LEAD_DAYS", "7"))
+
+RETENTION_QUERY = """
+    SELECT hypertable_name, (config->>'drop_after')::interval AS drop_after
+    FROM timescaledb_information.jobs
+    WHERE proc_name = 'policy_retention'
+"""
+
+
+def drop_time(chunk: Dict, retention: Dict[str, timedelta]) -> Optional[datetime]:
+    """When the retention policy drops the chunk, or None if its hypertable has no policy"""
+    drop_after = retention.get(chunk["hypertable_name"])
+    return None if drop_after is None else chunk["range_end"] + drop_after
+
+
+def chunks_to_archive(chunks: List[Dict], retention: Dict[str, timedelta], archived: Dict[str, Set[str]],
+                      now: datetime, lead: timedelta = timedelta(days=ARCHIVE_LEAD_DAYS),
+                      everything: bool = False) -> List[Dict]:
+    """Sealed chunks not archived yet that retention drops within `lead` (any sealed chunk with everything)"""
+    selected = []
+    for chunk in chunks:
+        if chunk["chunk_name"] in archived.get(chunk["hypertable_name"], ()) or not is_sealed(chunk, now):
+            continue
+        dropped_at = drop_time(chunk, retention)
+        if everything or (dropped_at is not None and dropped_at - lead <= now):
+            selected.append(chunk)
+    return selected
+
+
+async def archive_chunk(conn, archive: ParquetArchive, chunk: Dict) -> Dict:
+    """Stream one chunk's time range into date-partitioned Parquet; returns its manifest entry"""
+    hypertable, time_column = chunk["hypertable_name"], chunk["primary_dimension"]
+    schema = arrow_schema(await table_columns(conn, hypertable, chunk["hypertable_schema"]))
+    column = quote_ident(time_column)
+    # Day first so each partition file is written in one go, then ticker so row-group statistics prune by ticker
+    order = [f"({column} AT TIME ZONE 'UTC')::date"] + (["ticker"] if "ticker" in schema.names else []) + [column]
+    query = (
+        f"SELECT {', '.join(quote_ident(n) for n in schema.names)} "
+        f"FROM {quote_ident(chunk['hypertable_schema'])}.{quote_ident(hypertable)} "
+        f"WHERE {column} >= $1 AND {column} < $2 ORDER BY {', '.join(order)}"
+    )
+
+    writer = archive.writer(hypertable, chunk["chunk_name"], schema, time_column)
+    try:
+        # Through the hypertable so compressed chunks come back decompressed
+        async with conn.transaction():
+            cursor = await conn.cursor(query, chunk["range_start"], chunk["range_end"])
+            while rows := await cursor.fetch(ROW_GROUP_ROWS):
+                writer.write(records_to_table(rows, schema))
+    except BaseException:
+        writer.abort()
+        raise
+    files = writer.close()
+
+    entry = {
+        "range_start": chunk["range_start"].isoformat(),
+        "range_end": chunk["range_end"].isoformat(),
+        "rows": sum(files.values()),
+        "files": files,
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+    archive.record_chunk(hypertable, time_column, chunk["chunk_name"], entry, schema=schema)
+    return entry
+
+
+async def run(root: Path = ARCHIVE_DIR, everything: bool = False, dry_run: bool = False,
+              now: Optional[datetime] = None) -> Dict:
+    """Archive due chunks; returns run stats"""
+    archive = ParquetArchive(root)
+    now = now or datetime.now(timezone.utc)
+    conn = await connect()
+    try:
+        chunks = [dict(row) for row in await conn.fetch(CHUNKS_QUERY)]
+        retention = {row["hypertable_name"]: row["drop_after"] for row in await conn.fetch(RETENTION_QUERY)}
+        archived = {name: set(archive.manifest(name)["chunks"]) for name in {c["hypertable_name"] for c in chunks}}
+        pending = chunks_to_archive(chunks, retention, archived, now, everything=everything)
+        stats = {"chunks": len(chunks), "archived": 0, "rows": 0, "seconds": 0.0}
+
+        start = time.perf_counter()
+        for chunk in pending:
+            label = f"{chunk['hypertable_name']} {chunk['chunk_name']} ({chunk['range_start']:%Y-%m-%d %H:%M})"
+            dropped_at = drop_time(chunk, retention)
+            if dropped_at is not None and dropped_at <= now + timedelta(days=1):
+                print(f"[WARN] {label} is dropped by retention at {dropped_at:%Y-%m-%d %H:%M} UTC")
+            if dry_run:
+                print(f"[INFO] Would archive {label}")
+                continue
+            entry = await archive_chunk(conn, archive, chunk)
+            stats["archived"] += 1
+            stats["rows"] += entry["rows"]
+            print(f"[OK] {label}: {entry['rows']:,} rows in {len(entry['files'])} files")
+        stats["seconds"] = time.perf_counter() - start
+        stats["pending"] = len(pending)
+        return stats
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive hypertable chunks to Parquet before retention drops them")
+    parser.add_argument("--all", action="store_true", help="Archive every sealed chunk, not just those due")
+    parser.add_argument("--dry-run", action="store_true", help="List chunks without exporting them")
+    parser.add_argument("--root", type=Path, default=ARCHIVE_DIR, help=f"Archive directory (default {ARCHIVE_DIR})")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Cold-Tier Chunk Archival")
+    print("=" * 60)
+
+    stats = asyncio.run(run(args.root, everything=args.all, dry_run=args.dry_run))
+    if args.dry_run:
+        print(f"[OK] {stats['pending']} of {stats['chunks']} chunks would be archived")
+    else:
+        print(f"[OK] Archived {stats['archived']} of {stats['chunks']} chunks "
+              f"({stats['rows']:,} rows) to {args.root} in {stats['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"\n[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Prediction Endpoint Benchmark
+Measures requests/sec per core on GET /api/prediction/{symbol}
+
+Usage:
+  python scripts/benchmark_api.py                    # in-process, single core
+  python scripts/benchmark_api.py --url http://localhost:8000 --concurrency 32
+
+In-process mode calls the ASGI app directly (no network or HTTP client, one
+event loop, so one core) with Redis and the database replaced by in-memory
+lookups, and compares the passthrough fast path against the json.loads /
+re-encode path.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.api_gateway import main  # noqa: E402
+from services.common.local_backends import LocalRedis  # noqa: E402
+
+SAMPLE_PREDICTION = {
+    "ticker": "AAPL",
+    "prediction_time": "2025-12-19T10:30:00Z",
+    "predicted_price": 155.50,
+    "current_price": 154.20,
+    "change_percent": 0.84,
+    "confidence": 0.87,
+    "model_type": "normal",
+    "model_version": "v1.0.0",
+    "created_at": "2025-12-19T10:30:05Z",
+}
+
+SAMPLE_ROW = {
+    "ticker": "AAPL",
+    "prediction_time": datetime(2025, 12, 19, 10, 30, tzinfo=timezone.utc),
+    "target_time": datetime(2025, 12, 20, 10, 30, tzinfo=timezone.utc),
+    "predicted_price": Decimal("155.5000"),
+    "confidence_score": Decimal("0.8700"),
+    "current_price": Decimal("154.2000"),
+    "price_change_pct": Decimal("0.8400"),
+    "model_version": "v1.0.0",
+    "agent_type": "normal",
+}
+
+
+class InMemoryDB:
+    async def fetchrow(self, query, *args):
+        return SAMPLE_ROW
+
+
+async def call_asgi(app, path: str) -> int:
+    """Issue one GET straight against the ASGI app (no HTTP client overhead)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_inprocess(requests: int, cache_hit: bool, passthrough: bool) -> float:
+    main.RESPONSE_PASSTHROUGH = passthrough
+    # In-process Redis, so the endpoint's demand-tracking pipeline runs too
+    fake_redis = LocalRedis()
+    if cache_hit:
+        await fake_redis.set("pred:AAPL", json.dumps(SAMPLE_PREDICTION).encode())
+
+    async def get_redis():
+        return fake_redis
+
+    async def get_db():
+        yield InMemoryDB()
+
+    main.app.dependency_overrides[main.get_redis] = get_redis
+    main.app.dependency_overrides[main.get_db] = get_db
+
+    # Warm-up
+    for _ in range(200):
+        await call_asgi(main.app, "/api/prediction/AAPL")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert await call_asgi(main.app, "/api/prediction/AAPL") == 200
+    elapsed = time.perf_counter() - start
+
+    main.app.dependency_overrides.clear()
+    return requests / elapsed
+
+
+async def run_http(url: str, requests: int, concurrency: int, symbol: str) -> float:
+    async with httpx.AsyncClient(base_url=url, timeout=10) as client:
+        per_worker = requests // concurrency
+
+        async def worker():
+            for _ in range(per_worker):
+                await client.get(f"/api/prediction/{symbol}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return per_worker * concurrency / elapsed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/prediction/{symbol}")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--url", help="Benchmark a running gateway instead of in-process")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--symbol", default="AAPL")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Prediction Endpoint Benchmark")
+    print("=" * 60)
+
+    if args.url:
+        rps = asyncio.run(run_http(args.url, args.requests, args.concurrency, args.symbol))
+        print(f"[OK] {args.url}: {rps:,.0f} req/s (concurrency {args.concurrency})")
+        return
+
+    for cache_hit in (True, False):
+        source = "cache hit" if cache_hit else "DB hit"
+        for passthrough in (False, True):
+            mode = "passthrough" if passthrough else "json re-encode"
+            rps = asyncio.run(run_inprocess(args.requests, cache_hit, passthrough))
+            print(f"[OK] {source:<9} | {mode:<15} | {rps:>8,.0f} req/s per core")
+
+
+if __name__ == "__main__":
+    try:
+        main_cli()
+    except Exception as e:
+        print(f"\n[ERROR] Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Embedding Throughput Benchmark (CPU)
+Compares per-query embedding with the batched, cached EmbeddingService
+
+Usage:
+  python scripts/benchmark_embeddings.py [--texts 2000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.explanation_worker.embedding_service import (  # noqa: E402
+    EMBEDDING_MODEL,
+    EmbeddingService,
+    load_sentence_transformer,
+)
+
+
+def make_texts(count: int):
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM"]
+    return [
+        f"{symbols[i % len(symbols)]} risk factor {i}: supply chain exposure and "
+        f"margin pressure discussed in filing section {i % 17}"
+        for i in range(count)
+    ]
+
+
+def bench_batch_sizes(encoder, texts, batch_sizes):
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            encoder(texts[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"[OK] direct encode, batch {batch_size:>4}: {len(texts) / elapsed:>8,.0f} texts/s")
+
+
+async def bench_service(encoder, dim, texts, concurrency, max_batch_size):
+    service = EmbeddingService(encoder, dim=dim, max_batch_size=max_batch_size, max_wait_ms=5)
+    await service.start()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text):
+        async with semaphore:
+            await service.embed_one(text)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in texts))
+    cold = time.perf_counter() - start
+    batches = service.stats["batches"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in texts))
+    warm = time.perf_counter() - start
+
+    await service.stop()
+
+    print(f"[OK] service, {concurrency} concurrent single-text requests: "
+          f"{len(texts) / cold:>8,.0f} texts/s (avg batch {len(texts) / max(batches, 1):.1f})")
+    print(f"[OK] service, repeated texts (LRU hits):            "
+          f"{len(texts) / warm:>8,.0f} texts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput on CPU")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Embedding Benchmark: {EMBEDDING_MODEL} (CPU)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    encoder, dim = load_sentence_transformer(device="cpu")
+    encoder(["warm-up"])
+    print(f"[INFO] Model load + warm-up: {time.perf_counter() - start:.2f}s ({dim} dims)")
+
+    texts = make_texts(args.texts)
+    bench_batch_sizes(encoder, texts[:min(len(texts), 500)], [1])
+    bench_batch_sizes(encoder, texts, [8, 32, 128])
+    asyncio.run(bench_service(encoder, dim, texts, args.concurrency, args.max_batch_size))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERROR] Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Feature 1: ONNX Inference Benchmark (CPU only)
+Compares the default session + np.vstack per batch with the tuned, IO-bound runtime
+
+Without --model, a synthetic MLP with the normal-day agent's 20 features is
+generated (requires the `onnx` package).
+
+With --pool-workers, also measures the multi-process InferencePool, which
+should scale with the number of cores.
+
+Usage:
+  python scripts/benchmark_inference.py [--model models/normal_day.onnx] [--symbols 4096]
+  python scripts/benchmark_inference.py --pool-workers 1,2,4,8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.models import FEATURE_NAMES, build_synthetic_model, make_rows  # noqa: E402
+from services.common.inference_pool import InferencePool  # noqa: E402
+from services.common.inference_runtime import (  # noqa: E402
+    CPU_PROVIDERS,
+    ModelSession,
+    SessionConfig,
+    fill_features,
+)
+
+
+def bench_baseline(model_path, rows, batch_size):
+    """Design-spec path: default session, one vector per symbol, np.vstack, session.run"""
+    session = ort.InferenceSession(model_path, providers=CPU_PROVIDERS)
+    input_name = session.get_inputs()[0].name
+
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        vectors = [
+            np.array([float(row.get(name.encode(), 0)) for name in FEATURE_NAMES], dtype=np.float32)
+            for row in rows[i:i + batch_size]
+        ]
+        session.run(None, {input_name: np.vstack(vectors)})
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_runtime(model_path, rows, batch_size, config):
+    session = ModelSession("normal", model_path, config, max_batch_size=batch_size)
+
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        fill_features(session.input_buffer(len(chunk)), chunk, FEATURE_NAMES)
+        session.run(len(chunk))
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bench_inference_only(model_path, batch_size, config, iterations):
+    """Model time alone, buffers already filled"""
+    session = ModelSession("normal", model_path, config, max_batch_size=batch_size)
+    session.input_buffer(batch_size)[:] = np.random.default_rng(2).standard_normal((batch_size, session.n_features))
+    session.run(batch_size)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        session.run(batch_size)
+    return batch_size * iterations / (time.perf_counter() - start)
+
+
+async def bench_pool(model_path, rows, batch_size, workers, config):
+    """All batches submitted at once; the pool runs one per worker process at a time"""
+    pool = InferencePool({"normal": model_path}, workers=workers, max_batch_size=batch_size, config=config)
+    await pool.start()
+    try:
+        await pool.predict_rows("normal", rows[:batch_size * workers], FEATURE_NAMES)  # warm-up
+        start = time.perf_counter()
+        await pool.predict_rows("normal", rows, FEATURE_NAMES)
+        return len(rows) / (time.perf_counter() - start)
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ONNX inference throughput on CPU")
+    parser.add_argument("--model", help="ONNX model with a [batch, 20] float input (default: synthetic MLP)")
+    parser.add_argument("--symbols", type=int, default=4096)
+    parser.add_argument("--batch-sizes", default="1,8,32,128,512")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads (default: ORT_INTRA_OP_THREADS or CPU count)")
+    parser.add_argument("--pool-workers", default="", help="comma-separated worker counts for the process pool")
+    parser.add_argument("--pool-batch-size", type=int, default=128)
+    args = parser.parse_args()
+
+    config = SessionConfig.from_env()
+    if args.threads:
+        config = SessionConfig(intra_op_threads=args.threads)
+
+    print("=" * 60)
+    print("ONNX Inference Benchmark (CPUExecutionProvider)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if not model_path:
+            model_path = str(Path(tmp) / "synthetic.onnx")
+            build_synthetic_model(model_path, len(FEATURE_NAMES))
+            print(f"[INFO] Synthetic MLP: {len(FEATURE_NAMES)} -> 128 -> 128 -> 1")
+        print(f"[INFO] onnxruntime {ort.__version__}, intra-op threads: {config.intra_op_threads}, "
+              f"graph optimization: {config.graph_optimization}")
+
+        rows = make_rows(args.symbols)
+        print(f"\n{'batch':>6} {'baseline':>14} {'runtime':>14} {'speedup':>8} {'model only':>14}")
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            baseline = bench_baseline(model_path, rows, batch_size)
+            tuned = bench_runtime(model_path, rows, batch_size, config)
+            model_only = bench_inference_only(model_path, batch_size, config, iterations=max(20, 20000 // batch_size))
+            print(f"{batch_size:>6} {baseline:>10,.0f}/s {tuned:>10,.0f}/s {tuned / baseline:>7.2f}x {model_only:>10,.0f}/s")
+
+        if args.pool_workers:
+            print(f"\n[INFO] InferencePool, batch {args.pool_batch_size}, {os.cpu_count()} CPUs")
+            for workers in [int(w) for w in args.pool_workers.split(",")]:
+                rate = asyncio.run(bench_pool(model_path, rows, args.pool_batch_size, workers, config))
+                print(f"[OK] {workers:>2} workers: {rate:>10,.0f} symbols/s")
+
+    print("\n[OK] symbols/sec includes feature conversion from Redis-style hashes; "
+          "'model only' is inference on pre-filled buffers")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERROR] Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Qdrant Profile Benchmark (recall vs latency vs RAM)
+Loads the same corpus into one collection per profile and compares search
+recall@k against exact (brute-force) neighbours, query latency and estimated RAM.
+
+The corpus is synthetic clustered unit vectors by default, or a local .npy
+matrix of real embeddings (e.g. exported from financial_knowledge).
+
+Usage:
+  python scripts/benchmark_qdrant_profiles.py [--points 50000] [--profiles exact,balanced]
+  python scripts/benchmark_qdrant_profiles.py --vectors embeddings.npy --ef 32,64,128
+  python scripts/benchmark_qdrant_profiles.py --local --points 2000   # smoke test only
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.common.qdrant_profiles import PROFILES  # noqa: E402
+
+COLLECTION_PREFIX = "bench_profile_"
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_corpus(points: int, dim: int, queries: int, seed: int = 7):
+    """Clustered unit vectors, so neighbourhoods look like topic clusters of real text"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(points // 200, 8), dim))
+    corpus = centers[rng.integers(len(centers), size=points)] + 0.6 * rng.standard_normal((points, dim))
+    probes = centers[rng.integers(len(centers), size=queries)] + 0.6 * rng.standard_normal((queries, dim))
+    return normalize(corpus), normalize(probes)
+
+
+def file_corpus(path: str, queries: int, seed: int = 7):
+    """Real embeddings; queries are held-out rows perturbed slightly"""
+    vectors = normalize(np.load(path))
+    rng = np.random.default_rng(seed)
+    held_out = rng.choice(len(vectors), size=queries, replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    probes = vectors[held_out] + 0.05 * rng.standard_normal((queries, vectors.shape[1]))
+    return vectors[mask], normalize(probes)
+
+
+def exact_neighbours(corpus: np.ndarray, probes: np.ndarray, k: int) -> np.ndarray:
+    scores = probes @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def wait_until_indexed(client: QdrantClient, collection: str, timeout: float = 600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    print(f"[WARN] {collection} still optimizing after {timeout:.0f}s; results include unindexed segments")
+
+
+def load_profile(client: QdrantClient, profile, corpus: np.ndarray):
+    collection = COLLECTION_PREFIX + profile.name
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+
+    client.create_collection(
+        collection_name=collection,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),  # Build HNSW once, after upload
+        **profile.collection_kwargs(corpus.shape[1]),
+    )
+
+    start = time.perf_counter()
+    client.upload_collection(collection, vectors=corpus, ids=range(len(corpus)), batch_size=512, parallel=4)
+    client.update_collection(collection, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1))
+    wait_until_indexed(client, collection)
+    print(f"[OK] Loaded {len(corpus):,} points into {collection} in {time.perf_counter() - start:.1f}s")
+    return collection
+
+
+def measure(client: QdrantClient, collection: str, profile, probes: np.ndarray, truth: np.ndarray, k: int):
+    params = profile.search_params()
+    for probe in probes[:10]:  # Warm caches / page in on-disk data
+        client.query_points(collection, query=probe.tolist(), limit=k, search_params=params)
+
+    latencies, hits = [], 0
+    for probe, expected in zip(probes, truth):
+        start = time.perf_counter()
+        points = client.query_points(collection, query=probe.tolist(), limit=k, search_params=params).points
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({p.id for p in points} & set(expected.tolist()))
+
+    return hits / truth.size, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant collection profiles")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--local", action="store_true", help="In-process Qdrant (exact search; smoke test only)")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vectors", help="Use a local .npy matrix instead of a synthetic corpus")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", help="Comma-separated hnsw_ef values to sweep (default: each profile's own)")
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark collections afterwards")
+    args = parser.parse_args()
+
+    profiles = [PROFILES[name] for name in args.profiles.split(",")]
+    client = QdrantClient(location=":memory:") if args.local else QdrantClient(url=args.qdrant_url, timeout=300)
+
+    if args.vectors:
+        corpus, probes = file_corpus(args.vectors, args.queries)
+    else:
+        corpus, probes = synthetic_corpus(args.points, args.dim, args.queries)
+    truth = exact_neighbours(corpus, probes, args.k)
+    print(f"[INFO] Corpus: {len(corpus):,} x {corpus.shape[1]}, {len(probes)} queries, recall@{args.k}")
+
+    rows = []
+    for profile in profiles:
+        collection = load_profile(client, profile, corpus)
+        ef_values = [int(v) for v in args.ef.split(",")] if args.ef else [profile.hnsw_ef]
+        for ef in ef_values:
+            variant = dataclasses.replace(profile, hnsw_ef=ef)
+            recall, p50, p95 = measure(client, collection, variant, probes, truth, args.k)
+            ram_mb = profile.estimated_ram_bytes(len(corpus), corpus.shape[1]) / 1024 ** 2
+            rows.append((profile.name, ef, recall, p50, p95, ram_mb))
+        if not args.keep:
+            client.delete_collection(collection)
+
+    print("\n" + "=" * 72)
+    print(f"{'Profile':<12} {'ef':>5} {'Recall@' + str(args.k):>10} {'p50 ms':>9} {'p95 ms':>9} {'Est. RAM MB':>13}")
+    print("=" * 72)
+    for name, ef, recall, p50, p95, ram_mb in rows:
+        print(f"{name:<12} {ef:>5} {recall:>10.3f} {p50:>9.2f} {p95:>9.2f} {ram_mb:>13.1f}")
+    if args.local:
+        print("\n[INFO] Local mode ignores HNSW and quantization; run against a Qdrant server for real numbers")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERROR] Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
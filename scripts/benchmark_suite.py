@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Feature 1: End-to-End Benchmark Suite
+Measures the pipeline against the section 9 performance claims and checks for regressions
+
+Usage:
+  python scripts/benchmark_suite.py                        # in-process, 5000 symbols
+  python scripts/benchmark_suite.py --live                 # through docker-compose NATS + Redis
+  python scripts/benchmark_suite.py --api-url http://localhost:8000
+  python scripts/benchmark_suite.py --save-baseline        # record benchmarks/baseline.json
+
+Results are written as JSON (benchmarks/results/ by default) and compared
+against benchmarks/baseline.json. Exits 1 when any measurement is worse than
+the baseline by more than --tolerance, so CI can gate on it. Baselines are
+machine-specific and gitignored: record one with --save-baseline on the
+machine that runs the comparison. Without one the run only reports.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import BASELINE_PATH, DEFAULT_TOLERANCE, BenchmarkReport  # noqa: E402
+from benchmarks.pipeline import run_suite  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "results"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=5000, help="API reads for the cache-hit benchmark")
+    parser.add_argument("--live", action="store_true", help="Use NATS_URL and REDIS_URL instead of in-process stand-ins")
+    parser.add_argument("--api-url", help="Read predictions from a running gateway (needs --live)")
+    parser.add_argument("--model", help="ONNX model to benchmark (default: synthetic MLP)")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fraction worse than baseline (default 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    if args.api_url and not args.live:
+        parser.error("--api-url reads what the pipeline wrote, so it needs --live")
+
+    print("=" * 60)
+    print("End-to-End Benchmark Suite")
+    print("=" * 60)
+    print(f"[INFO] {args.symbols} symbols, {args.reads} API reads, {'live' if args.live else 'in-process'}")
+
+    report = asyncio.run(run_suite(args.symbols, args.reads, args.live, args.api_url, args.model))
+    print()
+    print(report.format_table())
+
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    report.save(output)
+    print(f"\n[OK] Results written to {output}")
+
+    if args.save_baseline:
+        report.save(args.baseline)
+        print(f"[OK] Baseline written to {args.baseline}")
+        return 0
+
+    missed = [m.name for m in report.measurements.values() if m.meets_target is False]
+    for name in missed:
+        print(f"[WARN] {name} misses its section 9 target")
+
+    if not args.baseline.exists():
+        print(f"[INFO] No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    baseline = BenchmarkReport.load(args.baseline)
+    if baseline.meta.get("symbols") != report.meta["symbols"] or baseline.meta.get("mode") != report.meta["mode"]:
+        print("[WARN] Baseline was recorded with different --symbols or mode; comparison may be meaningless")
+    regressions = report.compare(baseline, args.tolerance)
+    if regressions:
+        for regression in regressions:
+            print(f"[ERROR] Regression: {regression}")
+        return 1
+    print(f"[OK] No regressions against baseline ({baseline.meta.get('commit') or 'unknown commit'})")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"\n[ERROR] Benchmark failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -1,6 +1,6 @@
 #!/bin/bash
 # Database restore script
-# Usage: ./scripts/db_restore.sh <backup_name>
+# Usage: ./scripts/db_restore.sh <backup_name> [jobs]
 
 set -e
 
@@ -16,10 +16,17 @@ if [ -z "$1" ]; then
     echo "Usage: $0 <backup_name>"
     echo ""
     echo "Available backups:"
-    ls -1 backups/*.sql.gz 2>/dev/null || echo "  No backups found"
+    ls -1d backups/*/ backups/*.sql.gz 2>/dev/null | grep -v '^backups/chunks/$' || echo "  No backups found"
     exit 1
 fi
 
+# Directory-format backups (db_backup.sh / pg_backup.py) restore in parallel
+if [ -d "backups/$1" ]; then
+    exec python "$(dirname "$0")/pg_backup.py" restore "$1" --jobs "${2:-${BACKUP_JOBS:-4}}"
+fi
+
+# Older single-file backups (backups/<name>.sql.gz) restore serially below
+
 # Database connection
 DB_HOST="${DB_HOST:-localhost}"
 DB_PORT="${DB_PORT:-5432}"
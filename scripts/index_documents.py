@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Knowledge Base Indexer
+Bulk-loads filings, transcripts and playbooks into the Qdrant RAG collection
+
+Files are grouped by their top-level directory (doc_type), e.g.:
+  data/knowledge/filings/AAPL_10K_2024.txt
+  data/knowledge/transcripts/MSFT_Q3_2025.md
+  data/knowledge/playbooks/earnings_gap.json   ({"text": ..., "title": ...})
+
+Usage:
+  python scripts/index_documents.py data/knowledge [--parallel 4] [--use-service]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import redis.asyncio as redis  # noqa: E402
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+
+from services.explanation_worker.embedding_service import (  # noqa: E402
+    EMBEDDING_DIM,
+    EmbeddingService,
+    check_collection_dimension,
+    load_sentence_transformer,
+)
+from services.explanation_worker.ingestion import DocumentIndexer, iter_documents  # noqa: E402
+from services.explanation_worker.retrieval import RetrievalCache  # noqa: E402
+
+
+async def make_embedder(use_service: bool):
+    """Local model (fastest for a one-off bulk load) or the shared NATS service"""
+    if use_service:
+        from nats.aio.client import Client as NATS
+
+        from services.explanation_worker.embedding_service import EmbeddingClient
+
+        nats = NATS()
+        await nats.connect(servers=[os.getenv("NATS_URL", "nats://localhost:4222")])
+        print("[OK] Using shared embedding service over NATS")
+        return EmbeddingClient(nats, timeout=60.0), nats.close
+
+    encoder, dim = load_sentence_transformer(device=os.getenv("EMBEDDING_DEVICE", "cpu"))
+    service = EmbeddingService(encoder, dim=dim, max_batch_size=128)
+    await service.start()
+    print(f"[OK] Loaded embedding model locally ({dim} dims)")
+    return service, service.stop
+
+
+async def run(args):
+    root = Path(args.directory)
+    if not root.is_dir():
+        raise FileNotFoundError(f"{root} is not a directory")
+
+    qdrant = AsyncQdrantClient(url=args.qdrant_url, timeout=120)
+    await check_collection_dimension(qdrant, args.collection, EMBEDDING_DIM)
+    print(f"[OK] Connected to Qdrant at {args.qdrant_url} (collection '{args.collection}')")
+
+    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    embedder, close = await make_embedder(args.use_service)
+    indexer = DocumentIndexer(
+        qdrant,
+        embedder,
+        collection=args.collection,
+        chunk_words=args.chunk_words,
+        overlap=args.overlap,
+        upsert_batch_size=args.batch_size,
+        parallel=args.parallel,
+        retrieval_cache=RetrievalCache(redis_client),
+    )
+
+    try:
+        await indexer.ensure_payload_indexes()
+        print(f"[INFO] Indexing {root} (indexing deferred until load completes)...")
+        stats = await indexer.index(iter_documents(root), defer=not args.no_defer)
+    finally:
+        await close()
+        await qdrant.close()
+        await redis_client.close()
+
+    print("\n" + "=" * 60)
+    print("Indexing Summary")
+    print("=" * 60)
+    print(f"  Documents indexed: {stats['documents']}")
+    print(f"  Unchanged (skipped): {stats['skipped']}")
+    print(f"  Chunks upserted: {stats['chunks']}")
+    print(f"  Stale chunks deleted: {stats['deleted_chunks']}")
+    print(f"  Elapsed: {stats['elapsed_s']:.1f}s")
+    print(f"  Throughput: {stats['docs_per_s']:.1f} docs/s, {stats['chunks_per_s']:.1f} chunks/s")
+    print("\n[OK] Indexing complete!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-index documents into Qdrant")
+    parser.add_argument("directory", help="Root directory of documents to index")
+    parser.add_argument("--collection", default="financial_knowledge")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--chunk-words", type=int, default=180)
+    parser.add_argument("--overlap", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=256, help="Points per upsert request")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent upsert requests")
+    parser.add_argument("--use-service", action="store_true", help="Embed via the shared NATS service")
+    parser.add_argument("--no-defer", action="store_true", help="Keep HNSW indexing on during the load")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERROR] Indexing failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Feature 1: Parallel Database Backup / Restore
+Directory-format pg_dump / pg_restore with parallel jobs and zstd compression,
+TimescaleDB-aware restores, and incremental per-chunk export of hypertables
+
+Usage:
+  python scripts/pg_backup.py backup [--name NAME] [--jobs 8]
+  python scripts/pg_backup.py restore NAME [--jobs 8] [--yes]
+  python scripts/pg_backup.py chunks                      # export new / still-open hypertable chunks
+  python scripts/pg_backup.py restore-chunks NAME         # replay chunk exports taken after backup NAME
+  python scripts/pg_backup.py bench [--jobs 1,4,8]        # throughput against the local container
+
+Full backups go to backups/<name>/ as one compressed file per table. pg_dump
+writes them with --jobs workers, and pg_restore loads them back the same way.
+zstd needs a PostgreSQL 16+ client. The server can stay on pg15, and older
+clients fall back to gzip. Restores follow the TimescaleDB procedure: create
+the extension at the backed-up version, timescaledb_pre_restore(),
+pg_restore, timescaledb_post_restore(), then ANALYZE.
+
+`chunks` exports hypertable chunks with binary COPY into
+backups/chunks/<hypertable>/<chunk>.bin.zst. A chunk whose time range closed
+more than CHUNK_SEAL_HOURS ago is sealed and exported once. The chunk still
+receiving writes is exported again on every run. A daily run therefore reads
+about one day of data instead of all 90. Restore the latest full backup, then
+`restore-chunks` it to replay everything exported since.
+
+Requires pg_dump/pg_restore and zstd on PATH.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import asyncpg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import BenchmarkReport, Measurement  # noqa: E402
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", "5432"))
+DB_NAME = os.getenv("DB_NAME", "riskee")
+DB_USER = os.getenv("DB_USER", "postgres")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "riskee123")
+
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", "backups"))
+CHUNK_DIR_NAME = "chunks"
+MANIFEST = "manifest.json"
+DEFAULT_JOBS = min(os.cpu_count() or 4, 8)
+ZSTD_LEVEL = int(os.getenv("BACKUP_ZSTD_LEVEL", "3"))
+CHUNK_SEAL_HOURS = float(os.getenv("CHUNK_SEAL_HOURS", "1"))
+
+CHUNKS_QUERY = """
+    SELECT hypertable_schema, hypertable_name, chunk_schema, chunk_name,
+           primary_dimension, range_start, range_end, is_compressed
+    FROM timescaledb_information.chunks
+    WHERE range_start IS NOT NULL
+    ORDER BY hypertable_name, range_start
+"""
+
+# pg_dump records CREATE EXTENSION timescaledb; the restore creates it first (at the right version)
+EXTENSION_TOC_ENTRY = re.compile(r"\b(EXTENSION|COMMENT - EXTENSION) .*\btimescaledb\b")
+
+
+def pg_env() -> Dict[str, str]:
+    return {**os.environ, "PGPASSWORD": DB_PASSWORD}
+
+
+def connection_args(database: str = DB_NAME) -> List[str]:
+    return ["--host", DB_HOST, "--port", str(DB_PORT), "--username", DB_USER, "--dbname", database]
+
+
+async def connect(database: str = DB_NAME) -> asyncpg.Connection:
+    return await asyncpg.connect(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD, database=database)
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def require_tools(*tools: str):
+    missing = [tool for tool in tools if shutil.which(tool) is None]
+    if missing:
+        raise RuntimeError(f"{', '.join(missing)} not found on PATH")
+
+
+def client_major_version(tool: str = "pg_dump") -> int:
+    """Major version of a PostgreSQL client tool, e.g. 16 from 'pg_dump (PostgreSQL) 16.2'"""
+    output = subprocess.run([tool, "--version"], capture_output=True, text=True, check=True).stdout
+    match = re.search(r"(\d+)(?:\.\d+)?", output)
+    if not match:
+        raise RuntimeError(f"Could not parse {tool} version from {output!r}")
+    return int(match.group(1))
+
+
+def compression_arg(client_major: int, level: int = ZSTD_LEVEL) -> str:
+    """zstd needs pg_dump 16+; older clients get gzip"""
+    if client_major >= 16:
+        return f"zstd:{level}"
+    return str(min(max(level, 1), 9))
+
+
+def dump_command(out_dir: Path, jobs: int, compress: str, database: str = DB_NAME) -> List[str]:
+    return [
+        "pg_dump", *connection_args(database),
+        "--format=directory", f"--jobs={jobs}", f"--compress={compress}",
+        "--no-owner", "--no-acl", "--file", str(out_dir),
+    ]
+
+
+def restore_command(backup_dir: Path, jobs: int, list_file: Path, database: str) -> List[str]:
+    return [
+        "pg_restore", *connection_args(database),
+        "--format=directory", f"--jobs={jobs}", "--use-list", str(list_file),
+        "--no-owner", "--no-acl", "--exit-on-error", str(backup_dir),
+    ]
+
+
+def filter_restore_list(listing: str) -> str:
+    """Comment out the timescaledb extension entries of a `pg_restore --list` table of contents"""
+    return "\n".join(
+        f";{line}" if not line.startswith(";") and EXTENSION_TOC_ENTRY.search(line) else line
+        for line in listing.splitlines()
+    ) + "\n"
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def read_manifest(path: Path) -> Dict:
+    return json.loads((path / MANIFEST).read_text())
+
+
+def write_manifest(path: Path, manifest: Dict):
+    tmp = path / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, default=str) + "\n")
+    tmp.replace(path / MANIFEST)
+
+
+def run(cmd: List[str]):
+    result = subprocess.run(cmd, env=pg_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+    return result.stdout
+
+
+# Full backup / restore
+
+async def server_versions(database: str = DB_NAME) -> Dict:
+    conn = await connect(database)
+    try:
+        return {
+            "postgres": await conn.fetchval("SHOW server_version"),
+            "timescaledb": await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'timescaledb'"),
+            "database_bytes": await conn.fetchval("SELECT pg_database_size(current_database())"),
+        }
+    finally:
+        await conn.close()
+
+
+async def backup(name: str, jobs: int = DEFAULT_JOBS, root: Path = BACKUP_DIR, database: str = DB_NAME) -> Dict:
+    """Parallel directory-format dump; returns the manifest"""
+    require_tools("pg_dump")
+    out_dir = root / name
+    if out_dir.exists():
+        raise FileExistsError(f"{out_dir} already exists")
+    root.mkdir(parents=True, exist_ok=True)
+
+    major = client_major_version("pg_dump")
+    compress = compression_arg(major)
+    if not compress.startswith("zstd"):
+        print(f"[WARN] pg_dump {major} has no zstd support; using gzip (install a PostgreSQL 16+ client)")
+
+    versions = await server_versions(database)
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    run(dump_command(out_dir, jobs, compress, database))
+    seconds = time.perf_counter() - start
+
+    manifest = {
+        "name": name,
+        "database": database,
+        "started_at": started.isoformat(),
+        "seconds": round(seconds, 3),
+        "jobs": jobs,
+        "compression": compress,
+        "pg_dump_version": major,
+        **versions,
+        "backup_bytes": directory_size(out_dir),
+    }
+    write_manifest(out_dir, manifest)
+    return manifest
+
+
+async def recreate_database(database: str, timescaledb_version: Optional[str]):
+    admin = await connect("postgres")
+    try:
+        await admin.execute(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = $1 AND pid <> pg_backend_pid()",
+            database,
+        )
+        await admin.execute(f"DROP DATABASE IF EXISTS {quote_ident(database)}")
+        await admin.execute(f"CREATE DATABASE {quote_ident(database)}")
+    finally:
+        await admin.close()
+
+    conn = await connect(database)
+    try:
+        version = f" VERSION '{timescaledb_version}'" if timescaledb_version else ""
+        await conn.execute(f"CREATE EXTENSION IF NOT EXISTS timescaledb{version}")
+        await conn.execute("SELECT timescaledb_pre_restore()")
+    finally:
+        await conn.close()
+
+
+async def restore(name: str, jobs: int = DEFAULT_JOBS, root: Path = BACKUP_DIR, database: str = DB_NAME) -> float:
+    """Drop and recreate `database` from backup `name`; returns seconds spent in pg_restore"""
+    require_tools("pg_restore")
+    backup_dir = root / name
+    manifest = read_manifest(backup_dir)
+    list_file = backup_dir / "restore.list"
+    list_file.write_text(filter_restore_list(run(["pg_restore", "--list", str(backup_dir)])))
+
+    await recreate_database(database, manifest.get("timescaledb"))
+    start = time.perf_counter()
+    restored = False
+    try:
+        run(restore_command(backup_dir, jobs, list_file, database))
+        restored = True
+    finally:
+        list_file.unlink(missing_ok=True)
+        seconds = time.perf_counter() - start
+        # Also after a failed pg_restore: timescaledb.restoring would keep background jobs off
+        conn = await connect(database)
+        try:
+            await conn.execute("SELECT timescaledb_post_restore()")
+            if restored:
+                await conn.execute("ANALYZE")
+        finally:
+            await conn.close()
+    return seconds
+
+
+# Incremental chunk export
+
+def chunk_key(chunk: Dict) -> str:
+    return f"{chunk['chunk_schema']}.{chunk['chunk_name']}"
+
+
+def is_sealed(chunk: Dict, now: datetime, grace: timedelta = timedelta(hours=CHUNK_SEAL_HOURS)) -> bool:
+    return chunk["range_end"] <= now - grace
+
+
+def chunks_to_export(chunks: List[Dict], exported: Dict[str, Dict]) -> List[Dict]:
+    """Chunks never exported, plus ones that were still open for writes when last exported"""
+    return [
+        chunk for chunk in chunks
+        if chunk_key(chunk) not in exported or not exported[chunk_key(chunk)]["sealed"]
+    ]
+
+
+def chunks_to_replay(exported: Dict[str, Dict], since: datetime) -> List[Dict]:
+    """Chunk exports newer than a full backup, oldest range first"""
+    return sorted(
+        (entry for entry in exported.values() if datetime.fromisoformat(entry["exported_at"]) > since),
+        key=lambda entry: (entry["hypertable"], entry["range_start"]),
+    )
+
+
+async def export_chunk(pool: asyncpg.Pool, chunk: Dict, path: Path, level: int = ZSTD_LEVEL) -> int:
+    """Binary COPY of one chunk's time range, streamed through zstd; returns the row count"""
+    table = f"{quote_ident(chunk['hypertable_schema'])}.{quote_ident(chunk['hypertable_name'])}"
+    column = quote_ident(chunk["primary_dimension"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+
+    zstd = await asyncio.create_subprocess_exec(
+        "zstd", "-q", "-f", f"-{level}", "-o", str(tmp), stdin=asyncio.subprocess.PIPE
+    )
+
+    async def write(data: bytes):
+        zstd.stdin.write(data)
+        await zstd.stdin.drain()
+
+    try:
+        async with pool.acquire() as conn:
+            # Through the hypertable so compressed chunks come back decompressed
+            status = await conn.copy_from_query(
+                f"SELECT * FROM {table} WHERE {column} >= $1 AND {column} < $2",
+                chunk["range_start"], chunk["range_end"], output=write, format="binary",
+            )
+    finally:
+        zstd.stdin.close()
+        await zstd.wait()
+    if zstd.returncode != 0:
+        raise RuntimeError(f"zstd failed for {chunk_key(chunk)}")
+    tmp.replace(path)
+    return int(status.split()[-1])
+
+
+async def export_chunks(jobs: int = DEFAULT_JOBS, root: Path = BACKUP_DIR, database: str = DB_NAME,
+                        now: Optional[datetime] = None) -> Dict:
+    """Export new and still-open chunks; returns run stats"""
+    require_tools("zstd")
+    chunk_dir = root / CHUNK_DIR_NAME
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(chunk_dir) if (chunk_dir / MANIFEST).exists() else {"chunks": {}}
+    exported = manifest["chunks"]
+    now = now or datetime.now(timezone.utc)
+
+    pool = await asyncpg.create_pool(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+                                     database=database, min_size=1, max_size=jobs)
+    try:
+        chunks = [dict(row) for row in await pool.fetch(CHUNKS_QUERY)]
+        pending = chunks_to_export(chunks, exported)
+        limit = asyncio.Semaphore(jobs)
+        start = time.perf_counter()
+
+        async def one(chunk: Dict):
+            async with limit:
+                path = chunk_dir / chunk["hypertable_name"] / f"{chunk['chunk_name']}.bin.zst"
+                rows = await export_chunk(pool, chunk, path)
+            exported[chunk_key(chunk)] = {
+                "hypertable": f"{chunk['hypertable_schema']}.{chunk['hypertable_name']}",
+                "column": chunk["primary_dimension"],
+                "range_start": chunk["range_start"].isoformat(),
+                "range_end": chunk["range_end"].isoformat(),
+                "file": str(path.relative_to(chunk_dir)),
+                "rows": rows,
+                "bytes": path.stat().st_size,
+                "sealed": is_sealed(chunk, now),
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+            }
+
+        await asyncio.gather(*(one(chunk) for chunk in pending))
+        seconds = time.perf_counter() - start
+    finally:
+        await pool.close()
+
+    write_manifest(chunk_dir, manifest)
+    return {
+        "chunks": len(chunks),
+        "exported": len(pending),
+        "skipped": len(chunks) - len(pending),
+        "rows": sum(exported[chunk_key(c)]["rows"] for c in pending),
+        "bytes": sum(exported[chunk_key(c)]["bytes"] for c in pending),
+        "seconds": seconds,
+    }
+
+
+async def _stdout(process: asyncio.subprocess.Process):
+    while data := await process.stdout.read(1 << 20):
+        yield data
+
+
+async def restore_chunks(name: str, root: Path = BACKUP_DIR, database: str = DB_NAME) -> int:
+    """Replay chunk exports taken after full backup `name`; each replaces its time range"""
+    require_tools("zstd")
+    since = datetime.fromisoformat(read_manifest(root / name)["started_at"])
+    chunk_dir = root / CHUNK_DIR_NAME
+    entries = chunks_to_replay(read_manifest(chunk_dir)["chunks"], since)
+
+    conn = await connect(database)
+    try:
+        for entry in entries:
+            schema, table = entry["hypertable"].split(".", 1)
+            column = quote_ident(entry["column"])
+            zstd = await asyncio.create_subprocess_exec(
+                "zstd", "-dc", str(chunk_dir / entry["file"]), stdout=asyncio.subprocess.PIPE
+            )
+            try:
+                async with conn.transaction():
+                    await conn.execute(
+                        f"DELETE FROM {quote_ident(schema)}.{quote_ident(table)} "
+                        f"WHERE {column} >= $1 AND {column} < $2",
+                        datetime.fromisoformat(entry["range_start"]), datetime.fromisoformat(entry["range_end"]),
+                    )
+                    await conn.copy_to_table(table, schema_name=schema, source=_stdout(zstd), format="binary")
+                    # A truncated or corrupt file can still COPY cleanly; roll back rather than keep part of it
+                    if await zstd.wait() != 0:
+                        raise RuntimeError(f"zstd failed for {entry['file']}")
+            finally:
+                if zstd.returncode is None:
+                    zstd.kill()
+                    await zstd.wait()
+            print(f"[OK] {entry['hypertable']} {entry['range_start']} .. {entry['range_end']} ({entry['rows']} rows)")
+    finally:
+        await conn.close()
+    return len(entries)
+
+
+# Throughput benchmark
+
+async def bench(jobs_list: List[int], root: Path, keep: bool) -> BenchmarkReport:
+    """Backup and restore throughput per --jobs value, against a scratch restore database"""
+    scratch = f"{DB_NAME}_restore_bench"
+    versions = await server_versions()
+    size_mb = versions["database_bytes"] / 1e6
+    report = BenchmarkReport({"database": DB_NAME, "database_mb": round(size_mb, 1), **versions})
+    print(f"[INFO] {DB_NAME}: {size_mb:,.0f} MB, PostgreSQL {versions['postgres']}, TimescaleDB {versions['timescaledb']}")
+
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    try:
+        for jobs in jobs_list:
+            name = f"bench_{stamp}_j{jobs}"
+            manifest = await backup(name, jobs, root)
+            restore_seconds = await restore(name, jobs, root, database=scratch)
+            ratio = manifest["database_bytes"] / max(manifest["backup_bytes"], 1)
+            for kind, seconds in (("backup", manifest["seconds"]), ("restore", restore_seconds)):
+                report.add(Measurement(f"{kind}.j{jobs}_seconds", seconds, "s"))
+                report.add(Measurement(f"{kind}.j{jobs}_mb_per_sec", size_mb / seconds, "MB/s", higher_is_better=True))
+            report.add(Measurement(f"backup.j{jobs}_compression_ratio", ratio, "x", higher_is_better=True))
+            if not keep:
+                shutil.rmtree(root / name)
+
+        bench_root = root / f"bench_{stamp}_chunks"
+        first = await export_chunks(max(jobs_list), bench_root)
+        second = await export_chunks(max(jobs_list), bench_root)
+        report.add(Measurement("chunks.full_export_seconds", first["seconds"], "s", detail=first))
+        report.add(Measurement("chunks.incremental_export_seconds", second["seconds"], "s", detail=second))
+        if not keep:
+            shutil.rmtree(bench_root)
+    finally:
+        admin = await connect("postgres")
+        try:
+            await admin.execute(f"DROP DATABASE IF EXISTS {quote_ident(scratch)}")
+        finally:
+            await admin.close()
+    return report
+
+
+def confirm(database: str) -> bool:
+    print(f"WARNING: This will REPLACE all data in database '{database}'")
+    return input("Are you sure? Type 'yes' to continue: ") == "yes"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel TimescaleDB backup and restore")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backup", help="Parallel directory-format dump")
+    p.add_argument("--name", default=f"backup_{time.strftime('%Y%m%d_%H%M%S')}")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+
+    p = sub.add_parser("restore", help="Recreate the database from a backup")
+    p.add_argument("name")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+    p.add_argument("--database", default=DB_NAME)
+    p.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+
+    p = sub.add_parser("chunks", help="Export new and still-open hypertable chunks")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS)
+
+    p = sub.add_parser("restore-chunks", help="Replay chunk exports taken after a full backup")
+    p.add_argument("name")
+    p.add_argument("--database", default=DB_NAME)
+
+    p = sub.add_parser("bench", help="Measure backup/restore throughput against the local database")
+    p.add_argument("--jobs", default="1,4,8", help="Comma-separated --jobs values to compare")
+    p.add_argument("--keep", action="store_true", help="Keep the benchmark backups")
+    p.add_argument("--output", type=Path, help="Write results as JSON")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Parallel Database Backup")
+    print("=" * 60)
+
+    if args.command == "backup":
+        m = asyncio.run(backup(args.name, args.jobs))
+        print(f"[OK] {BACKUP_DIR / args.name}: {m['database_bytes'] / 1e6:,.0f} MB -> {m['backup_bytes'] / 1e6:,.0f} MB "
+              f"({m['compression']}) in {m['seconds']:.1f}s with {args.jobs} jobs")
+        print(f"     Restore: python scripts/pg_backup.py restore {args.name}")
+
+    elif args.command == "restore":
+        if not args.yes and not confirm(args.database):
+            print("Restore cancelled")
+            return 0
+        seconds = asyncio.run(restore(args.name, args.jobs, database=args.database))
+        print(f"[OK] Restored {args.name} into {args.database} in {seconds:.1f}s with {args.jobs} jobs")
+
+    elif args.command == "chunks":
+        stats = asyncio.run(export_chunks(args.jobs))
+        print(f"[OK] Exported {stats['exported']} of {stats['chunks']} chunks ({stats['rows']:,} rows, "
+              f"{stats['bytes'] / 1e6:,.1f} MB) in {stats['seconds']:.1f}s; {stats['skipped']} sealed chunks skipped")
+
+    elif args.command == "restore-chunks":
+        count = asyncio.run(restore_chunks(args.name, database=args.database))
+        print(f"[OK] Replayed {count} chunk exports")
+
+    elif args.command == "bench":
+        report = asyncio.run(bench([int(j) for j in args.jobs.split(",")], BACKUP_DIR, args.keep))
+        print()
+        print(report.format_table())
+        if args.output:
+            report.save(args.output)
+            print(f"\n[OK] Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"\n[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
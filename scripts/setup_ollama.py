@@ -67,24 +67,37 @@ def test_generation(model_name, prompt):
 
     try:
         start_time = time.time()
+        first_token_time = None
+        generated_text = ""
 
+        # Stream, as the explanation worker does: time-to-first-token is what users wait for
         response = requests.post(
             f"{OLLAMA_HOST}/api/generate",
             json={
                 "model": model_name,
                 "prompt": prompt,
-                "stream": False
+                "stream": True
             },
+            stream=True,
             timeout=60
         )
 
-        elapsed = time.time() - start_time
-
         if response.status_code == 200:
-            data = response.json()
-            generated_text = data.get("response", "")
-
-            print(f"[OK] Generation successful ({elapsed:.2f}s)")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    generated_text += chunk["response"]
+                if chunk.get("done"):
+                    break
+
+            elapsed = time.time() - start_time
+
+            print(f"[OK] Generation successful ({elapsed:.2f}s total, "
+                  f"first token after {first_token_time or elapsed:.2f}s)")
             print(f"\nPrompt: {prompt}")
             print(f"Response: {generated_text[:200]}...")
 
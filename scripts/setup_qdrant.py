@@ -2,49 +2,73 @@
 """
 Feature 1: Qdrant Vector Database Setup Script
 Configures collections for RAG (Retrieval Augmented Generation)
+
+Usage:
+  python scripts/setup_qdrant.py [--profile balanced|exact|compact|high_recall]
 """
 
+import argparse
 import sys
+from pathlib import Path
+
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import Distance, PointStruct
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def setup_qdrant():
+from services.common.qdrant_profiles import PROFILES, get_profile  # noqa: E402
+from services.explanation_worker.ingestion import PAYLOAD_INDEXES  # noqa: E402
+
+# all-MiniLM-L6-v2 produces 384-dim vectors; services check this at startup
+EMBEDDING_DIM = 384
+
+def setup_qdrant(profile_name=None):
     """Create Qdrant collections for the prediction system"""
 
+    profile = get_profile(profile_name)
+
     # Connect to Qdrant
     client = QdrantClient(host="localhost", port=6333)
     print("[OK] Connected to Qdrant server")
 
     # Collection configurations for RAG system
     collections = [
+        {
+            "name": "financial_knowledge",
+            "description": "EDGAR filings, transcripts and playbooks used by the explanation worker",
+            "vector_size": EMBEDDING_DIM,
+            "distance": Distance.COSINE,
+            # Retrieval filters on these inside the ANN search
+            "payload_indexes": PAYLOAD_INDEXES,
+        },
         {
             "name": "market_news",
             "description": "Financial news articles and market commentary",
-            "vector_size": 768,  # all-MiniLM-L6-v2 embedding size
+            "vector_size": EMBEDDING_DIM,
             "distance": Distance.COSINE,
         },
         {
             "name": "earnings_calls",
             "description": "Earnings call transcripts and analysis",
-            "vector_size": 768,
+            "vector_size": EMBEDDING_DIM,
             "distance": Distance.COSINE,
         },
         {
             "name": "economic_indicators",
             "description": "Economic reports and indicators",
-            "vector_size": 768,
+            "vector_size": EMBEDDING_DIM,
             "distance": Distance.COSINE,
         },
         {
             "name": "technical_patterns",
             "description": "Technical analysis patterns and signals",
-            "vector_size": 768,
+            "vector_size": EMBEDDING_DIM,
             "distance": Distance.COSINE,
         },
         {
             "name": "prediction_context",
             "description": "Historical prediction contexts for learning",
-            "vector_size": 768,
+            "vector_size": EMBEDDING_DIM,
             "distance": Distance.COSINE,
         },
     ]
@@ -53,6 +77,7 @@ def setup_qdrant():
     print("\n" + "="*60)
     print("Creating Qdrant Collections")
     print("="*60)
+    print(f"Profile: {profile.name} ({profile.description})")
 
     for collection_config in collections:
         try:
@@ -61,22 +86,29 @@ def setup_qdrant():
             collection_names = [c.name for c in existing_collections]
 
             if collection_config["name"] in collection_names:
-                print(f"[SKIP] Collection '{collection_config['name']}' already exists, skipping")
+                existing = client.get_collection(collection_config["name"])
+                existing_size = existing.config.params.vectors.size
+                if existing_size != collection_config["vector_size"]:
+                    print(f"[WARN] Collection '{collection_config['name']}' has {existing_size}-dim vectors, "
+                          f"expected {collection_config['vector_size']}; delete and re-run to recreate it")
+                else:
+                    print(f"[SKIP] Collection '{collection_config['name']}' already exists, skipping")
                 continue
 
             # Create collection
             client.create_collection(
                 collection_name=collection_config["name"],
-                vectors_config=VectorParams(
-                    size=collection_config["vector_size"],
-                    distance=collection_config["distance"]
-                )
+                **profile.collection_kwargs(collection_config["vector_size"], collection_config["distance"])
             )
             print(f"[OK] Created collection: {collection_config['name']}")
             print(f"  Description: {collection_config['description']}")
             print(f"  Vector size: {collection_config['vector_size']}")
             print(f"  Distance metric: {collection_config['distance'].name}")
 
+            for field_name, schema in collection_config.get("payload_indexes", {}).items():
+                client.create_payload_index(collection_config["name"], field_name, field_schema=schema)
+                print(f"  Payload index: {field_name} ({schema.value})")
+
         except Exception as e:
             print(f"[ERROR] Error creating collection {collection_config['name']}: {e}")
             raise
@@ -102,7 +134,7 @@ def setup_qdrant():
 
     # Insert a test vector
     test_collection = "market_news"
-    test_vector = [0.1] * 768  # Dummy vector for testing
+    test_vector = [0.1] * EMBEDDING_DIM  # Dummy vector for testing
 
     client.upsert(
         collection_name=test_collection,
@@ -143,17 +175,23 @@ def setup_qdrant():
 
     print("\n[OK] Qdrant setup complete!")
     print("\nCollections are ready for RAG operations:")
+    print("  - financial_knowledge: Filings, transcripts, playbooks")
     print("  - market_news: Financial news and commentary")
     print("  - earnings_calls: Earnings transcripts")
     print("  - economic_indicators: Economic reports")
     print("  - technical_patterns: Technical analysis")
     print("  - prediction_context: Historical contexts")
-    print("\nEmbedding model: all-MiniLM-L6-v2 (768 dimensions)")
+    print(f"\nEmbedding model: all-MiniLM-L6-v2 ({EMBEDDING_DIM} dimensions)")
     print("Distance metric: Cosine similarity")
+    print(f"Profile: {profile.name} (search with QDRANT_PROFILE={profile.name})")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create Qdrant collections")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="Storage/HNSW profile (default: QDRANT_PROFILE or balanced)")
+    args = parser.parse_args()
+
     try:
-        setup_qdrant()
+        setup_qdrant(args.profile)
     except Exception as e:
         print(f"\n[ERROR] Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,3 @@
+"""
+Riskee application services
+"""
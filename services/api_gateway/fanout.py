@@ -0,0 +1,100 @@
+"""
+NATS interest management for WebSocket fan-out
+
+Every gateway worker (uvicorn process or node) owns its own ConnectionManager.
+Instead of each worker receiving every `event.prediction.updated` message, the
+worker holds exactly one NATS subscription per symbol that at least one of its
+local clients watches. NATS routes by subject interest, so adding workers adds
+WebSocket capacity without multiplying the update traffic each one receives.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from nats.aio.client import Client as NATS
+
+from services.common.subjects import prediction_updated_subject
+
+
+class SymbolInterest:
+    """Reconciles per-symbol NATS subscriptions with local client interest
+
+    `retain`/`release` are synchronous so they can be called from connection
+    cleanup paths; the actual (un)subscribe calls run in a background task.
+    A failed NATS call is logged and the reconcile retried after
+    ``retry_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        nats: NATS,
+        handler: Callable[..., Awaitable[None]],
+        subject_for: Callable[[str], str] = prediction_updated_subject,
+        retry_delay: float = 1.0,
+    ):
+        self.nats = nats
+        self.handler = handler
+        self.subject_for = subject_for
+        self.retry_delay = retry_delay
+
+        self.wanted: Set[str] = set()
+        self.subscriptions: Dict[str, object] = {}  # symbol -> nats Subscription
+        self._task: Optional[asyncio.Task] = None
+        self._retry: Optional[asyncio.TimerHandle] = None
+
+    def retain(self, symbols: Iterable[str]):
+        self.wanted.update(symbols)
+        self._schedule()
+
+    def release(self, symbols: Iterable[str]):
+        self.wanted.difference_update(symbols)
+        self._schedule()
+
+    async def sync(self):
+        """Wait until NATS subscriptions match the wanted set"""
+        self._schedule()
+        if self._task:
+            await asyncio.shield(self._task)
+
+    async def close(self):
+        if self._retry:
+            self._retry.cancel()
+            self._retry = None
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for sub in self.subscriptions.values():
+            await sub.unsubscribe()
+        self.subscriptions.clear()
+
+    def _schedule(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reconcile())
+
+    async def _reconcile(self):
+        try:
+            await self._apply()
+        except Exception as e:
+            print(f"[SymbolInterest] NATS subscription update failed, retrying in {self.retry_delay:g}s: {e}")
+            if self._retry is None:
+                self._retry = asyncio.get_running_loop().call_later(self.retry_delay, self._retry_now)
+
+    def _retry_now(self):
+        self._retry = None
+        self._schedule()
+
+    async def _apply(self):
+        # Loop because retain/release may be called while we are awaiting NATS
+        while True:
+            to_add = self.wanted - self.subscriptions.keys()
+            to_remove = self.subscriptions.keys() - self.wanted
+            if not to_add and not to_remove:
+                return
+
+            for symbol in to_add:
+                self.subscriptions[symbol] = await self.nats.subscribe(
+                    self.subject_for(symbol), cb=self.handler
+                )
+            for symbol in to_remove:
+                await self.subscriptions[symbol].unsubscribe()
+                del self.subscriptions[symbol]
@@ -0,0 +1,65 @@
+"""
+Response serialization fast path
+
+Predictions are stored in Redis already serialized (`pred:{symbol}`), so on a
+cache hit the gateway hands those bytes straight to the client instead of
+`json.loads` + re-encoding them. Database rows (asyncpg Records holding Decimal
+and datetime values) are encoded with orjson.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from starlette.responses import Response
+
+
+def _default(obj: Any):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes (Decimal -> float, datetime -> ISO 8601)"""
+    return orjson.dumps(obj, default=_default)
+
+
+def encode_record(record) -> bytes:
+    """Serialize a database row (asyncpg Record or mapping)"""
+    return dumps(dict(record))
+
+
+def splice_field(document: bytes, name: str, value: Any) -> bytes:
+    """Add a field to a serialized JSON object without parsing the object
+
+    If the quoted name occurs anywhere in the document the key may already be
+    present, so the object is parsed and the field replaced instead; splicing
+    would produce a duplicate key that parsers resolve differently.
+    """
+    body = document.rstrip()
+    if not body.endswith(b"}"):
+        raise ValueError("Document is not a JSON object")
+
+    key = dumps(name)
+    if key in body:
+        merged = orjson.loads(body)
+        merged[name] = value
+        return dumps(merged)
+
+    inner = body[:-1].rstrip()
+    separator = b"" if inner.endswith(b"{") else b","
+    return inner + separator + key + b":" + dumps(value) + b"}"
+
+
+class RawJSONResponse(Response):
+    """JSON response whose body is sent as-is when it is already bytes"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return dumps(content)
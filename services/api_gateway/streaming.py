@@ -0,0 +1,48 @@
+"""
+Server-Sent Events relay for streamed explanations
+
+The gateway subscribes to a job's ``thought.explanation.stream.{job_id}``
+subject *before* publishing the job, then forwards each chunk as an SSE event
+(``token``, ``done`` or ``error``) until the job finishes or goes quiet.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict
+
+from nats.errors import TimeoutError as NatsTimeoutError
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Stop nginx from buffering the stream
+}
+
+TERMINAL_EVENTS = {"done", "error"}
+
+
+def sse_event(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def relay_explanation_stream(subscription, idle_timeout: float = 30.0) -> AsyncIterator[bytes]:
+    """Yield SSE events from a NATS subscription until the job completes"""
+    try:
+        while True:
+            try:
+                msg = await subscription.next_msg(timeout=idle_timeout)
+            except (NatsTimeoutError, asyncio.TimeoutError):
+                yield sse_event("error", {"error": "explanation timed out"})
+                return
+
+            chunk = json.loads(msg.data.decode())
+            event = chunk.pop("type", "token")
+            yield sse_event(event, chunk)
+            if event in TERMINAL_EVENTS:
+                return
+    finally:
+        await subscription.unsubscribe()
+
+
+async def replay_explanation(explanation: Dict) -> AsyncIterator[bytes]:
+    """Single `done` event for an explanation that is already cached"""
+    yield sse_event("done", {"explanation": explanation})
@@ -0,0 +1,301 @@
+"""
+WebSocket connection management for real-time prediction updates
+
+Two protocol modes are supported per connection:
+
+- ``full`` (default): every update is pushed immediately as a complete
+  ``prediction_update`` JSON object.
+- ``delta`` (opt-in, ``/ws/predictions?protocol=delta``): the client gets a
+  ``snapshot`` frame on subscribe and afterwards ``delta`` frames carrying only
+  the fields that changed. Updates are conflated per symbol and flushed at most
+  ``max_rate`` times per second, optionally msgpack-encoded
+  (``encoding=msgpack``).
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import msgpack
+from fastapi import WebSocket
+
+PROTOCOL_FULL = "full"
+PROTOCOL_DELTA = "delta"
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+DEFAULT_MAX_RATE = 4.0  # Flushes per second per connection
+MAX_RATE_LIMIT = 50.0
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class ProtocolOptions:
+    """Per-connection protocol settings negotiated via query parameters"""
+
+    protocol: str = PROTOCOL_FULL
+    max_rate: float = DEFAULT_MAX_RATE
+    encoding: str = ENCODING_JSON
+
+    def __post_init__(self):
+        if self.protocol not in (PROTOCOL_FULL, PROTOCOL_DELTA):
+            raise ValueError(f"Unsupported protocol: {self.protocol}")
+        if self.encoding not in (ENCODING_JSON, ENCODING_MSGPACK):
+            raise ValueError(f"Unsupported encoding: {self.encoding}")
+        if not 0 < self.max_rate <= MAX_RATE_LIMIT:
+            raise ValueError(f"max_rate must be in (0, {MAX_RATE_LIMIT}]")
+
+
+def compute_delta(previous: Optional[dict], current: dict) -> dict:
+    """Return the fields of ``current`` that differ from ``previous``
+
+    Fields that disappeared are reported as ``None``.
+    """
+    if previous is None:
+        return dict(current)
+
+    delta = {
+        key: value
+        for key, value in current.items()
+        if previous.get(key, _MISSING) != value
+    }
+    for key in previous.keys() - current.keys():
+        delta[key] = None
+
+    return delta
+
+
+class DeltaStream:
+    """Conflating delta encoder bound to a single delta-mode connection
+
+    Frames are built and sent under one lock, so snapshots and deltas reach the
+    socket in ``seq`` order. ``on_closed`` is called with the socket when a
+    send fails and the flush loop gives up.
+    """
+
+    def __init__(self, websocket: WebSocket, options: ProtocolOptions,
+                 on_closed: Optional[Callable[[WebSocket], None]] = None):
+        self.websocket = websocket
+        self.options = options
+        self.interval = 1.0 / options.max_rate
+        self.on_closed = on_closed
+
+        self.seq = 0
+        self.sent: Dict[str, dict] = {}     # symbol -> state last sent to client
+        self.pending: Dict[str, dict] = {}  # symbol -> newest state not yet sent
+
+        self._wakeup = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def push(self, symbol: str, state: dict):
+        """Record a new state; intermediate states within the interval collapse"""
+        self.pending[symbol] = state
+        self._wakeup.set()
+
+    def forget(self, symbols: Iterable[str]):
+        for symbol in symbols:
+            self.sent.pop(symbol, None)
+            self.pending.pop(symbol, None)
+
+    def build_snapshot(self, states: Dict[str, dict]) -> dict:
+        """Build a snapshot frame and mark its states as delivered"""
+        for symbol, state in states.items():
+            self.sent[symbol] = state
+            self.pending.pop(symbol, None)
+
+        self.seq += 1
+        return {"type": "snapshot", "seq": self.seq, "predictions": states}
+
+    def build_delta(self) -> Optional[dict]:
+        """Diff every pending symbol against what the client already has"""
+        updates = {}
+        for symbol, state in self.pending.items():
+            delta = compute_delta(self.sent.get(symbol), state)
+            if delta:
+                updates[symbol] = delta
+            self.sent[symbol] = state
+        self.pending.clear()
+
+        if not updates:
+            return None
+
+        self.seq += 1
+        return {"type": "delta", "seq": self.seq, "updates": updates}
+
+    def encode(self, frame: dict):
+        if self.options.encoding == ENCODING_MSGPACK:
+            return msgpack.packb(frame, use_bin_type=True)
+        return json.dumps(frame, separators=(",", ":"))
+
+    async def send(self, frame: dict):
+        payload = self.encode(frame)
+        if isinstance(payload, bytes):
+            await self.websocket.send_bytes(payload)
+        else:
+            await self.websocket.send_text(payload)
+
+    async def send_snapshot(self, states: Dict[str, dict]):
+        async with self._send_lock:
+            await self.send(self.build_snapshot(states))
+
+    async def _flush_loop(self):
+        """Send at most one frame per interval; the first change goes out immediately"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            try:
+                async with self._send_lock:
+                    frame = self.build_delta()
+                    if frame:
+                        await self.send(frame)
+            except Exception as e:
+                print(f"[ConnectionManager] Delta send failed, closing stream: {e}")
+                self._task = None  # Finishing on our own; stop() must not cancel us
+                if self.on_closed:
+                    self.on_closed(self.websocket)
+                return
+
+            await asyncio.sleep(self.interval)
+
+
+StateLoader = Callable[[List[str]], Awaitable[Dict[str, dict]]]
+
+
+class ConnectionManager:
+    """Tracks WebSocket connections and fans prediction updates out to them
+
+    ``interest`` (a `SymbolInterest`) is told whenever a symbol gains its first
+    or loses its last local subscriber, so the upstream feed can be narrowed to
+    what this worker's clients watch. ``loader`` fetches the current state of
+    symbols missing from ``latest`` before a snapshot is sent.
+    """
+
+    def __init__(self, interest=None, loader: Optional[StateLoader] = None):
+        self.interest = interest
+        self.loader = loader
+
+        self.active_connections: List[WebSocket] = []
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}  # ws -> symbols
+        self.subscribers: Dict[str, Set[WebSocket]] = {}    # symbol -> ws
+        self.streams: Dict[WebSocket, DeltaStream] = {}
+        self.latest: Dict[str, dict] = {}                   # symbol -> last known state
+
+    async def connect(self, websocket: WebSocket, options: Optional[ProtocolOptions] = None):
+        await websocket.accept()
+        self.active_connections.append(websocket)
+        self.subscriptions[websocket] = set()
+
+        if options and options.protocol == PROTOCOL_DELTA:
+            stream = DeltaStream(websocket, options, on_closed=self.disconnect)
+            stream.start()
+            self.streams[websocket] = stream
+
+    def disconnect(self, websocket: WebSocket):
+        if websocket not in self.subscriptions:
+            return
+
+        self._remove_subscriber(self.subscriptions.pop(websocket), websocket)
+        self.active_connections.remove(websocket)
+
+        stream = self.streams.pop(websocket, None)
+        if stream:
+            stream.stop()
+
+    async def subscribe(self, websocket: WebSocket, symbols: List[str]):
+        self.subscriptions[websocket].update(symbols)
+
+        new_symbols = []
+        for symbol in symbols:
+            sockets = self.subscribers.setdefault(symbol, set())
+            if not sockets:
+                new_symbols.append(symbol)
+            sockets.add(websocket)
+
+        if self.interest:
+            # Subscribe upstream before loading state so no update falls in between. Wait even
+            # with no new symbols: another socket's subscribe may still be in flight for them.
+            if new_symbols:
+                self.interest.retain(new_symbols)
+            await self.interest.sync()
+
+        stream = self.streams.get(websocket)
+        if stream:
+            await stream.send_snapshot(await self._states(symbols))
+
+    async def unsubscribe(self, websocket: WebSocket, symbols: List[str]):
+        self.subscriptions[websocket].difference_update(symbols)
+        self._remove_subscriber(symbols, websocket)
+
+        stream = self.streams.get(websocket)
+        if stream:
+            stream.forget(symbols)
+
+    async def resync(self, websocket: WebSocket):
+        """Resend a full snapshot, e.g. after the client detected a seq gap"""
+        stream = self.streams.get(websocket)
+        if stream:
+            await stream.send_snapshot(await self._states(list(self.subscriptions[websocket])))
+
+    def seed(self, states: Dict[str, dict]):
+        """Prime the latest-state cache (used for snapshots) without notifying clients"""
+        for symbol, state in states.items():
+            self.latest.setdefault(symbol, state)
+
+    async def broadcast_update(self, symbol: str, data: dict):
+        """Send update to all subscribed clients"""
+        state = dict(data)  # Streams hold references, so never mutate a published state
+        self.latest[symbol] = state
+
+        dead = []
+        for ws in list(self.subscribers.get(symbol, ())):
+            stream = self.streams.get(ws)
+            if stream:
+                stream.push(symbol, state)
+                continue
+
+            try:
+                await ws.send_json({
+                    "type": "prediction_update",
+                    "symbol": symbol,
+                    **state
+                })
+            except Exception:
+                dead.append(ws)
+
+        for ws in dead:
+            self.disconnect(ws)
+
+    async def _states(self, symbols: List[str]) -> Dict[str, dict]:
+        missing = [s for s in symbols if s not in self.latest]
+        if missing and self.loader:
+            self.seed(await self.loader(missing))
+        return {s: self.latest[s] for s in symbols if s in self.latest}
+
+    def _remove_subscriber(self, symbols: Iterable[str], websocket: WebSocket):
+        released = []
+        for symbol in symbols:
+            sockets = self.subscribers.get(symbol)
+            if sockets is None:
+                continue
+            sockets.discard(websocket)
+            if not sockets:
+                del self.subscribers[symbol]
+                # Nobody here watches it any more, so the cached state would go stale
+                self.latest.pop(symbol, None)
+                released.append(symbol)
+
+        if self.interest and released:
+            self.interest.release(released)
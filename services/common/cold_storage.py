@@ -0,0 +1,338 @@
+"""
+Cold-tier storage for hypertable history (Parquet on local disk)
+
+Retention policies drop hypertable chunks after 90 days.
+scripts/archive_chunks.py exports each chunk before it is dropped to
+
+    ARCHIVE_DIR/<hypertable>/date=YYYY-MM-DD/<chunk>.parquet
+
+Each file holds one chunk's rows for one UTC day, sorted by ticker then time
+and written in row groups of ROW_GROUP_ROWS. Parquet keeps min/max statistics
+per row group, so a ticker or time filter skips row groups without decoding
+them, and the date directory skips whole files. This gives the same pruning a
+ticker=/date= directory tree would, without 5000 small files per day.
+
+    archive = ParquetArchive()
+    table = archive.read("market_data", start, end, tickers=["AAPL"], columns=["timestamp", "close"])
+
+    history = HistoryQuery(db_pool, archive)
+    df = (await history.fetch("market_data", start, end, tickers=["AAPL"])).to_pandas()
+
+HistoryQuery reads whatever Postgres still holds from the hypertable and the
+older part of the range from Parquet, then concatenates the two. Files are
+opened memory-mapped. Numeric columns become float64, and JSON/JSONB become
+strings.
+
+Chunks archived before a column was added lack it. The manifest keeps the
+union of every archived chunk's columns, and reads use that schema, so such
+a column comes back as nulls for the older rows instead of being dropped.
+
+Needs pyarrow (pip install -e ".[archive]").
+"""
+
+import base64
+import json
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow.fs import LocalFileSystem
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError('Cold storage needs pyarrow: pip install -e ".[archive]"') from e
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "archive"))
+ROW_GROUP_ROWS = int(os.getenv("ARCHIVE_ROW_GROUP_ROWS", "65536"))
+MANIFEST = "_manifest.json"
+IGNORE_PREFIXES = [".", "_manifest"]  # not the default "_": chunk names start with _hyper
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+ARROW_TYPES = {
+    "int2": pa.int16(),
+    "int4": pa.int32(),
+    "int8": pa.int64(),
+    "float4": pa.float32(),
+    "float8": pa.float64(),
+    "numeric": pa.float64(),
+    "bool": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us"),
+    "timestamptz": pa.timestamp("us", tz="UTC"),
+}
+
+COLUMNS_QUERY = """
+    SELECT column_name, udt_name
+    FROM information_schema.columns
+    WHERE table_schema = $1 AND table_name = $2
+    ORDER BY ordinal_position
+"""
+
+HOT_RANGE_QUERY = """
+    SELECT primary_dimension, min(range_start) AS hot_start
+    FROM timescaledb_information.chunks
+    WHERE hypertable_schema = $1 AND hypertable_name = $2
+    GROUP BY primary_dimension
+"""
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def arrow_schema(columns: Iterable[Tuple[str, str]]) -> "pa.Schema":
+    """Arrow schema for (column name, Postgres type name) pairs; unknown types are stored as strings."""
+    return pa.schema([(name, ARROW_TYPES.get(udt, pa.string())) for name, udt in columns])
+
+
+def records_to_table(records: Sequence[Mapping], schema: "pa.Schema") -> "pa.Table":
+    """Convert asyncpg records (or dicts) to an Arrow table with the given schema."""
+    columns = {}
+    for field in schema:
+        values = [r[field.name] for r in records]
+        if pa.types.is_floating(field.type):
+            values = [None if v is None else float(v) for v in values]  # Decimal
+        elif pa.types.is_string(field.type):
+            values = [_text(v) for v in values]  # JSONB arrives as str, or decoded when a codec is set
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+async def table_columns(db, hypertable: str, schema: str = "public") -> List[Tuple[str, str]]:
+    rows = await db.fetch(COLUMNS_QUERY, schema, hypertable)
+    if not rows:
+        raise ValueError(f"Unknown table {schema}.{hypertable}")
+    return [(r["column_name"], r["udt_name"]) for r in rows]
+
+
+def _text(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def conform(table: "pa.Table", schema: "pa.Schema") -> "pa.Table":
+    """Reorder/cast columns to schema, filling columns the table lacks (added after it was archived) with nulls."""
+    arrays = [table[f.name].cast(f.type) if f.name in table.column_names else pa.nulls(table.num_rows, f.type)
+              for f in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def unify(schemas: Iterable["pa.Schema"]) -> "pa.Schema":
+    """Union of the columns; a column whose type was widened (int4 -> int8) takes the wider type."""
+    return pa.unify_schemas(list(schemas), promote_options="permissive")
+
+
+def _encode_schema(schema: "pa.Schema") -> str:
+    return base64.b64encode(schema.serialize().to_pybytes()).decode()
+
+
+def _decode_schema(encoded: str) -> "pa.Schema":
+    return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(encoded)))
+
+
+def _tmp(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")  # hidden from dataset discovery while being written
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class PartitionWriter:
+    """
+    Write one chunk's rows into date partitions, one Parquet file per UTC day.
+
+    Batches must arrive sorted by (day, ticker, time). Files are written under
+    a temporary name and renamed by close(), so a failed export leaves nothing
+    a reader would pick up, and re-exporting the chunk overwrites its files.
+    """
+
+    def __init__(self, root: Path, hypertable: str, chunk: str, schema: "pa.Schema", time_column: str,
+                 row_group_rows: int = ROW_GROUP_ROWS):
+        self.root = Path(root) / hypertable
+        self.chunk = chunk
+        self.schema = schema
+        self.time_column = time_column
+        self.row_group_rows = row_group_rows
+        self.files: Dict[str, int] = {}
+        self._day: Optional[date] = None
+        self._path: Optional[Path] = None
+        self._writer: Optional["pq.ParquetWriter"] = None
+        self._pending: List[Path] = []
+
+    def write(self, batch: "pa.Table"):
+        days = pc.cast(batch[self.time_column], pa.date32())
+        for day in pc.unique(days).to_pylist():
+            if day != self._day:
+                self._open(day)
+            part = batch.filter(pc.equal(days, pa.scalar(day, pa.date32())))
+            self._writer.write_table(part, row_group_size=self.row_group_rows)
+            self.files[str(self._path.relative_to(self.root))] += part.num_rows
+
+    def _open(self, day: date):
+        self._finish()
+        directory = self.root / f"date={day.isoformat()}"
+        directory.mkdir(parents=True, exist_ok=True)
+        self._day = day
+        self._path = directory / f"{self.chunk}.parquet"
+        self._pending.append(self._path)
+        self._writer = pq.ParquetWriter(str(_tmp(self._path)), self.schema, compression="zstd")
+        self.files[str(self._path.relative_to(self.root))] = 0
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> Dict[str, int]:
+        """Publish the files; returns rows written per file (relative to the hypertable directory)."""
+        self._finish()
+        for path in self._pending:
+            _tmp(path).replace(path)
+        self._pending = []
+        return self.files
+
+    def abort(self):
+        self._finish()
+        for path in self._pending:
+            _tmp(path).unlink(missing_ok=True)
+        self._pending = []
+
+
+class ParquetArchive:
+    """Archived hypertable chunks under one root directory."""
+
+    def __init__(self, root: Path = ARCHIVE_DIR):
+        self.root = Path(root)
+        self.filesystem = LocalFileSystem(use_mmap=True)
+
+    def manifest(self, hypertable: str) -> Dict:
+        path = self.root / hypertable / MANIFEST
+        if not path.exists():
+            return {"hypertable": hypertable, "time_column": None, "chunks": {}}
+        return json.loads(path.read_text())
+
+    def record_chunk(self, hypertable: str, time_column: str, chunk: str, entry: Dict,
+                     schema: Optional["pa.Schema"] = None):
+        manifest = self.manifest(hypertable)
+        manifest["time_column"] = time_column
+        manifest["chunks"][chunk] = entry
+        if schema is not None:
+            if "schema" in manifest:
+                schema = unify([_decode_schema(manifest["schema"]), schema])
+            manifest["schema"] = _encode_schema(schema)
+        path = self.root / hypertable / MANIFEST
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2, default=str))
+        tmp.replace(path)
+
+    def writer(self, hypertable: str, chunk: str, schema: "pa.Schema", time_column: str) -> PartitionWriter:
+        return PartitionWriter(self.root, hypertable, chunk, schema, time_column)
+
+    def schema(self, hypertable: str) -> Optional["pa.Schema"]:
+        """Columns of every archived chunk; None when the manifest predates schema tracking."""
+        encoded = self.manifest(hypertable).get("schema")
+        return None if encoded is None else _decode_schema(encoded)
+
+    def dataset(self, hypertable: str) -> Optional["ds.Dataset"]:
+        path = self.root / hypertable
+        if not path.is_dir():
+            return None
+        options = dict(format="parquet", partitioning=PARTITIONING, filesystem=self.filesystem,
+                       ignore_prefixes=IGNORE_PREFIXES)
+        # Without an explicit schema the dataset takes the first file's, dropping later columns
+        schema = self.schema(hypertable)
+        if schema is None:
+            discovered = ds.dataset(str(path.resolve()), **options)
+            schemas = [fragment.physical_schema for fragment in discovered.get_fragments()]
+            if not schemas:
+                return discovered
+            schema = unify(schemas)
+        return ds.dataset(str(path.resolve()), schema=schema.append(PARTITIONING.schema.field("date")), **options)
+
+    def read(self, hypertable: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             tickers: Optional[Sequence[str]] = None, columns: Optional[Sequence[str]] = None) -> Optional["pa.Table"]:
+        """
+        Archived rows with start <= time < end, optionally for some tickers only.
+
+        Returns None when nothing has been archived for the hypertable.
+        """
+        dataset = self.dataset(hypertable)
+        if dataset is None:
+            return None
+        time_column = self.manifest(hypertable)["time_column"]
+        stored = [name for name in dataset.schema.names if name != "date"]
+        if columns:
+            stored = [name for name in columns if name in stored]
+        expr = None
+        if start is not None:
+            start = _utc(start)
+            expr = _and(expr, (ds.field("date") >= start.date()) & (ds.field(time_column) >= start))
+        if end is not None:
+            end = _utc(end)
+            expr = _and(expr, (ds.field("date") <= end.date()) & (ds.field(time_column) < end))
+        if tickers is not None:
+            expr = _and(expr, ds.field("ticker").isin(list(tickers)))
+        return dataset.to_table(columns=stored, filter=expr)
+
+
+def _and(left, right):
+    return right if left is None else left & right
+
+
+class HistoryQuery:
+    """Hypertable rows over any time range, from Postgres where it still has them and Parquet before that."""
+
+    def __init__(self, db, archive: ParquetArchive, schema: str = "public"):
+        self.db = db
+        self.archive = archive
+        self.schema = schema
+
+    async def fetch(self, hypertable: str, start: datetime, end: datetime,
+                    tickers: Optional[Sequence[str]] = None,
+                    columns: Optional[Sequence[str]] = None) -> "pa.Table":
+        """Rows with start <= time < end, sorted by ticker and time when the table has a ticker column."""
+        start, end = _utc(start), _utc(end)
+        table_columns_ = await table_columns(self.db, hypertable, self.schema)
+        if columns:
+            wanted = set(columns)
+            table_columns_ = [c for c in table_columns_ if c[0] in wanted]
+        schema = arrow_schema(table_columns_)
+
+        hot = await self.db.fetchrow(HOT_RANGE_QUERY, self.schema, hypertable)
+        hot_start = _utc(hot["hot_start"]) if hot else end
+        time_column = hot["primary_dimension"] if hot else self.archive.manifest(hypertable)["time_column"]
+
+        parts = []
+        if start < hot_start:
+            archived = self.archive.read(hypertable, start, min(end, hot_start), tickers, schema.names)
+            if archived is not None:
+                parts.append(conform(archived, schema))
+        if end > hot_start:
+            parts.append(await self._live(hypertable, schema, time_column, max(start, hot_start), end, tickers))
+        if not parts:
+            return schema.empty_table()
+
+        table = pa.concat_tables(parts)
+        if "ticker" in schema.names and time_column in schema.names:
+            table = table.sort_by([("ticker", "ascending"), (time_column, "ascending")])
+        return table
+
+    async def _live(self, hypertable: str, schema: "pa.Schema", time_column: str, start: datetime, end: datetime,
+                    tickers: Optional[Sequence[str]]) -> "pa.Table":
+        query = (
+            f"SELECT {', '.join(quote_ident(n) for n in schema.names)} "
+            f"FROM {quote_ident(self.schema)}.{quote_ident(hypertable)} "
+            f"WHERE {quote_ident(time_column)} >= $1 AND {quote_ident(time_column)} < $2"
+        )
+        args = [start, end]
+        if tickers is not None:
+            query += " AND ticker = ANY($3)"
+            args.append(list(tickers))
+        return records_to_table(await self.db.fetch(query, *args), schema)
@@ -0,0 +1,35 @@
+"""
+Ticker demand tracking (`stats:tickers:most_requested`)
+
+The API gateway counts requests per ticker in a sorted set; background
+services read the top of it to decide where precomputation pays off. The key
+expires 24 hours after it is created, so rankings reset daily.
+
+See docs/REDIS_DATA_STRUCTURES.md (Cache Statistics).
+"""
+
+from typing import List
+
+MOST_REQUESTED_KEY = "stats:tickers:most_requested"
+MOST_REQUESTED_TTL = 86400
+
+
+class DemandTracker:
+    def __init__(self, client, key: str = MOST_REQUESTED_KEY, ttl: int = MOST_REQUESTED_TTL):
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+
+    async def record(self, symbol: str):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zincrby(self.key, 1, symbol.upper())
+            # NX: only the first request of the day starts the clock
+            pipe.expire(self.key, self.ttl, nx=True)
+            await pipe.execute()
+
+    async def top(self, n: int) -> List[str]:
+        """Most requested tickers, highest first"""
+        if n <= 0:
+            return []
+        members = await self.client.zrevrange(self.key, 0, n - 1)
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
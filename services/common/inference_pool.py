@@ -0,0 +1,335 @@
+"""
+Multi-process ONNX inference pool for the asyncio prediction agents
+
+``session.run`` holds the calling thread for the whole batch, so running it
+in the agent's event loop stalls NATS intake and Redis I/O, and one process
+can only use one core for the Python side of the work. The pool moves
+inference into worker processes:
+
+- every worker owns, per model, an input matrix and output buffers in
+  ``multiprocessing.shared_memory``; its ONNX session is IO-bound directly to
+  them (see ``ModelSession.use_buffers``)
+- the front end writes feature rows into an idle worker's input matrix, sends
+  ``(model, n_rows)`` over a pipe, and reads the predictions from the shared
+  output buffer when the worker replies; arrays never go through pickle
+- replies are picked up with ``loop.add_reader``, so the event loop is never
+  blocked while a batch runs, and batches for different workers run in parallel
+
+Each worker gets ``intra_op_threads // workers`` ONNX threads (at least one),
+so the pool as a whole stays within the configured CPU budget.
+
+A worker process that exits is restarted in the background on the same
+shared buffers, up to ``max_restarts`` times. Once every worker is gone for
+good, predictions raise instead of waiting for one to become idle.
+
+Settings (env):
+    INFERENCE_WORKERS      worker processes (default: CPU count)
+    INFERENCE_MAX_RESTARTS restarts per worker before it is retired (default 5)
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.common.inference_runtime import ModelSession, SessionConfig, fill_features
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+INFERENCE_MAX_RESTARTS = int(os.getenv("INFERENCE_MAX_RESTARTS", "5"))
+
+
+def _attach(name: str, shape: Tuple, dtype) -> Tuple[SharedMemory, np.ndarray]:
+    # Spawned workers share the front end's resource tracker, so the registration
+    # made here is the same entry the front end's unlink() removes
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_main(conn, models: Dict[str, str], config: SessionConfig, max_batch_size: int):
+    """Worker process: load models, report buffer specs, bind shared buffers, serve batches"""
+    sessions = {name: ModelSession(name, path, config, max_batch_size=max_batch_size) for name, path in models.items()}
+    conn.send(("ready", {
+        name: (session.n_features, [(shape, dtype.str) for shape, dtype in session.output_specs()])
+        for name, session in sessions.items()
+    }))
+
+    _, layout = conn.recv()
+    attached = []
+    for name, (input_name, output_names) in layout.items():
+        session = sessions[name]
+        shm, inputs = _attach(input_name, (max_batch_size, session.n_features), np.float32)
+        attached.append(shm)
+        outputs = []
+        for shm_name, (shape, dtype) in zip(output_names, session.output_specs()):
+            shm, buffer = _attach(shm_name, (max_batch_size, *shape), dtype)
+            attached.append(shm)
+            outputs.append(buffer)
+        session.use_buffers(inputs, outputs)
+    conn.send(("bound", None))
+
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            model, n = request
+            try:
+                sessions[model].run(n)
+                conn.send(("ok", n))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        del sessions, inputs, outputs
+        for shm in attached:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # still referenced by ORT values; released when the process exits
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.exited = False  # the pipe hit EOF: the process is gone or going
+        self.reply: Optional[asyncio.Future] = None
+        self.inputs: Dict[str, np.ndarray] = {}
+        self.outputs: Dict[str, List[np.ndarray]] = {}
+        self.shms: List[SharedMemory] = []
+        self.layout: Dict = {}
+        self.batches = 0
+        self.restarts = 0
+
+
+class InferencePool:
+    """Runs ONNX models in worker processes that share feature/prediction buffers with the caller"""
+
+    def __init__(
+        self,
+        models: Dict[str, str],
+        workers: int = INFERENCE_WORKERS,
+        max_batch_size: int = 128,
+        config: Optional[SessionConfig] = None,
+        max_restarts: int = INFERENCE_MAX_RESTARTS,
+    ):
+        self.models = models
+        self.num_workers = max(1, workers)
+        self.max_batch_size = max_batch_size
+        self.max_restarts = max_restarts
+        config = config or SessionConfig.from_env()
+        self.config = replace(config, intra_op_threads=max(1, config.intra_op_threads // self.num_workers))
+
+        self.workers: List[_Worker] = []
+        self.n_features: Dict[str, int] = {}
+        self._idle: Optional[asyncio.Queue] = None
+        self._retired = 0
+        self._restarting: Set[asyncio.Task] = set()
+
+        self.stats = {"batches": 0, "rows": 0, "errors": 0, "restarts": 0, "retired": 0}
+
+    @property
+    def live_workers(self) -> int:
+        """Workers serving or being restarted"""
+        return len(self.workers) - self._retired
+
+    async def start(self):
+        self._idle = asyncio.Queue()
+        self.workers = [_Worker(index) for index in range(self.num_workers)]
+        for worker in self.workers:
+            self._spawn(worker)
+
+        try:
+            for worker in self.workers:
+                specs = await self._ready(worker)
+                worker.layout = self._allocate(worker, specs)
+                await self._bind(worker)
+                self._idle.put_nowait(worker)
+        except BaseException:
+            await self.close()
+            raise
+
+        print(f"[InferencePool] {self.num_workers} workers ready "
+              f"({', '.join(self.models)}; {self.config.intra_op_threads} ONNX threads each)")
+
+    def _spawn(self, worker: _Worker):
+        # spawn: workers must not inherit the front end's event loop, sockets or ORT threads
+        ctx = mp.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        worker.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.models, self.config, self.max_batch_size),
+            name=f"inference-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.exited = False
+        loop = asyncio.get_running_loop()
+        worker.reply = loop.create_future()  # the "ready" message
+        loop.add_reader(parent_conn.fileno(), self._on_reply, worker)
+
+    async def _ready(self, worker: _Worker) -> Dict:
+        status, specs = await worker.reply
+        if status != "ready":
+            raise RuntimeError(f"Inference worker {worker.index} failed to start: {specs}")
+        return specs
+
+    async def _bind(self, worker: _Worker):
+        status, detail = await self._request(worker, ("buffers", worker.layout))
+        if status != "bound":
+            raise RuntimeError(f"Inference worker {worker.index} failed to bind buffers: {detail}")
+
+    def _replace(self, worker: _Worker):
+        """Restart an exited worker in the background, or retire it after max_restarts"""
+        if not worker.exited:
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        worker.conn.close()
+        if worker.restarts >= self.max_restarts:
+            self._retire(worker, f"exited {worker.restarts + 1} times")
+            return
+        task = asyncio.create_task(self._restart(worker))
+        self._restarting.add(task)
+        task.add_done_callback(self._restarting.discard)
+
+    async def _restart(self, worker: _Worker):
+        worker.restarts += 1
+        try:
+            self._spawn(worker)
+            await self._ready(worker)  # Same models, so the existing shared buffers still fit
+            await self._bind(worker)
+        except Exception as e:
+            if worker.process.is_alive():
+                worker.process.kill()
+            self._retire(worker, str(e))
+            return
+        self.stats["restarts"] += 1
+        print(f"[InferencePool] Restarted worker {worker.index} (restart {worker.restarts})")
+        self._idle.put_nowait(worker)
+
+    def _retire(self, worker: _Worker, reason: str):
+        self._retired += 1
+        self.stats["retired"] += 1
+        print(f"[InferencePool] Worker {worker.index} retired: {reason} ({self.live_workers} left)")
+        if self.live_workers == 0:
+            self._idle.put_nowait(None)  # Wakes every waiter; see _run_batch
+
+    def _allocate(self, worker: _Worker, specs: Dict) -> Dict:
+        """Create the worker's shared buffers; returns the names it should attach to"""
+        layout = {}
+        for model, (n_features, outputs) in specs.items():
+            self.n_features[model] = n_features
+            shm, worker.inputs[model] = self._create((self.max_batch_size, n_features), np.float32)
+            worker.shms.append(shm)
+            output_names = []
+            worker.outputs[model] = []
+            for shape, dtype in outputs:
+                out_shm, buffer = self._create((self.max_batch_size, *shape), np.dtype(dtype))
+                worker.shms.append(out_shm)
+                worker.outputs[model].append(buffer)
+                output_names.append(out_shm.name)
+            layout[model] = (shm.name, output_names)
+        return layout
+
+    @staticmethod
+    def _create(shape: Tuple, dtype) -> Tuple[SharedMemory, np.ndarray]:
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm = SharedMemory(create=True, size=max(size, 1))
+        return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def _request(self, worker: _Worker, message) -> asyncio.Future:
+        worker.reply = asyncio.get_running_loop().create_future()
+        worker.conn.send(message)
+        return worker.reply
+
+    def _on_reply(self, worker: _Worker):
+        try:
+            reply = worker.conn.recv()
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+            worker.exited = True
+            reply = ("error", f"inference worker {worker.index} exited (code {worker.process.exitcode})")
+        if worker.reply is not None and not worker.reply.done():
+            worker.reply.set_result(reply)
+
+    async def _run_batch(self, model: str, count: int, fill: Callable[[np.ndarray, int], None], start: int) -> np.ndarray:
+        worker = await self._idle.get()
+        if worker is None:
+            self._idle.put_nowait(None)
+            raise RuntimeError("No inference workers left")
+        try:
+            fill(worker.inputs[model][:count], start)
+            try:
+                status, detail = await self._request(worker, (model, count))
+            except OSError as e:
+                worker.exited = True
+                status, detail = "error", f"{type(e).__name__}: {e}"
+            if status != "ok":
+                self.stats["errors"] += 1
+                raise RuntimeError(f"Inference failed on worker {worker.index}: {detail}")
+            worker.batches += 1
+            self.stats["batches"] += 1
+            self.stats["rows"] += count
+            return worker.outputs[model][0][:count].copy()
+        finally:
+            if worker.exited or not worker.process.is_alive():
+                self._replace(worker)
+            else:
+                self._idle.put_nowait(worker)
+
+    async def _predict_chunked(self, model: str, count: int, fill: Callable[[np.ndarray, int], None]) -> np.ndarray:
+        if model not in self.n_features:
+            raise KeyError(f"Model '{model}' not loaded (have: {', '.join(self.models)})")
+        if count == 0:
+            return np.zeros((0, *self.workers[0].outputs[model][0].shape[1:]), dtype=self.workers[0].outputs[model][0].dtype)
+        chunks = [
+            self._run_batch(model, min(self.max_batch_size, count - start), fill, start)
+            for start in range(0, count, self.max_batch_size)
+        ]
+        return np.concatenate(await asyncio.gather(*chunks))
+
+    async def predict(self, model: str, X: np.ndarray) -> np.ndarray:
+        """First output of ``model`` for the rows of ``X`` (batches run in parallel across workers)"""
+        def fill(buffer, start):
+            buffer[:] = X[start:start + len(buffer)]
+
+        return await self._predict_chunked(model, len(X), fill)
+
+    async def predict_rows(self, model: str, rows: List[Dict], feature_names: List[str], default: float = 0.0) -> np.ndarray:
+        """First output for feature mappings, written straight into shared memory"""
+        def fill(buffer, start):
+            fill_features(buffer, rows[start:start + len(buffer)], feature_names, default)
+
+        return await self._predict_chunked(model, len(rows), fill)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        for task in list(self._restarting):
+            task.cancel()
+        await asyncio.gather(*self._restarting, return_exceptions=True)
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            try:
+                loop.remove_reader(worker.conn.fileno())
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            await asyncio.to_thread(worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.conn.close()
+            worker.inputs.clear()
+            worker.outputs.clear()
+            for shm in worker.shms:
+                shm.close()
+                shm.unlink()
+        self.workers = []
@@ -0,0 +1,226 @@
+"""
+CPU ONNX inference runtime shared by the prediction agents
+
+- session options are tuned for small dense models on CPU: explicit intra-/inter-op
+  thread counts, full graph optimization, memory arena and pattern planning
+- each model owns preallocated input/output buffers sized for its largest batch;
+  callers write feature rows straight into the input buffer (no per-batch
+  ``np.vstack``) and inference runs through IO binding, so ONNX Runtime reads
+  and writes those buffers in place
+- one ``InferenceRuntime`` holds the sessions for every agent in the process
+  (normal-day and earnings models) and splits the CPU thread budget between them
+
+Settings (env):
+    ORT_INTRA_OP_THREADS   threads for the whole process (default: CPU count)
+    ORT_INTER_OP_THREADS   default 1 (models are sequential graphs)
+    ORT_GRAPH_OPTIMIZATION disabled | basic | extended | all (default all)
+    ORT_ENABLE_MEM_ARENA   default true
+"""
+
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+CPU_PROVIDERS = ["CPUExecutionProvider"]
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    intra_op_threads: int = os.cpu_count() or 1
+    inter_op_threads: int = 1
+    graph_optimization: str = "all"
+    enable_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+    # Write the optimized graph here so the next start can skip optimization
+    optimized_model_path: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "SessionConfig":
+        return cls(
+            intra_op_threads=int(os.getenv("ORT_INTRA_OP_THREADS", str(os.cpu_count() or 1))),
+            inter_op_threads=int(os.getenv("ORT_INTER_OP_THREADS", "1")),
+            graph_optimization=os.getenv("ORT_GRAPH_OPTIMIZATION", "all"),
+            enable_mem_arena=os.getenv("ORT_ENABLE_MEM_ARENA", "true").lower() == "true",
+        )
+
+    def session_options(self) -> ort.SessionOptions:
+        if self.graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Unknown graph optimization '{self.graph_optimization}' "
+                f"(expected one of {', '.join(GRAPH_OPTIMIZATION_LEVELS)})"
+            )
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization]
+        options.enable_cpu_mem_arena = self.enable_mem_arena
+        options.enable_mem_pattern = self.enable_mem_pattern
+        if self.optimized_model_path:
+            options.optimized_model_filepath = self.optimized_model_path
+        return options
+
+
+class ModelSession:
+    """One ONNX model with IO-bound, preallocated buffers
+
+    Expects a single 2-D float32 input ``[batch, n_features]``. ``run(n)``
+    returns views into the output buffers that stay valid until the next call;
+    ``predict`` copies in and out for callers that don't manage buffers.
+    """
+
+    def __init__(self, name: str, model_path: str, config: SessionConfig, max_batch_size: int = 128):
+        self.name = name
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.config = config
+        self.session = ort.InferenceSession(model_path, sess_options=config.session_options(), providers=CPU_PROVIDERS)
+
+        inputs = self.session.get_inputs()
+        if len(inputs) != 1 or len(inputs[0].shape) != 2 or not isinstance(inputs[0].shape[1], int):
+            raise ValueError(f"{name}: expected one [batch, n_features] input, got {[(i.name, i.shape) for i in inputs]}")
+        self.input_name = inputs[0].name
+        self.n_features = inputs[0].shape[1]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+        self._input = np.zeros((max_batch_size, self.n_features), dtype=np.float32)
+        self._outputs = self._allocate_outputs()
+        self._bindings: Dict[int, ort.IOBinding] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {"batches": 0, "rows": 0}
+
+    def _allocate_outputs(self) -> List[np.ndarray]:
+        # Output widths may be symbolic; one warm-up row gives the concrete shapes
+        probe = self.session.run(None, {self.input_name: self._input[:1]})
+        return [np.zeros((self.max_batch_size, *out.shape[1:]), dtype=out.dtype) for out in probe]
+
+    def _binding(self, n: int) -> ort.IOBinding:
+        binding = self._bindings.get(n)
+        if binding is None:
+            binding = self.session.io_binding()
+            # Row slices of C-contiguous buffers are contiguous, so these alias the buffers
+            binding.bind_ortvalue_input(self.input_name, ort.OrtValue.ortvalue_from_numpy(self._input[:n]))
+            for name, buffer in zip(self.output_names, self._outputs):
+                binding.bind_ortvalue_output(name, ort.OrtValue.ortvalue_from_numpy(buffer[:n]))
+            self._bindings[n] = binding
+        return binding
+
+    def reconfigure(self, config: SessionConfig):
+        """Rebuild the ONNX session with new options, keeping this object and its buffers"""
+        with self._lock:
+            self.session = ort.InferenceSession(
+                self.model_path, sess_options=config.session_options(), providers=CPU_PROVIDERS
+            )
+            self.config = config
+            self._bindings.clear()  # Bindings belong to the old session
+
+    def output_specs(self) -> List[tuple]:
+        """``(shape without batch, dtype)`` of each output"""
+        return [(buffer.shape[1:], buffer.dtype) for buffer in self._outputs]
+
+    def use_buffers(self, inputs: np.ndarray, outputs: List[np.ndarray]):
+        """Bind to externally owned buffers (e.g. shared memory) instead of the private ones"""
+        if inputs.shape != self._input.shape or [o.shape for o in outputs] != [o.shape for o in self._outputs]:
+            raise ValueError(f"{self.name}: buffer shapes don't match the model")
+        self._input = inputs
+        self._outputs = outputs
+        self._bindings.clear()
+
+    def input_buffer(self, n: int) -> np.ndarray:
+        """First ``n`` rows of the input buffer, to be filled before ``run(n)``"""
+        if n > self.max_batch_size:
+            raise ValueError(f"{self.name}: batch of {n} exceeds max_batch_size {self.max_batch_size}")
+        return self._input[:n]
+
+    def run(self, n: int) -> List[np.ndarray]:
+        """Run on the first ``n`` input rows; returns views of the output buffers"""
+        binding = self._binding(n)
+        self.session.run_with_iobinding(binding)
+        self.stats["batches"] += 1
+        self.stats["rows"] += n
+        return [buffer[:n] for buffer in self._outputs]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """First output for an arbitrary number of rows (chunked to max_batch_size)"""
+        def fill(buffer, start):
+            buffer[:] = X[start:start + len(buffer)]
+
+        return self._predict_chunked(len(X), fill)
+
+    def predict_rows(self, rows: List[Dict], feature_names: List[str], default: float = 0.0) -> np.ndarray:
+        """First output for feature mappings (e.g. Redis ``features:{symbol}`` hashes)"""
+        def fill(buffer, start):
+            fill_features(buffer, rows[start:start + len(buffer)], feature_names, default)
+
+        return self._predict_chunked(len(rows), fill)
+
+    def _predict_chunked(self, count: int, fill: Callable[[np.ndarray, int], None]) -> np.ndarray:
+        results = []
+        with self._lock:
+            for start in range(0, count, self.max_batch_size):
+                n = min(self.max_batch_size, count - start)
+                fill(self.input_buffer(n), start)
+                results.append(self.run(n)[0].copy())
+        if not results:
+            return np.zeros((0, *self._outputs[0].shape[1:]), dtype=self._outputs[0].dtype)
+        return np.concatenate(results)
+
+
+def fill_features(out: np.ndarray, rows: List[Dict], feature_names: List[str], default: float = 0.0):
+    """Write feature mappings into ``out`` (one row per mapping) in a single assignment
+
+    Keys may be str or bytes (redis-py returns bytes unless decode_responses is set).
+    """
+    if not rows:
+        return
+    keys = feature_names
+    if any(isinstance(k, bytes) for k in rows[0]):
+        keys = [name.encode() for name in feature_names]
+    out[:len(rows)] = [[float(row.get(key, default)) for key in keys] for row in rows]
+
+
+class InferenceRuntime:
+    """Model sessions for every agent in one process
+
+    The intra-op thread budget is divided between models, so the normal-day and
+    earnings sessions don't oversubscribe the cores when both are busy. Loading
+    more models later shrinks the share of the ones already loaded (their
+    sessions are rebuilt in place), so load before serving traffic.
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None):
+        self.config = config or SessionConfig.from_env()
+        self.sessions: Dict[str, ModelSession] = {}
+
+    def load(self, models: Dict[str, str], max_batch_size: int = 128) -> Dict[str, ModelSession]:
+        """Load ``{name: model_path}``, sharing the thread budget among all loaded models"""
+        total = len(self.sessions.keys() | models.keys())
+        threads = max(1, self.config.intra_op_threads // total)
+        config = replace(self.config, intra_op_threads=threads)
+        for name, session in self.sessions.items():
+            if name not in models and session.config.intra_op_threads > threads:
+                session.reconfigure(replace(session.config, intra_op_threads=threads))
+                print(f"[InferenceRuntime] {name} now uses {threads} threads ({total} models loaded)")
+        for name, path in models.items():
+            self.sessions[name] = ModelSession(name, path, config, max_batch_size=max_batch_size)
+            print(f"[InferenceRuntime] Loaded {name} from {path} "
+                  f"({self.sessions[name].n_features} features, {threads} threads)")
+        return {name: self.sessions[name] for name in models}
+
+    def get(self, name: str) -> ModelSession:
+        try:
+            return self.sessions[name]
+        except KeyError:
+            raise KeyError(f"Model '{name}' not loaded (have: {', '.join(self.sessions) or 'none'})") from None
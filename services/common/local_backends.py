@@ -0,0 +1,780 @@
+"""
+In-process stand-ins for Redis, NATS and Qdrant
+
+Used by the test suite (``TEST_BACKEND=memory``, the default) and by the
+in-process benchmarks. Service logic can then run without the compose stack.
+Each stand-in implements the part of the client API the services call, with
+the same return types and exceptions, so code under test cannot tell the
+difference:
+
+- ``LocalRedis``: ``redis.asyncio.Redis`` with bytes responses (or ``str``
+  when ``decode_responses=True``). Supports strings, hashes, sorted sets, key
+  expiry, ``scan_iter`` and pipelines.
+- ``LocalNats``: the nats-py ``Client``. Supports ``*``/``>`` wildcards,
+  queue groups, headers, request/reply and ``next_msg``. Every subscription
+  delivers in order from its own task, as nats-py does. ``flush()`` waits
+  until every published message has been handled, so tests need no sleeps.
+- ``LocalJetStream`` (``LocalNats.jetstream()``): streams with sequence
+  numbers, and durable push and pull consumers with ack, nak, term and
+  ack-wait redelivery. Messages are real ``nats.aio.msg.Msg`` objects, so
+  ``msg.ack()`` and ``msg.metadata`` behave exactly as against a server.
+- ``local_qdrant()``: qdrant-client's own local mode (``location=":memory:"``).
+  It runs the same filters and scoring as the server.
+"""
+
+import asyncio
+import fnmatch
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from nats.aio.msg import Msg
+from nats.errors import BadSubscriptionError, ConnectionClosedError, NoRespondersError, TimeoutError
+from nats.js import api
+from nats.js.errors import NoStreamResponseError, NotFoundError
+from redis.exceptions import DataError, ResponseError
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+JS_ACK_PREFIX = "$JS.ACK."
+
+
+def local_qdrant():
+    """In-memory AsyncQdrantClient"""
+    from qdrant_client import AsyncQdrantClient
+
+    return AsyncQdrantClient(location=":memory:")
+
+
+def subject_matches(pattern: str, subject: str) -> bool:
+    """NATS subject matching: `*` is one token, a trailing `>` is one or more"""
+    want, have = pattern.split("."), subject.split(".")
+    for i, token in enumerate(want):
+        if token == ">":
+            return len(have) > i
+        if i >= len(have) or (token != "*" and token != have[i]):
+            return False
+    return len(want) == len(have)
+
+
+# Redis
+
+def _encode(value) -> bytes:
+    """Encode a value the way redis-py does before sending it"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise DataError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+    return repr(value).encode()
+
+
+def _key(name) -> str:
+    return name.decode() if isinstance(name, bytes) else str(name)
+
+
+class LocalRedis:
+    """Dict-backed redis.asyncio.Redis"""
+
+    def __init__(self, decode_responses: bool = False, clock: Callable[[], float] = time.monotonic):
+        self.decode_responses = decode_responses
+        self.clock = clock
+        self._data: Dict[str, object] = {}  # bytes | dict (hash) | ZSet
+        self._expires: Dict[str, float] = {}
+
+    @classmethod
+    def from_url(cls, url: str = "", **kwargs) -> "LocalRedis":
+        return cls(decode_responses=kwargs.get("decode_responses", False))
+
+    def _out(self, value: Optional[bytes]):
+        if value is None or not self.decode_responses:
+            return value
+        return value.decode()
+
+    def _lookup(self, name, kind=None):
+        key = _key(name)
+        deadline = self._expires.get(key)
+        if deadline is not None and self.clock() >= deadline:
+            self._data.pop(key, None)
+            del self._expires[key]
+        value = self._data.get(key)
+        if value is not None and kind is not None and type(value) is not kind:
+            raise ResponseError(WRONGTYPE)
+        return value
+
+    def _store(self, name, value, ttl: Optional[float] = None):
+        key = _key(name)
+        self._data[key] = value
+        if ttl is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = self.clock() + ttl
+
+    # Connection
+    async def ping(self, **kwargs) -> bool:
+        return True
+
+    async def flushdb(self, **kwargs) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        return True
+
+    async def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def pipeline(self, transaction: bool = True) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+    # Keys
+    async def delete(self, *names) -> int:
+        deleted = 0
+        for name in names:
+            if self._lookup(name) is not None:
+                del self._data[_key(name)]
+                self._expires.pop(_key(name), None)
+                deleted += 1
+        return deleted
+
+    async def exists(self, *names) -> int:
+        return sum(self._lookup(name) is not None for name in names)
+
+    async def expire(self, name, time, nx: bool = False, xx: bool = False, gt: bool = False, lt: bool = False) -> bool:
+        if self._lookup(name) is None:
+            return False
+        key = _key(name)
+        current = self._expires.get(key)
+        deadline = self.clock() + time
+        if (nx and current is not None) or (xx and current is None):
+            return False
+        if (gt and (current is None or deadline <= current)) or (lt and current is not None and deadline >= current):
+            return False
+        self._expires[key] = deadline
+        return True
+
+    async def ttl(self, name) -> int:
+        if self._lookup(name) is None:
+            return -2
+        deadline = self._expires.get(_key(name))
+        return -1 if deadline is None else max(round(deadline - self.clock()), 0)
+
+    async def keys(self, pattern="*") -> List:
+        pattern = _key(pattern)
+        return [
+            self._out(key.encode()) for key in list(self._data)
+            if self._lookup(key) is not None and fnmatch.fnmatchcase(key, pattern)
+        ]
+
+    async def scan_iter(self, match=None, count: Optional[int] = None, _type: Optional[str] = None) -> AsyncIterator:
+        for key in await self.keys(match or "*"):
+            yield key
+
+    # Strings
+    async def get(self, name):
+        return self._out(self._lookup(name, bytes))
+
+    async def mget(self, keys, *args) -> List:
+        names = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        values = []
+        for name in names:
+            value = self._lookup(name)
+            values.append(self._out(value) if isinstance(value, bytes) else None)
+        return values
+
+    async def set(self, name, value, ex=None, px=None, nx: bool = False, xx: bool = False, keepttl: bool = False):
+        exists = self._lookup(name) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        if keepttl and ttl is None and _key(name) in self._expires:
+            self._data[_key(name)] = _encode(value)
+        else:
+            self._store(name, _encode(value), ttl)
+        return True
+
+    async def setex(self, name, time, value) -> bool:
+        self._store(name, _encode(value), time)
+        return True
+
+    async def mset(self, mapping: Dict) -> bool:
+        for name, value in mapping.items():
+            self._store(name, _encode(value))
+        return True
+
+    async def incrby(self, name, amount: int = 1) -> int:
+        current = self._lookup(name, bytes)
+        try:
+            value = int(current or 0) + amount
+        except ValueError:
+            raise ResponseError("value is not an integer or out of range")
+        self._data[_key(name)] = str(value).encode()
+        return value
+
+    async def incr(self, name, amount: int = 1) -> int:
+        return await self.incrby(name, amount)
+
+    # Hashes
+    async def hset(self, name, key=None, value=None, mapping: Optional[Dict] = None, items: Optional[List] = None) -> int:
+        pairs = list((mapping or {}).items()) + list(zip((items or [])[::2], (items or [])[1::2]))
+        if key is not None:
+            pairs.append((key, value))
+        if not pairs:
+            raise DataError("'hset' with no key value pairs")
+        stored = self._lookup(name, dict)
+        if stored is None:
+            stored = {}
+            self._data[_key(name)] = stored
+        added = 0
+        for field, v in pairs:
+            field = _encode(field)
+            added += field not in stored
+            stored[field] = _encode(v)
+        return added
+
+    async def hget(self, name, key):
+        return self._out((self._lookup(name, dict) or {}).get(_encode(key)))
+
+    async def hmget(self, name, keys, *args) -> List:
+        stored = self._lookup(name, dict) or {}
+        names = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        return [self._out(stored.get(_encode(k))) for k in names]
+
+    async def hgetall(self, name) -> Dict:
+        return {self._out(k): self._out(v) for k, v in (self._lookup(name, dict) or {}).items()}
+
+    async def hdel(self, name, *keys) -> int:
+        stored = self._lookup(name, dict) or {}
+        removed = sum(stored.pop(_encode(k), None) is not None for k in keys)
+        if not stored:
+            self._data.pop(_key(name), None)
+        return removed
+
+    # Sorted sets
+    def _zset(self, name, create: bool = False) -> Optional["ZSet"]:
+        stored = self._lookup(name, ZSet)
+        if stored is None and create:
+            stored = self._data[_key(name)] = ZSet()
+        return stored
+
+    async def zadd(self, name, mapping: Dict, nx: bool = False, xx: bool = False) -> int:
+        zset = self._zset(name, create=True)
+        added = 0
+        for member, score in mapping.items():
+            member = _encode(member)
+            if (nx and member in zset) or (xx and member not in zset):
+                continue
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+
+    async def zincrby(self, name, amount: float, value) -> float:
+        zset = self._zset(name, create=True)
+        member = _encode(value)
+        zset[member] = zset.get(member, 0.0) + amount
+        return zset[member]
+
+    async def zscore(self, name, value) -> Optional[float]:
+        return (self._zset(name) or {}).get(_encode(value))
+
+    async def zrem(self, name, *values) -> int:
+        zset = self._zset(name) or {}
+        return sum(zset.pop(_encode(v), None) is not None for v in values)
+
+    async def zcard(self, name) -> int:
+        return len(self._zset(name) or {})
+
+    async def zrange(self, name, start: int, end: int, desc: bool = False, withscores: bool = False, score_cast_func=float) -> List:
+        zset = self._zset(name) or ZSet()
+        ordered = sorted(zset.items(), key=lambda item: (item[1], item[0]), reverse=desc)
+        n = len(ordered)
+        start, end = (start + n if start < 0 else start), (end + n if end < 0 else end)
+        selected = ordered[max(start, 0):end + 1] if start <= end else []
+        if withscores:
+            return [(self._out(member), score_cast_func(score)) for member, score in selected]
+        return [self._out(member) for member, _ in selected]
+
+    async def zrevrange(self, name, start: int, end: int, withscores: bool = False, score_cast_func=float) -> List:
+        return await self.zrange(name, start, end, desc=True, withscores=withscores, score_cast_func=score_cast_func)
+
+
+class ZSet(dict):
+    """member (bytes) -> score"""
+
+
+class LocalPipeline:
+    """Queues commands and runs them in order on execute(), like a redis-py pipeline"""
+
+    def __init__(self, redis: LocalRedis):
+        self.redis = redis
+        self.commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands = []
+        return False
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(LocalRedis, name, None)):
+            raise AttributeError(f"LocalPipeline has no command {name!r}")
+
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def __len__(self):
+        return len(self.commands)
+
+    async def execute(self, raise_on_error: bool = True) -> List:
+        commands, self.commands = self.commands, []
+        results = []
+        for name, args, kwargs in commands:
+            try:
+                results.append(await getattr(self.redis, name)(*args, **kwargs))
+            except ResponseError as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+
+    def reset(self):
+        self.commands = []
+
+
+# NATS
+
+class LocalSubscription:
+    def __init__(self, nats: "LocalNats", subject: str, queue: str = "", cb=None, on_message=None):
+        self._nats = nats
+        self.subject = subject
+        self.queue = queue
+        self._cb = cb
+        self._on_message = on_message  # JetStream hook run after cb (auto-ack)
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._in_flight = 0  # queued or still inside the callback
+        self._task: Optional[asyncio.Task] = asyncio.create_task(self._deliver()) if cb else None
+        self._closed = False
+
+    @property
+    def pending_msgs(self) -> int:
+        return self._pending.qsize()
+
+    def _enqueue(self, msg: Msg):
+        if not self._closed:
+            self._in_flight += 1
+            self._pending.put_nowait(msg)
+
+    async def _deliver(self):
+        while True:
+            msg = await self._pending.get()
+            try:
+                await self._cb(msg)
+                if self._on_message:
+                    await self._on_message(msg)
+            except Exception as e:
+                print(f"[LocalNats] Callback for {msg.subject} raised: {e!r}")
+            finally:
+                self._in_flight -= 1
+                self._pending.task_done()
+
+    async def next_msg(self, timeout: Optional[float] = 1.0) -> Msg:
+        if self._cb is not None:
+            raise BadSubscriptionError("next_msg cannot be used on a subscription with a callback")
+        try:
+            msg = await asyncio.wait_for(self._pending.get(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError
+        self._in_flight -= 1
+        self._pending.task_done()
+        return msg
+
+    @property
+    def busy(self) -> bool:
+        return self._cb is not None and self._in_flight > 0
+
+    async def unsubscribe(self, limit: int = 0):
+        self._closed = True
+        self._nats._remove(self)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        while not self._pending.empty():
+            self._pending.get_nowait()
+            self._pending.task_done()
+        self._in_flight = 0
+
+    async def drain(self):
+        if self._cb is not None:
+            await self._pending.join()
+        await self.unsubscribe()
+
+
+class LocalNats:
+    """In-process nats-py Client"""
+
+    def __init__(self):
+        self.subscriptions: List[LocalSubscription] = []
+        self.push_subscriptions: List[LocalSubscription] = []  # JetStream push consumers, fed by their consumer
+        self.is_connected = False
+        self.is_closed = False
+        self._groups: Dict[Tuple[str, str], int] = defaultdict(int)  # round-robin position per queue group
+        self._jetstream: Optional["LocalJetStream"] = None
+
+    async def connect(self, servers=None, **kwargs):
+        self.is_connected, self.is_closed = True, False
+
+    def new_inbox(self) -> str:
+        return f"_INBOX.{uuid.uuid4().hex}"
+
+    async def subscribe(self, subject: str, queue: str = "", cb=None, **kwargs) -> LocalSubscription:
+        self._check_open()
+        sub = LocalSubscription(self, subject, queue, cb)
+        self.subscriptions.append(sub)
+        return sub
+
+    def _remove(self, sub: LocalSubscription):
+        for subs in (self.subscriptions, self.push_subscriptions):
+            if sub in subs:
+                subs.remove(sub)
+
+    def _check_open(self):
+        if self.is_closed:
+            raise ConnectionClosedError
+
+    async def publish(self, subject: str, payload: bytes = b"", reply: str = "", headers: Optional[Dict[str, str]] = None):
+        self._check_open()
+        if subject.startswith(JS_ACK_PREFIX):
+            if self._jetstream:
+                self._jetstream._on_ack(subject, payload)
+            return
+        self._route(subject, payload, reply, headers)
+        if self._jetstream:
+            self._jetstream._capture(subject, payload, headers)
+
+    def _route(self, subject: str, payload: bytes, reply: str, headers) -> int:
+        """Deliver to every plain subscriber and one member of each queue group"""
+        groups = defaultdict(list)
+        delivered = 0
+        for sub in list(self.subscriptions):
+            if not subject_matches(sub.subject, subject):
+                continue
+            if sub.queue:
+                groups[(sub.subject, sub.queue)].append(sub)
+            else:
+                sub._enqueue(Msg(self, subject, reply, payload, headers))
+                delivered += 1
+        for group, members in groups.items():
+            position = self._groups[group]
+            self._groups[group] = position + 1
+            members[position % len(members)]._enqueue(Msg(self, subject, reply, payload, headers))
+            delivered += 1
+        return delivered
+
+    async def request(self, subject: str, payload: bytes = b"", timeout: float = 0.5, headers: Optional[Dict[str, str]] = None) -> Msg:
+        inbox = self.new_inbox()
+        sub = await self.subscribe(inbox)
+        try:
+            if not self._route(subject, payload, inbox, headers):
+                raise NoRespondersError
+            return await sub.next_msg(timeout)
+        finally:
+            await sub.unsubscribe()
+
+    async def flush(self, timeout: int = 10):
+        """Wait until every callback subscription has handled what was published so far"""
+        try:
+            await asyncio.wait_for(self._drained(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError
+
+    async def _drained(self):
+        # A handler may publish more, so wait until every subscription is idle at once
+        while True:
+            busy = [sub for sub in self.subscriptions + self.push_subscriptions if sub.busy]
+            if not busy:
+                return
+            for sub in busy:
+                await sub._pending.join()
+
+    def jetstream(self, **kwargs) -> "LocalJetStream":
+        if self._jetstream is None:
+            self._jetstream = LocalJetStream(self)
+        return self._jetstream
+
+    async def drain(self):
+        await self._drained()
+        await self.close()
+
+    async def close(self):
+        for sub in self.subscriptions + self.push_subscriptions:
+            await sub.unsubscribe()
+        if self._jetstream:
+            self._jetstream._stop()
+        self.is_connected, self.is_closed = False, True
+
+
+class LocalStream:
+    def __init__(self, config: api.StreamConfig):
+        self.config = config
+        self.messages: Dict[int, Tuple[str, bytes, Optional[Dict[str, str]]]] = {}
+        self.last_seq = 0
+        self.consumers: Dict[str, "LocalConsumer"] = {}
+
+    def matches(self, subject: str) -> bool:
+        return any(subject_matches(pattern, subject) for pattern in self.config.subjects or [])
+
+    def append(self, subject: str, payload: bytes, headers) -> int:
+        self.last_seq += 1
+        self.messages[self.last_seq] = (subject, payload, headers)
+        if self.config.max_msgs and self.config.max_msgs > 0 and len(self.messages) > self.config.max_msgs:
+            del self.messages[min(self.messages)]
+        for consumer in self.consumers.values():
+            consumer.dispatch()
+        return self.last_seq
+
+    def info(self) -> api.StreamInfo:
+        return api.StreamInfo(config=self.config, state=api.StreamState(
+            messages=len(self.messages),
+            bytes=sum(len(data) for _, data, _ in self.messages.values()),
+            first_seq=min(self.messages, default=self.last_seq + 1),
+            last_seq=self.last_seq,
+            consumer_count=len(self.consumers),
+        ))
+
+
+class LocalConsumer:
+    """Durable consumer state: delivery cursor, unacked messages and redelivery timers"""
+
+    def __init__(
+        self, nats: LocalNats, stream: LocalStream, name: str, filter_subject: Optional[str], ack_wait: float,
+        max_deliver: int,
+    ):
+        self.nats = nats
+        self.stream = stream
+        self.name = name
+        self.filter_subject = filter_subject
+        self.ack_wait = ack_wait
+        self.max_deliver = max_deliver
+        self.next_seq = 1
+        self.consumer_seq = 0
+        self.deliveries: Dict[int, int] = defaultdict(int)  # stream seq -> times delivered
+        self.unacked: Dict[int, asyncio.TimerHandle] = {}
+        self.redeliver: List[int] = []
+        self.push: Optional[LocalSubscription] = None
+        self.waiting: List[Tuple[asyncio.Queue, int]] = []  # pull requests: (queue, remaining)
+
+    def _available(self) -> Optional[int]:
+        while self.redeliver:
+            seq = self.redeliver.pop(0)
+            if seq in self.stream.messages:
+                return seq
+        while self.next_seq <= self.stream.last_seq:
+            seq = self.next_seq
+            self.next_seq += 1
+            if seq in self.stream.messages and (
+                not self.filter_subject or subject_matches(self.filter_subject, self.stream.messages[seq][0])
+            ):
+                return seq
+        return None
+
+    def num_pending(self) -> int:
+        return sum(
+            1 for seq, (subject, _, _) in self.stream.messages.items()
+            if seq >= self.next_seq and (not self.filter_subject or subject_matches(self.filter_subject, subject))
+        )
+
+    def dispatch(self):
+        """Hand available messages to the push subscription or waiting pull requests"""
+        if self.push is not None and self.push._closed:
+            self.push = None
+        while self.push is not None or self.waiting:
+            seq = self._available()
+            if seq is None:
+                return
+            msg = self._message(seq)
+            if self.push is not None:
+                self.push._enqueue(msg)
+            else:
+                queue, remaining = self.waiting[0]
+                queue.put_nowait(msg)
+                if remaining <= 1:
+                    self.waiting.pop(0)
+                else:
+                    self.waiting[0] = (queue, remaining - 1)
+
+    def _message(self, seq: int) -> Msg:
+        subject, payload, headers = self.stream.messages[seq]
+        self.deliveries[seq] += 1
+        self.consumer_seq += 1
+        timer = self.unacked.pop(seq, None)
+        if timer:
+            timer.cancel()
+        self.unacked[seq] = asyncio.get_running_loop().call_later(self.ack_wait, self._expired, seq)
+        reply = (f"{JS_ACK_PREFIX}{self.stream.config.name}.{self.name}.{self.deliveries[seq]}."
+                 f"{seq}.{self.consumer_seq}.{time.time_ns()}.{self.num_pending()}")
+        return Msg(self.nats, subject, reply, payload, headers)
+
+    def _expired(self, seq: int):
+        self.unacked.pop(seq, None)
+        self._retry(seq)
+
+    def _retry(self, seq: int):
+        if self.max_deliver <= 0 or self.deliveries[seq] < self.max_deliver:
+            self.redeliver.append(seq)
+            self.dispatch()
+
+    def ack(self, seq: int, payload: bytes):
+        if payload.startswith(Msg.Ack.Progress):
+            timer = self.unacked.get(seq)
+            if timer:
+                timer.cancel()
+                self.unacked[seq] = asyncio.get_running_loop().call_later(self.ack_wait, self._expired, seq)
+            return
+        timer = self.unacked.pop(seq, None)
+        if timer is None:
+            return
+        timer.cancel()
+        if payload.startswith(Msg.Ack.Nak):
+            delay = json.loads(payload[len(Msg.Ack.Nak):] or b"{}").get("delay")
+            if delay:
+                asyncio.get_running_loop().call_later(delay / 1e9, self._retry, seq)
+            else:
+                self._retry(seq)
+
+    def stop(self):
+        for timer in self.unacked.values():
+            timer.cancel()
+        self.unacked.clear()
+
+
+class LocalPullSubscription:
+    def __init__(self, consumer: LocalConsumer):
+        self.consumer = consumer
+
+    async def fetch(self, batch: int = 1, timeout: Optional[float] = 5, **kwargs) -> List[Msg]:
+        """Up to `batch` messages; waits up to `timeout` for the first one"""
+        queue: asyncio.Queue = asyncio.Queue()
+        request = (queue, batch)
+        self.consumer.waiting.append(request)
+        self.consumer.dispatch()
+        try:
+            first = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError
+        finally:
+            # Withdraw whatever is left of this request
+            self.consumer.waiting = [w for w in self.consumer.waiting if w[0] is not queue]
+        messages = [first]
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+        return messages
+
+    async def unsubscribe(self):
+        pass
+
+
+class LocalJetStream:
+    """In-process JetStream context: streams, durable consumers, acks and redelivery"""
+
+    def __init__(self, nats: LocalNats):
+        self.nats = nats
+        self.streams: Dict[str, LocalStream] = {}
+
+    async def add_stream(self, config: Optional[api.StreamConfig] = None, **params) -> api.StreamInfo:
+        config = config or api.StreamConfig(**params)
+        stream = self.streams.get(config.name)
+        if stream is None:
+            stream = self.streams[config.name] = LocalStream(config)
+        else:
+            stream.config = config
+        return stream.info()
+
+    async def stream_info(self, name: str) -> api.StreamInfo:
+        return self._stream(name).info()
+
+    async def delete_stream(self, name: str) -> bool:
+        for consumer in self._stream(name).consumers.values():
+            consumer.stop()
+        del self.streams[name]
+        return True
+
+    def _stream(self, name: str) -> LocalStream:
+        if name not in self.streams:
+            raise NotFoundError(code=404, description="stream not found")
+        return self.streams[name]
+
+    def _stream_for(self, subject: str, name: Optional[str] = None) -> LocalStream:
+        for stream in self.streams.values():
+            if (name is None or stream.config.name == name) and stream.matches(subject):
+                return stream
+        raise NotFoundError(code=404, description="no stream matches subject")
+
+    def _capture(self, subject: str, payload: bytes, headers):
+        for stream in self.streams.values():
+            if stream.matches(subject):
+                stream.append(subject, payload, headers)
+
+    async def publish(
+        self, subject: str, payload: bytes = b"", timeout: Optional[float] = None, stream: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> api.PubAck:
+        self.nats._check_open()
+        target = next((s for s in self.streams.values() if s.matches(subject) and stream in (None, s.config.name)), None)
+        if target is None:
+            raise NoStreamResponseError
+        self.nats._route(subject, payload, "", headers)
+        seq = target.append(subject, payload, headers)
+        return api.PubAck(stream=target.config.name, seq=seq)
+
+    def _consumer(
+        self, subject: str, durable: Optional[str], stream: Optional[str], config: Optional[api.ConsumerConfig]
+    ) -> LocalConsumer:
+        target = self._stream_for(subject, stream)
+        name = durable or (config and (config.durable_name or config.name)) or uuid.uuid4().hex[:12]
+        consumer = target.consumers.get(name)
+        if consumer is None:
+            ack_wait = (config.ack_wait if config and config.ack_wait else 30.0)
+            max_deliver = (config.max_deliver if config and config.max_deliver else -1)
+            consumer = target.consumers[name] = LocalConsumer(self.nats, target, name, subject, ack_wait, max_deliver)
+        return consumer
+
+    async def subscribe(
+        self, subject: str, queue: Optional[str] = None, cb=None, durable: Optional[str] = None,
+        stream: Optional[str] = None, config: Optional[api.ConsumerConfig] = None, manual_ack: bool = False, **kwargs,
+    ) -> LocalSubscription:
+        """Push consumer; without manual_ack each message is acked once the callback returns"""
+        consumer = self._consumer(subject, durable or queue, stream, config)
+
+        async def auto_ack(msg: Msg):
+            if not msg.is_acked:
+                await msg.ack()
+
+        sub = LocalSubscription(self.nats, subject, cb=cb, on_message=None if manual_ack else auto_ack)
+        self.nats.push_subscriptions.append(sub)
+        consumer.push = sub
+        consumer.dispatch()
+        return sub
+
+    async def pull_subscribe(
+        self, subject: str, durable: Optional[str] = None, stream: Optional[str] = None,
+        config: Optional[api.ConsumerConfig] = None, **kwargs,
+    ) -> LocalPullSubscription:
+        return LocalPullSubscription(self._consumer(subject, durable, stream, config))
+
+    def _on_ack(self, subject: str, payload: bytes):
+        tokens = subject.split(".")
+        stream = self.streams.get(tokens[2])
+        consumer = stream.consumers.get(tokens[3]) if stream else None
+        if consumer is not None:
+            consumer.ack(int(tokens[5]), payload)
+
+    def _stop(self):
+        for stream in self.streams.values():
+            for consumer in stream.consumers.values():
+                consumer.stop()
@@ -0,0 +1,167 @@
+"""
+Shared Prometheus instrumentation
+
+Hot paths never call into prometheus_client. Components keep doing what they
+already do: plain integer counters in their ``stats`` dicts (one dict
+increment per event) and durations/sizes in a ``LocalHistogram`` (a bisect
+over ~15 bounds and two additions, no locks). ``ServiceMetrics`` is a
+custom collector that reads those structures only when Prometheus scrapes,
+so instrumentation costs nothing between scrapes. Scrapes run on the HTTP
+server's thread and read without locking; a sample may be one event stale.
+
+    metrics = ServiceMetrics()
+    metrics.counters("router_ticks", "Ticks seen by the streaming router", router.stats)
+    metrics.gauge("router_queue_depth", "Symbols waiting to be flushed", router.queue_depth)
+    metrics.histogram("router_batch_size", "Symbols per published job", router.batch_sizes)
+    metrics.watch_subscription(await nats.subscribe(FEATURES_READY, cb=...), FEATURES_READY)
+    start_metrics_server(METRICS_PORTS["routing_agent"])
+
+Non-HTTP services serve ``/metrics`` on their own port (``METRICS_PORT``
+overrides the default below); the API gateway serves it on its HTTP port.
+NATS subscription backlogs (``nats_subscription_pending_messages``) cover
+core subscriptions; JetStream consumer lag comes from the NATS exporter in
+docker-compose.yml.
+"""
+
+import os
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+from prometheus_client import REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+# Default /metrics port per service (config/prometheus.yml scrapes these)
+METRICS_PORTS = {
+    "ingestion_agent": 9101,
+    "feature_store": 9102,
+    "routing_agent": 9103,
+    "prediction_agent_normal": 9104,
+    "prediction_agent_earnings": 9105,
+    "explanation_worker": 9106,
+    "embedding_service": 9107,
+    "pregeneration": 9108,
+    "accuracy_evaluator": 9109,
+}
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+Source = Union[Mapping, Callable[[], Union[Mapping, float]]]
+
+
+def percentile(samples: Iterable[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 1]) of raw samples; 0.0 when there are none"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class LocalHistogram:
+    """Fixed-bucket histogram updated without locks (single event loop)"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def buckets(self):
+        """Cumulative (le, count) pairs in exposition format"""
+        cumulative = 0
+        result = []
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            cumulative += count
+            result.append(("+Inf" if bound == float("inf") else repr(float(bound)), cumulative))
+        return result
+
+
+def _flatten(values, depth: int, prefix: Tuple[str, ...] = ()) -> Iterable[Tuple[Tuple[str, ...], float]]:
+    """Nested stats dicts -> (label values, number); non-numeric entries are skipped"""
+    for key, value in list(values.items()):
+        labels = (*prefix, str(key))
+        if isinstance(value, Mapping):
+            if depth > 1:
+                yield from _flatten(value, depth - 1, labels)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and depth == 1:
+            yield labels, value
+
+
+class ServiceMetrics:
+    """Collector exposing a service's stats dicts, gauges and local histograms"""
+
+    def __init__(self, registry=REGISTRY):
+        self._counters: Dict[str, tuple] = {}
+        self._gauges: Dict[str, tuple] = {}
+        self._histograms: Dict[str, tuple] = {}
+        self._subscriptions: Dict[str, object] = {}  # subject -> nats Subscription
+        if registry is not None:
+            registry.register(self)
+
+    def counters(self, name: str, documentation: str, source: Source, labels: Sequence[str] = ("event",)):
+        """Expose a stats dict as ``{name}_total``; nested dicts use one label per level"""
+        self._counters[name] = (documentation, source, tuple(labels))
+
+    def gauge(self, name: str, documentation: str, source: Source, labels: Sequence[str] = ()):
+        """Expose a value (or dict of values) computed at scrape time"""
+        self._gauges[name] = (documentation, source, tuple(labels))
+
+    def histogram(self, name: str, documentation: str, histogram: Union[LocalHistogram, Mapping[str, LocalHistogram]],
+                  label: Optional[str] = None):
+        self._histograms[name] = (documentation, histogram, label)
+
+    def watch_subscription(self, subscription, subject: str):
+        """Report the client-side backlog of a NATS subscription"""
+        self._subscriptions[subject] = subscription
+
+    def describe(self):
+        # Sources are added after registration; skip the registry's up-front collect()
+        return []
+
+    def collect(self):
+        for name, (documentation, source, labels) in self._counters.items():
+            family = CounterMetricFamily(name, documentation, labels=labels)
+            values = source() if callable(source) else source
+            for label_values, value in _flatten(values, len(labels)):
+                family.add_metric(label_values, value)
+            yield family
+
+        for name, (documentation, source, labels) in self._gauges.items():
+            family = GaugeMetricFamily(name, documentation, labels=labels)
+            value = source() if callable(source) else source
+            if isinstance(value, Mapping):
+                for label_values, number in _flatten(value, len(labels)):
+                    family.add_metric(label_values, number)
+            else:
+                family.add_metric((), value)
+            yield family
+
+        if self._subscriptions:
+            family = GaugeMetricFamily(
+                "nats_subscription_pending_messages", "Messages received but not yet processed", labels=["subject"]
+            )
+            for subject, subscription in list(self._subscriptions.items()):
+                family.add_metric([subject], subscription.pending_msgs)
+            yield family
+
+        for name, (documentation, histogram, label) in self._histograms.items():
+            family = HistogramMetricFamily(name, documentation, labels=[label] if label else None)
+            for label_value, hist in (list(histogram.items()) if label else [(None, histogram)]):
+                family.add_metric([label_value] if label else [], hist.buckets(), hist.sum)
+            yield family
+
+
+def start_metrics_server(port: int, registry=REGISTRY):
+    """Serve /metrics for a service without an HTTP server of its own"""
+    port = int(os.getenv("METRICS_PORT", port))
+    start_http_server(port, registry=registry)
+    print(f"[Metrics] Serving /metrics on :{port}")
@@ -0,0 +1,321 @@
+"""
+Model registry watcher and hot-swappable model sessions
+
+The active model for each type is the newest ``is_active`` row of
+``model_metadata`` (migration 001). ``ModelRegistryWatcher`` polls for it;
+when it changes, the new ONNX session is loaded and warmed with synthetic
+batches in a background thread while the old one keeps serving, then swapped
+in with a single reference assignment. The old session is released once the
+batches already running on it finish (drain), so no request waits on a load
+or hits a cold session.
+
+Warm-up runs on MODEL_WARMUP_THREADS intra-op threads so it doesn't take
+the cores the serving session is using; the session is rebuilt with the full
+thread budget just before the swap.
+
+The model file comes from ``metadata->>'model_path'``, falling back to
+``{MODEL_DIR}/{model_name}_{model_version}.onnx``.
+
+With ``shadow_fraction`` > 0 the previous model is kept for a while after a
+swap and that fraction of batches is also scored on it in the background, to
+compare old and new predictions (``HotSwapModel.shadow_stats``) without
+touching request latency.
+"""
+
+import asyncio
+import json
+import os
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+
+from services.common.inference_runtime import ModelSession, SessionConfig, fill_features
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_POLL_INTERVAL_SEC = float(os.getenv("MODEL_POLL_INTERVAL_SEC", "30"))
+MODEL_SHADOW_FRACTION = float(os.getenv("MODEL_SHADOW_FRACTION", "0"))
+MODEL_SHADOW_WINDOW_SEC = float(os.getenv("MODEL_SHADOW_WINDOW_SEC", "900"))
+MODEL_WARMUP_THREADS = int(os.getenv("MODEL_WARMUP_THREADS", "1"))
+ACTIVE_MODEL_TTL_SEC = 3600
+
+ACTIVE_MODEL_QUERY = """
+    SELECT id, model_name, model_version, model_type, deployment_date, metadata
+    FROM model_metadata
+    WHERE model_type = $1 AND is_active
+    ORDER BY deployment_date DESC NULLS LAST, id DESC
+    LIMIT 1
+"""
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    model_type: str
+    model_name: str
+    model_version: str
+    path: str
+    deployment_date: Optional[datetime] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.model_name}:{self.model_version}"
+
+    @classmethod
+    def from_row(cls, row, model_dir: str = MODEL_DIR) -> "ModelVersion":
+        metadata = row["metadata"] or {}
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        path = metadata.get("model_path") or str(Path(model_dir) / f"{row['model_name']}_{row['model_version']}.onnx")
+        return cls(row["model_type"], row["model_name"], row["model_version"], path, row["deployment_date"])
+
+
+class _Loaded:
+    """A session plus the bookkeeping needed to drain it"""
+
+    def __init__(self, version: ModelVersion, session):
+        self.version = version
+        self.session = session
+        self.in_flight = 0
+        self.retired = False
+        self.drained = asyncio.Event()
+
+
+def synthetic_batches(n_features: int, max_batch_size: int, rounds: int = 3) -> Iterator[np.ndarray]:
+    """Warm-up inputs covering small, medium and full batches"""
+    rng = np.random.default_rng(0)
+    sizes = sorted({1, max(1, max_batch_size // 4), max_batch_size})
+    for _ in range(rounds):
+        for size in sizes:
+            yield rng.standard_normal((size, n_features)).astype(np.float32)
+
+
+class HotSwapModel:
+    """Serves one model type; its session can be replaced while requests are running"""
+
+    def __init__(
+        self,
+        model_type: str,
+        loader: Optional[Callable[[str], ModelSession]] = None,
+        max_batch_size: int = 128,
+        warmup_rounds: int = 3,
+        shadow_fraction: float = MODEL_SHADOW_FRACTION,
+        shadow_window: float = MODEL_SHADOW_WINDOW_SEC,
+        config: Optional[SessionConfig] = None,
+        warmup_threads: int = MODEL_WARMUP_THREADS,
+    ):
+        self.model_type = model_type
+        self.config = config or SessionConfig.from_env()
+        warmup_config = replace(self.config, intra_op_threads=min(warmup_threads, self.config.intra_op_threads))
+        self.loader = loader or (
+            lambda path: ModelSession(model_type, path, warmup_config, max_batch_size=max_batch_size)
+        )
+        self.warmup_rounds = warmup_rounds
+        self.shadow_fraction = shadow_fraction
+        self.shadow_window = shadow_window
+
+        self.current: Optional[_Loaded] = None
+        self.shadow: Optional[_Loaded] = None
+        self._shadow_until = 0.0
+        self._swap_lock = asyncio.Lock()
+        # Shadow scoring in flight, referenced so it is not garbage-collected mid-batch
+        self._shadow_tasks: Set[asyncio.Task] = set()
+
+        self.stats = {"swaps": 0, "failed_swaps": 0}
+        self.shadow_stats = {"batches": 0, "rows": 0, "abs_diff_sum": 0.0, "max_abs_diff": 0.0}
+
+    @property
+    def version(self) -> Optional[ModelVersion]:
+        return self.current.version if self.current else None
+
+    async def swap_to(self, version: ModelVersion) -> bool:
+        """Load and warm ``version`` off the event loop, then make it current"""
+        async with self._swap_lock:
+            if self.version == version:
+                return False
+            try:
+                session = await asyncio.to_thread(self._load_and_warm, version.path)
+            except Exception as e:
+                self.stats["failed_swaps"] += 1
+                print(f"[ModelRegistry] Keeping {self.version.key if self.version else 'no model'} for "
+                      f"{self.model_type}: {version.key} failed to load/warm up: {e}")
+                return False
+
+            old, self.current = self.current, _Loaded(version, session)
+            self.stats["swaps"] += 1
+            print(f"[ModelRegistry] {self.model_type}: now serving {version.key}"
+                  + (f" (was {old.version.key})" if old else ""))
+
+            if old and self.shadow_fraction > 0:
+                self._retire(self.shadow)
+                self.shadow = old
+                self._shadow_until = asyncio.get_running_loop().time() + self.shadow_window
+                self.shadow_stats = {"batches": 0, "rows": 0, "abs_diff_sum": 0.0, "max_abs_diff": 0.0}
+            else:
+                self._retire(old)
+            return True
+
+    def _load_and_warm(self, path: str):
+        session = self.loader(path)
+        for batch in synthetic_batches(session.n_features, session.max_batch_size, self.warmup_rounds):
+            output = session.predict(batch)
+            if not np.all(np.isfinite(output)):
+                raise ValueError("non-finite output on warm-up batch")
+        if getattr(session, "config", self.config) != self.config:
+            session.reconfigure(self.config)
+            session.predict(next(synthetic_batches(session.n_features, 1, rounds=1)))
+        return session
+
+    def _retire(self, loaded: Optional[_Loaded]):
+        if loaded is None:
+            return
+        loaded.retired = True
+        if loaded.in_flight == 0:
+            loaded.drained.set()
+            loaded.session = None
+
+    async def drain(self, loaded: _Loaded, timeout: float = 30):
+        """Wait for the batches still running on a retired session"""
+        await asyncio.wait_for(loaded.drained.wait(), timeout)
+
+    @contextmanager
+    def acquire(self, loaded: Optional[_Loaded] = None):
+        """Pin a session for one batch; a swap during the batch doesn't affect it"""
+        loaded = loaded or self.current
+        if loaded is None:
+            raise RuntimeError(f"No {self.model_type} model loaded")
+        loaded.in_flight += 1
+        try:
+            yield loaded.session
+        finally:
+            loaded.in_flight -= 1
+            if loaded.retired and loaded.in_flight == 0:
+                loaded.drained.set()
+                loaded.session = None  # release the ONNX session
+
+    async def predict(self, X: np.ndarray) -> np.ndarray:
+        with self.acquire() as session:
+            result = await asyncio.to_thread(session.predict, X)
+        self._maybe_shadow(X, result)
+        return result
+
+    async def predict_rows(self, rows: List[Dict], feature_names: List[str]) -> np.ndarray:
+        with self.acquire() as session:
+            result = await asyncio.to_thread(session.predict_rows, rows, feature_names)
+        if self.shadow is not None:
+            X = np.zeros((len(rows), len(feature_names)), dtype=np.float32)
+            fill_features(X, rows, feature_names)
+            self._maybe_shadow(X, result)
+        return result
+
+    def _maybe_shadow(self, X: np.ndarray, result: np.ndarray):
+        shadow = self.shadow
+        if shadow is None:
+            return
+        if asyncio.get_running_loop().time() > self._shadow_until:
+            self.shadow = None
+            self._retire(shadow)
+            print(f"[ModelRegistry] {self.model_type}: shadow window over, released {shadow.version.key} "
+                  f"({self.shadow_summary()})")
+            return
+        if random.random() < self.shadow_fraction:
+            task = asyncio.create_task(self._score_shadow(shadow, X, result))
+            self._shadow_tasks.add(task)
+            task.add_done_callback(self._shadow_tasks.discard)
+
+    async def close(self):
+        """Cancel shadow scoring still in flight"""
+        for task in list(self._shadow_tasks):
+            task.cancel()
+        await asyncio.gather(*self._shadow_tasks, return_exceptions=True)
+
+    async def _score_shadow(self, shadow: _Loaded, X: np.ndarray, result: np.ndarray):
+        try:
+            with self.acquire(shadow) as session:
+                if session is None:
+                    return
+                old = await asyncio.to_thread(session.predict, X)
+        except Exception as e:
+            print(f"[ModelRegistry] Shadow scoring failed: {e}")
+            return
+        diff = np.abs(np.asarray(result, dtype=np.float64) - old)
+        stats = self.shadow_stats
+        stats["batches"] += 1
+        stats["rows"] += len(X)
+        stats["abs_diff_sum"] += float(diff.sum())
+        stats["max_abs_diff"] = max(stats["max_abs_diff"], float(diff.max(initial=0.0)))
+
+    def shadow_summary(self) -> str:
+        stats = self.shadow_stats
+        mean = stats["abs_diff_sum"] / stats["rows"] if stats["rows"] else 0.0
+        return f"{stats['batches']} shadow batches, mean |new-old| {mean:.5f}, max {stats['max_abs_diff']:.5f}"
+
+
+class ModelRegistryWatcher:
+    """Polls ``model_metadata`` and hot-swaps each model type when its active row changes"""
+
+    def __init__(
+        self,
+        db_pool,
+        models: Dict[str, HotSwapModel],
+        redis_client=None,
+        poll_interval: float = MODEL_POLL_INTERVAL_SEC,
+        model_dir: str = MODEL_DIR,
+    ):
+        self.db_pool = db_pool
+        self.models = models
+        self.redis = redis_client
+        self.poll_interval = poll_interval
+        self.model_dir = model_dir
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the active models (blocking), then watch for changes in the background"""
+        await self.check()
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for model in self.models.values():
+            await model.close()
+
+    async def check(self) -> List[str]:
+        """One poll; returns the model types that were swapped"""
+        swapped = []
+        async with self.db_pool.acquire() as conn:
+            rows = {t: await conn.fetchrow(ACTIVE_MODEL_QUERY, t) for t in self.models}
+        for model_type, row in rows.items():
+            model = self.models[model_type]
+            if row is not None and await model.swap_to(ModelVersion.from_row(row, self.model_dir)):
+                swapped.append(model_type)
+            # Every poll, not just on a swap, so the TTL only lapses once this agent stops
+            if model.version is not None:
+                await self._publish_active(model.version)
+        return swapped
+
+    async def _publish_active(self, version: ModelVersion):
+        """Mirror the serving model into `model:{type}:active` (docs/REDIS_DATA_STRUCTURES.md)"""
+        if self.redis is None:
+            return
+        key = f"model:{version.model_type}:active"
+        await self.redis.hset(key, mapping={
+            "model_name": version.model_name,
+            "model_version": version.model_version,
+            "model_type": version.model_type,
+            "deployment_date": version.deployment_date.isoformat() if version.deployment_date else "",
+            "is_active": "true",
+        })
+        await self.redis.expire(key, ACTIVE_MODEL_TTL_SEC)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"[ModelRegistry] Poll failed: {e}")
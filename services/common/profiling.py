@@ -0,0 +1,234 @@
+"""
+On-demand profiling and event-loop health for long-running services
+
+Two ways to see where a live service spends its time, without restarting it:
+
+- ``sample`` mode: a background thread samples the event-loop thread's stack
+  (default 200 Hz) and writes collapsed stacks (``.folded``), which
+  flamegraph.pl, speedscope or inferno turn into a flamegraph. Overhead is a
+  few percent, so it is safe in production.
+- ``cprofile`` mode: cProfile on the loop thread, written as ``.pstats``
+  (``python -m pstats file``, snakeviz). Exact call counts, but slows the
+  service down noticeably while it runs.
+
+Trigger a capture with ``kill -USR1 <pid>`` (``PROFILE_SECONDS``, ``PROFILE_MODE``)
+or, on the API gateway, ``GET /debug/profile?seconds=10&mode=sample`` when
+``PROFILING_ENABLED=true``. Artifacts go to ``PROFILE_DIR``.
+
+``LoopMonitor`` runs all the time. A task that wakes every ``interval``
+seconds measures how late it was woken (event-loop lag), and a watchdog thread
+captures the loop thread's stack whenever the loop has not run for
+``block_threshold`` seconds. This works like asyncio debug mode's
+slow-callback warning, but it names the blocking code and costs one wakeup per
+interval instead of timing every callback.
+"""
+
+import asyncio
+import cProfile
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from services.common.metrics import LocalHistogram
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")
+PROFILE_SAMPLE_HZ = float(os.getenv("PROFILE_SAMPLE_HZ", "200"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "250"))
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def thread_stack(thread_id: int, limit: int = 64) -> List[str]:
+    """Frames of another thread, outermost first (empty if the thread is gone)"""
+    frame = sys._current_frames().get(thread_id)
+    stack = []
+    while frame is not None and len(stack) < limit:
+        stack.append(format_frame(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread into collapsed-stack counts"""
+
+    def __init__(self, thread_id: Optional[int] = None, hz: float = PROFILE_SAMPLE_HZ):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = 1.0 / hz
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stack = thread_stack(self.thread_id)
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def write_folded(self, path: Path):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Runs one capture at a time against the event-loop thread"""
+
+    def __init__(self, service: str, out_dir: str = PROFILE_DIR):
+        self.service = service
+        self.out_dir = Path(out_dir)
+        self.loop_thread = threading.get_ident()
+        self.running = False
+
+    async def capture(self, seconds: float = PROFILE_SECONDS, mode: str = PROFILE_MODE) -> Path:
+        """Profile for `seconds` and return the artifact path"""
+        if mode not in (MODE_SAMPLE, MODE_CPROFILE):
+            raise ValueError(f"Unknown profile mode {mode!r}")
+        if self.running:
+            raise RuntimeError("A profile capture is already running")
+
+        self.running = True
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        try:
+            if mode == MODE_SAMPLE:
+                sampler = StackSampler(self.loop_thread)
+                sampler.start()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    sampler.stop()
+                path = self.out_dir / f"{self.service}-{stamp}.folded"
+                sampler.write_folded(path)
+            else:
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    profile.disable()
+                path = self.out_dir / f"{self.service}-{stamp}.pstats"
+                profile.dump_stats(path)
+        finally:
+            self.running = False
+
+        print(f"[Profiler] Wrote {mode} profile ({seconds:g}s) to {path}")
+        return path
+
+    async def _capture_logged(self, seconds: float, mode: str):
+        try:
+            await self.capture(seconds, mode)
+        except Exception as e:
+            print(f"[Profiler] Capture failed: {e}")
+
+    def install_signal_handler(self, loop: asyncio.AbstractEventLoop, sig=signal.SIGUSR1):
+        """`kill -USR1 <pid>` starts a PROFILE_SECONDS capture in PROFILE_MODE"""
+        loop.add_signal_handler(
+            sig, lambda: asyncio.ensure_future(self._capture_logged(PROFILE_SECONDS, PROFILE_MODE))
+        )
+
+
+class LoopMonitor:
+    """Event-loop lag sampling plus a watchdog that reports what blocked the loop"""
+
+    def __init__(self, interval: float = 0.05, block_threshold: float = LOOP_BLOCK_THRESHOLD_MS / 1000):
+        self.interval = interval
+        self.block_threshold = block_threshold
+
+        self.lag = LocalHistogram(LAG_BUCKETS)
+        self.max_lag = 0.0
+        self.blocks: Deque[Tuple[float, List[str]]] = deque(maxlen=20)  # (seconds blocked, stack)
+        self.stats = {"blocked": 0}
+
+        self._heartbeat = time.monotonic()
+        self._blocked_stack: Optional[List[str]] = None
+        self._loop_thread = threading.get_ident()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.tick(now - expected, now)
+
+    def tick(self, lag: float, now: float):
+        lag = max(lag, 0.0)
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        self._heartbeat = now
+
+        stack, self._blocked_stack = self._blocked_stack, None
+        if lag >= self.block_threshold:
+            self.stats["blocked"] += 1
+            self.blocks.append((lag, stack or []))
+            where = " <- ".join(reversed(stack[-6:])) if stack else "unknown (not caught by watchdog)"
+            print(f"[LoopMonitor] Event loop blocked for {lag * 1000:.0f} ms in: {where}")
+
+    def _watch(self):
+        while not self._stop.wait(self.block_threshold / 2):
+            stalled = time.monotonic() - self._heartbeat
+            if stalled > self.interval + self.block_threshold and self._blocked_stack is None:
+                # The loop thread is still inside the blocking call: this is the culprit
+                self._blocked_stack = thread_stack(self._loop_thread)
+
+    def summary(self) -> str:
+        count = self.lag.count
+        mean = self.lag.sum / count * 1000 if count else 0.0
+        return f"loop lag avg {mean:.1f} ms, max {self.max_lag * 1000:.0f} ms, {self.stats['blocked']} blocks"
+
+
+def install_profiling(service: str, metrics=None) -> Tuple[Profiler, LoopMonitor]:
+    """Signal-triggered profiler and loop monitor for the running loop; call from the service's start"""
+    loop = asyncio.get_running_loop()
+    profiler = Profiler(service)
+    try:
+        profiler.install_signal_handler(loop)
+    except (NotImplementedError, RuntimeError, ValueError):
+        print("[Profiler] Signal handlers unavailable; use the HTTP endpoint where there is one")
+    monitor = LoopMonitor()
+    monitor.start()
+    if metrics is not None:
+        metrics.histogram("event_loop_lag_seconds", "How late the event loop ran a timer", monitor.lag)
+        metrics.counters("event_loop", "Event loop stalls over LOOP_BLOCK_THRESHOLD_MS", monitor.stats)
+    return profiler, monitor
@@ -0,0 +1,116 @@
+"""
+Qdrant collection tuning profiles
+
+A profile fixes how a collection stores vectors (float32 in RAM, or int8
+scalar-quantized in RAM with originals on disk) and how its HNSW graph is
+built and searched. Collections are created with ``collection_kwargs()`` and
+searched with ``search_params()`` of the same profile; the active profile
+comes from ``QDRANT_PROFILE``.
+
+Compare profiles with scripts/benchmark_qdrant_profiles.py before switching.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from qdrant_client import models
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    name: str
+    description: str
+    m: int = 16
+    ef_construct: int = 100
+    hnsw_ef: int = 128  # Search-time candidate list size
+    quantized: bool = False  # int8 scalar quantization, kept in RAM
+    vectors_on_disk: bool = False  # Originals on disk (mmap); used only for rescoring when quantized
+    hnsw_on_disk: bool = False
+    oversampling: float = 2.0  # Quantized candidates fetched per result before rescoring
+
+    def collection_kwargs(self, size: int, distance: models.Distance = models.Distance.COSINE) -> Dict:
+        """Arguments for create_collection()"""
+        kwargs = {
+            "vectors_config": models.VectorParams(size=size, distance=distance, on_disk=self.vectors_on_disk),
+            "hnsw_config": models.HnswConfigDiff(
+                m=self.m, ef_construct=self.ef_construct, on_disk=self.hnsw_on_disk
+            ),
+        }
+        if self.quantized:
+            kwargs["quantization_config"] = models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,  # Clip outliers so the int8 range isn't wasted on them
+                    always_ram=True,
+                )
+            )
+        return kwargs
+
+    def search_params(self) -> models.SearchParams:
+        """Search parameters matching how the collection was built"""
+        quantization = None
+        if self.quantized:
+            quantization = models.QuantizationSearchParams(rescore=True, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+    def estimated_ram_bytes(self, points: int, size: int) -> int:
+        """Rough resident memory for vectors plus graph (payload excluded)"""
+        ram = 0
+        if not self.vectors_on_disk:
+            ram += points * size * 4
+        if self.quantized:
+            ram += points * size  # 1 byte per dimension
+        if not self.hnsw_on_disk:
+            ram += points * self.m * 2 * 4  # Layer-0 links dominate
+        return ram
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    profile.name: profile
+    for profile in [
+        CollectionProfile(
+            name="exact",
+            description="float32 vectors and graph in RAM (Qdrant defaults)",
+        ),
+        CollectionProfile(
+            name="balanced",
+            description="int8 quantized in RAM, float32 originals on disk for rescoring",
+            ef_construct=128,
+            hnsw_ef=64,
+            quantized=True,
+            vectors_on_disk=True,
+        ),
+        CollectionProfile(
+            name="compact",
+            description="int8 quantized in RAM, originals and graph on disk, sparser graph",
+            m=8,
+            ef_construct=64,
+            hnsw_ef=48,
+            quantized=True,
+            vectors_on_disk=True,
+            hnsw_on_disk=True,
+            oversampling=3.0,
+        ),
+        CollectionProfile(
+            name="high_recall",
+            description="int8 quantized with float32 in RAM, denser graph and wider search",
+            m=32,
+            ef_construct=256,
+            hnsw_ef=256,
+            quantized=True,
+            oversampling=1.5,
+        ),
+    ]
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: Optional[str] = None) -> CollectionProfile:
+    """Look up a profile by name (defaults to QDRANT_PROFILE)"""
+    name = name or os.getenv("QDRANT_PROFILE", DEFAULT_PROFILE)
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown Qdrant profile '{name}' (available: {', '.join(PROFILES)})") from None
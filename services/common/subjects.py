@@ -0,0 +1,41 @@
+"""
+NATS subject names shared by producers and consumers
+
+See docs/NATS_MESSAGE_SCHEMAS.md for the message envelopes.
+"""
+
+MARKET_QUOTE = "data.market.quote"
+FEATURES_READY = "data.features.ready"
+
+# Earnings calendar changes (keep routing agents' in-memory calendars current)
+EARNINGS_REPORTED = "data.earnings.reported"
+EARNINGS_CALENDAR = "data.earnings.calendar"
+
+PREDICT_NORMAL = "job.predict.normal"
+PREDICT_EARNINGS = "job.predict.earnings"
+EXPLAIN_GENERATE = "job.explain.generate"
+EXPLANATION_READY = "thought.explanation.ready"
+
+# Incremental explanation text for one job (thought.explanation.stream.exp_ab12...).
+# Two tokens below `thought.*`, so the EXPLANATIONS stream does not persist them.
+EXPLANATION_STREAM = "thought.explanation.stream"
+
+MODEL_ACCURACY = "metrics.model.accuracy"
+
+# Request/reply service subjects
+EMBED_REQUEST = "svc.embed"
+
+# Prediction updates are published per symbol (event.prediction.updated.AAPL) so
+# that consumers only receive the tickers they subscribe to.
+PREDICTION_UPDATED = "event.prediction.updated"
+PREDICTION_UPDATED_ALL = f"{PREDICTION_UPDATED}.*"
+
+
+def prediction_updated_subject(ticker: str) -> str:
+    """Per-symbol subject for `event.prediction.updated`"""
+    return f"{PREDICTION_UPDATED}.{ticker.upper()}"
+
+
+def explanation_stream_subject(job_id: str) -> str:
+    """Per-job subject carrying streamed explanation chunks"""
+    return f"{EXPLANATION_STREAM}.{job_id}"
@@ -0,0 +1,167 @@
+"""
+Pipeline tracing: per-stage timestamps carried with each tick
+
+A tick's trace travels with it through the pipeline as a compact
+``stage=epoch_seconds`` list, either in NATS headers (single-symbol messages)
+or in the ``trace`` field of each entry of a batched job message:
+
+    Correlation-Id: 550e8400-e29b-41d4-a716-446655440002
+    Pipeline-Trace: ingest=1766140200.123456,features=1766140200.141020,route=...
+
+Each service marks its own stage when it hands the tick on and records the
+time since the previous mark in ``pipeline_stage_latency_seconds{stage}``;
+the last stage (WebSocket push) also records
+``pipeline_end_to_end_latency_seconds``. Samples beyond the section 9.1
+latency budget (01_Architecture_Overview.md) are counted in
+``pipeline_budget_exceeded_total{stage}``.
+
+Stages (in order): ingest, features, route, inference, redis, websocket.
+Timestamps come from each host's wall clock, so cross-host deltas include
+clock skew; keep the hosts NTP-synced.
+"""
+
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import REGISTRY
+
+from services.common.metrics import LocalHistogram, ServiceMetrics, percentile
+
+CORRELATION_HEADER = "Correlation-Id"
+TRACE_HEADER = "Pipeline-Trace"
+
+STAGE_INGEST = "ingest"
+STAGE_FEATURES = "features"
+STAGE_ROUTE = "route"
+STAGE_INFERENCE = "inference"
+STAGE_REDIS = "redis"
+STAGE_WEBSOCKET = "websocket"
+PIPELINE_STAGES = (STAGE_INGEST, STAGE_FEATURES, STAGE_ROUTE, STAGE_INFERENCE, STAGE_REDIS, STAGE_WEBSOCKET)
+END_TO_END = "end_to_end"
+
+# Section 9.1 targets, in seconds since the previous stage
+LATENCY_BUDGET = {
+    STAGE_FEATURES: 0.05,
+    STAGE_INFERENCE: 0.1,
+    STAGE_WEBSOCKET: 0.5,
+    END_TO_END: 10.0,
+}
+
+
+class Trace:
+    """Correlation id plus the (stage, timestamp) marks of one tick"""
+
+    __slots__ = ("correlation_id", "marks")
+
+    def __init__(self, correlation_id: Optional[str] = None, marks: Optional[List[Tuple[str, float]]] = None):
+        self.correlation_id = correlation_id or str(uuid.uuid4())
+        self.marks = marks or []
+
+    @classmethod
+    def start(cls, stage: str = STAGE_INGEST, correlation_id: Optional[str] = None, at: Optional[float] = None) -> "Trace":
+        return cls(correlation_id).mark(stage, at)
+
+    def mark(self, stage: str, at: Optional[float] = None) -> "Trace":
+        self.marks.append((stage, time.time() if at is None else at))
+        return self
+
+    def encode(self) -> str:
+        return ",".join(f"{stage}={at:.6f}" for stage, at in self.marks)
+
+    @classmethod
+    def decode(cls, value: Optional[str], correlation_id: Optional[str] = None) -> "Trace":
+        """Parse an encoded trace; malformed marks are skipped"""
+        marks = []
+        for part in (value or "").split(","):
+            stage, _, at = part.partition("=")
+            try:
+                marks.append((stage, float(at)))
+            except ValueError:
+                continue
+        return cls(correlation_id, marks)
+
+    def headers(self) -> Dict[str, str]:
+        return {CORRELATION_HEADER: self.correlation_id, TRACE_HEADER: self.encode()}
+
+    @classmethod
+    def from_headers(cls, headers: Optional[Dict[str, str]], correlation_id: Optional[str] = None) -> Optional["Trace"]:
+        """Trace carried in NATS headers (None if the message is not traced)"""
+        if not headers or TRACE_HEADER not in headers:
+            return None
+        return cls.decode(headers[TRACE_HEADER], headers.get(CORRELATION_HEADER) or correlation_id)
+
+    @property
+    def elapsed(self) -> float:
+        return self.marks[-1][1] - self.marks[0][1] if self.marks else 0.0
+
+    def last_stage_latency(self) -> Optional[float]:
+        if len(self.marks) < 2:
+            return None
+        return self.marks[-1][1] - self.marks[-2][1]
+
+
+class TraceRecorder:
+    """Aggregates stage and end-to-end latencies into local histograms, exported at scrape time"""
+
+    def __init__(self, registry=REGISTRY, budget: Optional[Dict[str, float]] = None, samples: int = 10000):
+        self.budget = {**LATENCY_BUDGET, **(budget or {})}
+        self.stage_latency: Dict[str, LocalHistogram] = {}
+        self.end_to_end_latency = LocalHistogram()
+        self.budget_exceeded: Dict[str, int] = {}
+
+        self.metrics = ServiceMetrics(registry)
+        self.metrics.histogram("pipeline_stage_latency_seconds", "Time from the previous pipeline stage to this one",
+                               self.stage_latency, label="stage")
+        self.metrics.histogram("pipeline_end_to_end_latency_seconds", "Time from ingestion to WebSocket push",
+                               self.end_to_end_latency)
+        self.metrics.counters("pipeline_budget_exceeded", "Samples over the section 9.1 latency budget",
+                              self.budget_exceeded, labels=("stage",))
+        # Recent samples for the services' periodic log lines
+        self.samples: Dict[str, deque] = {}
+        self._max_samples = samples
+
+    def record(self, trace: Trace, final: bool = False):
+        """Record the latest stage of `trace` (and the whole trace if `final`)"""
+        latency = trace.last_stage_latency()
+        if latency is not None:
+            self._observe(trace.marks[-1][0], latency)
+        if final and len(trace.marks) > 1:
+            self._observe(END_TO_END, trace.elapsed)
+
+    def _observe(self, stage: str, latency: float):
+        if stage == END_TO_END:
+            self.end_to_end_latency.observe(latency)
+        else:
+            histogram = self.stage_latency.get(stage)
+            if histogram is None:
+                histogram = self.stage_latency[stage] = LocalHistogram()
+            histogram.observe(latency)
+        budget = self.budget.get(stage)
+        if budget is not None and latency > budget:
+            self.budget_exceeded[stage] = self.budget_exceeded.get(stage, 0) + 1
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = deque(maxlen=self._max_samples)
+        samples.append(latency)
+
+    def percentile(self, stage: str, q: float) -> float:
+        return percentile(self.samples.get(stage, ()), q)
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{stage} p50 {self.percentile(stage, 0.5) * 1000:.1f} ms / p99 {self.percentile(stage, 0.99) * 1000:.1f} ms"
+            for stage in (*PIPELINE_STAGES, END_TO_END) if stage in self.samples
+        )
+
+
+_recorder: Optional[TraceRecorder] = None
+
+
+def get_recorder() -> TraceRecorder:
+    """Process-wide recorder on the default Prometheus registry"""
+    global _recorder
+    if _recorder is None:
+        _recorder = TraceRecorder()
+    return _recorder
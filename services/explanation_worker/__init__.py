@@ -0,0 +1,3 @@
+"""
+Explanation worker (LLM + RAG)
+"""
@@ -0,0 +1,381 @@
+"""
+Embedding service for RAG
+
+Loads the sentence-transformers model once per host and serves embeddings to
+every explanation worker and the document indexer:
+
+- concurrent `embed()` calls are coalesced into dynamic batches (up to
+  ``max_batch_size`` texts or ``max_wait_ms``, whichever comes first)
+- vectors are cached by content hash in a per-process LRU and in Redis
+  (``emb:{model}:{sha256}``), so identical queries and chunks are embedded once
+- workers reach the service over NATS request/reply (``svc.embed``) instead of
+  loading their own copy of the model
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import msgpack
+import numpy as np
+import redis.asyncio as redis
+from nats.aio.client import Client as NATS
+
+from services.common.metrics import (
+    METRICS_PORTS,
+    SIZE_BUCKETS,
+    LocalHistogram,
+    ServiceMetrics,
+    start_metrics_server,
+)
+from services.common.profiling import install_profiling
+from services.common.subjects import EMBED_REQUEST
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+EMBEDDING_CACHE_TTL = 30 * 24 * 3600  # 30 days
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+def content_hash(model_name: str, text: str) -> str:
+    """Cache key for a text under a given model"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode()).hexdigest()
+
+
+def load_sentence_transformer(model_name: str = EMBEDDING_MODEL, device: str = "cpu") -> Tuple[Encoder, int]:
+    """Load the model once and return (encoder, dimension)"""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device=device)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        vectors = model.encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+    return encode, model.get_sentence_embedding_dimension()
+
+
+async def check_collection_dimension(qdrant, collection: str, dim: int = EMBEDDING_DIM):
+    """Fail fast if a Qdrant collection was created for a different model"""
+    info = await qdrant.get_collection(collection)
+    vectors = info.config.params.vectors
+    sizes = {name: v.size for name, v in vectors.items()} if isinstance(vectors, dict) else {"": vectors.size}
+
+    for name, size in sizes.items():
+        if size != dim:
+            label = f"{collection}:{name}" if name else collection
+            raise ValueError(
+                f"Collection '{label}' stores {size}-dim vectors but the embedding "
+                f"model produces {dim} dims; recreate it with scripts/setup_qdrant.py"
+            )
+
+
+class LRUCache:
+    """Bounded in-process cache (most recently used entries survive)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisEmbeddingCache:
+    """Persistent vector cache shared by every process (float32 bytes per key)"""
+
+    def __init__(self, client: redis.Redis, model_name: str = EMBEDDING_MODEL, ttl: int = EMBEDDING_CACHE_TTL):
+        self.client = client
+        self.prefix = f"emb:{model_name}:"
+        self.ttl = ttl
+
+    async def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        values = await self.client.mget([self.prefix + k for k in keys])
+        return [np.frombuffer(v, dtype=np.float32) if v else None for v in values]
+
+    async def set_many(self, items: Dict[str, np.ndarray]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, vector in items.items():
+            pipe.setex(self.prefix + key, self.ttl, vector.tobytes())
+        await pipe.execute()
+
+
+class EmbeddingService:
+    """Batched, cached embedding of texts with a single shared model instance"""
+
+    def __init__(
+        self,
+        encoder: Encoder,
+        dim: int = EMBEDDING_DIM,
+        model_name: str = EMBEDDING_MODEL,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        lru_size: int = 50_000,
+        persistent: Optional[RedisEmbeddingCache] = None,
+    ):
+        self.encoder = encoder
+        self.dim = dim
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.lru = LRUCache(lru_size)
+        self.persistent = persistent
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # The model is not thread-safe and already uses all cores; one thread is enough
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {"lru_hits": 0, "persistent_hits": 0, "computed": 0, "batches": 0}
+        self.batch_sizes = LocalHistogram(SIZE_BUCKETS)
+        self.batch_seconds = LocalHistogram()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self, warmup: bool = True):
+        if warmup:
+            # First call pays for lazy initialisation; keep it off the request path
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.encoder, ["warm-up"]
+            )
+        self._task = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        return (await self.embed([text]))[0]
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, returning a (len(texts), dim) float32 matrix"""
+        keys = [content_hash(self.model_name, t) for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        for key in keys:
+            vector = self.lru.get(key)
+            if vector is not None:
+                vectors[key] = vector
+                self.stats["lru_hits"] += 1
+
+        missing = list(dict.fromkeys(k for k in keys if k not in vectors))
+        if missing and self.persistent:
+            for key, vector in zip(missing, await self.persistent.get_many(missing)):
+                if vector is not None:
+                    vectors[key] = vector
+                    self.lru.put(key, vector)
+                    self.stats["persistent_hits"] += 1
+
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in pending:
+                continue
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                self._queue.put_nowait((key, text, future))
+            pending[key] = future
+
+        if pending:
+            # Shielded: the futures are shared with other callers, and a cancelled caller must not cancel theirs
+            results = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()))
+            vectors.update(zip(pending.keys(), results))
+
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.vstack([vectors[k] for k in keys])
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for _, text, _ in batch]
+
+            started = loop.time()
+            try:
+                matrix = await loop.run_in_executor(self._executor, self.encoder, texts)
+            except Exception as e:
+                for key, _, future in batch:
+                    self._inflight.pop(key, None)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["computed"] += len(batch)
+            self.batch_sizes.observe(len(batch))
+            self.batch_seconds.observe(loop.time() - started)
+
+            computed = {}
+            for (key, _, future), vector in zip(batch, matrix):
+                self.lru.put(key, vector)
+                computed[key] = vector
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_result(vector)
+
+            if self.persistent:
+                try:
+                    await self.persistent.set_many(computed)
+                except Exception as e:
+                    print(f"[EmbeddingService] Failed to persist embeddings: {e}")
+
+
+def pack_vectors(matrix: np.ndarray) -> bytes:
+    return msgpack.packb({"dim": int(matrix.shape[1]), "vectors": matrix.astype(np.float32).tobytes()})
+
+
+def unpack_vectors(data: bytes) -> np.ndarray:
+    reply = msgpack.unpackb(data, raw=False)
+    if "error" in reply:
+        raise RuntimeError(f"Embedding service error: {reply['error']}")
+    return np.frombuffer(reply["vectors"], dtype=np.float32).reshape(-1, reply["dim"])
+
+
+class EmbeddingServer:
+    """Serves an EmbeddingService on NATS (queue group, so replicas share load)"""
+
+    def __init__(self, service: EmbeddingService, nats: NATS, subject: str = EMBED_REQUEST):
+        self.service = service
+        self.nats = nats
+        self.subject = subject
+        self.subscription = None
+        # Requests in progress, referenced so they are not garbage-collected before replying
+        self._requests: Set[asyncio.Task] = set()
+
+    async def start(self):
+        self.subscription = await self.nats.subscribe(self.subject, queue="embedding", cb=self.on_request)
+
+    async def stop(self):
+        if self.subscription is not None:
+            await self.subscription.unsubscribe()
+            self.subscription = None
+        for task in list(self._requests):
+            task.cancel()
+        await asyncio.gather(*self._requests, return_exceptions=True)
+
+    async def on_request(self, msg):
+        # NATS runs a subscription's callbacks one at a time; hand off so requests batch
+        task = asyncio.create_task(self._handle(msg))
+        self._requests.add(task)
+        task.add_done_callback(self._requests.discard)
+
+    async def _handle(self, msg):
+        try:
+            texts = msgpack.unpackb(msg.data, raw=False)["texts"]
+            reply = pack_vectors(await self.service.embed(texts))
+        except Exception as e:
+            reply = msgpack.packb({"error": str(e)})
+        await msg.respond(reply)
+
+
+class EmbeddingClient:
+    """Worker-side handle to the shared embedding service"""
+
+    def __init__(self, nats: NATS, subject: str = EMBED_REQUEST, timeout: float = 10.0):
+        self.nats = nats
+        self.subject = subject
+        self.timeout = timeout
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        msg = await self.nats.request(
+            self.subject, msgpack.packb({"texts": texts}), timeout=self.timeout
+        )
+        return unpack_vectors(msg.data)
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        return (await self.embed([text]))[0]
+
+
+async def main():
+    """Run the embedding service: load the model once, then serve over NATS"""
+    encoder, dim = load_sentence_transformer(EMBEDDING_MODEL)
+    if dim != EMBEDDING_DIM:
+        raise ValueError(f"{EMBEDDING_MODEL} produces {dim} dims, expected {EMBEDDING_DIM}")
+
+    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    service = EmbeddingService(
+        encoder,
+        dim=dim,
+        max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH", "64")),
+        max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+        persistent=RedisEmbeddingCache(redis_client),
+    )
+    await service.start()
+
+    nats = NATS()
+    await nats.connect(servers=[os.getenv("NATS_URL", "nats://localhost:4222")])
+    server = EmbeddingServer(service, nats)
+    await server.start()
+
+    metrics = ServiceMetrics()
+    metrics.counters("embedding_requests", "Texts served from cache or computed, and batches run", service.stats)
+    metrics.gauge("embedding_queue_depth", "Texts waiting for a model batch", lambda: service.queue_depth)
+    metrics.histogram("embedding_batch_size", "Texts per model batch", service.batch_sizes)
+    metrics.histogram("embedding_batch_seconds", "Model time per batch", service.batch_seconds)
+    metrics.watch_subscription(server.subscription, EMBED_REQUEST)
+    install_profiling("embedding_service", metrics)
+    start_metrics_server(METRICS_PORTS["embedding_service"])
+
+    print(f"[EmbeddingService] Serving {EMBEDDING_MODEL} ({dim} dims) on '{EMBED_REQUEST}'")
+
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(f"[EmbeddingService] Stats: {service.stats}")
+    finally:
+        await server.stop()
+        await service.stop()
+        await nats.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Explanation reuse cache
+
+An explanation only needs regenerating when the prediction state it describes
+has materially changed. The state is reduced to a fingerprint of
+
+    (symbol, model_type, bucketed predicted return / sigma,
+     bucketed key features, bucketed earnings surprise, RAG document IDs)
+
+and explanations are stored under ``explanation:fp:{symbol}:{digest}`` for up
+to ``max_staleness`` seconds. Lookups also try the neighbouring return buckets,
+so a prediction sitting on a bucket edge doesn't flip between hit and miss.
+"""
+
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+FINGERPRINT_KEY = "explanation:fp:{symbol}:{digest}"
+HIT_COUNTER = "stats:cache:explanation:hits"
+MISS_COUNTER = "stats:cache:explanation:misses"
+
+DEFAULT_MAX_STALENESS = int(os.getenv("EXPLANATION_MAX_STALENESS_S", "900"))
+
+# Bucket widths: moves smaller than these don't change what the explanation says
+RETURN_STEP = 0.0025  # 25 bp of predicted 1-day return
+SIGMA_STEP = 0.005
+FEATURE_STEPS = {
+    b"return_20d": 0.01,
+    b"volatility_20d": 0.05,
+    b"rsi_14": 5.0,
+    b"market_beta": 0.1,
+}
+EARNINGS_STEPS = {
+    b"eps_surprise_pct": 0.02,
+    b"revenue_surprise_pct": 0.02,
+    b"fundamental_score": 10.0,
+}
+
+
+def bucket(value, step: float) -> Optional[int]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value):
+        return None
+    return math.floor(value / step)
+
+
+def prediction_state(
+    symbol: str,
+    prediction: Dict,
+    features: Dict,
+    earnings: Optional[Dict] = None,
+    doc_ids: Iterable[str] = (),
+) -> Dict:
+    """Quantized view of everything the explanation prompt is built from"""
+    return {
+        "symbol": symbol,
+        "model_type": prediction.get("model_type"),
+        "return": bucket(prediction.get("predicted_return_1d"), RETURN_STEP),
+        "sigma": bucket(prediction.get("uncertainty_sigma"), SIGMA_STEP),
+        "features": {k.decode(): bucket(features.get(k), step) for k, step in FEATURE_STEPS.items()},
+        "earnings": {k.decode(): bucket(earnings.get(k), step) for k, step in EARNINGS_STEPS.items()} if earnings else None,
+        "docs": sorted(doc_ids),
+    }
+
+
+def fingerprint(state: Dict) -> str:
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def candidate_fingerprints(state: Dict) -> List[str]:
+    """Exact fingerprint first, then the same state one return bucket either side"""
+    candidates = [fingerprint(state)]
+    if state["return"] is not None:
+        for offset in (-1, 1):
+            candidates.append(fingerprint({**state, "return": state["return"] + offset}))
+    return candidates
+
+
+class ExplanationCache:
+    """Reuses explanations across near-identical prediction states"""
+
+    def __init__(self, client: redis.Redis, max_staleness: int = DEFAULT_MAX_STALENESS):
+        self.client = client
+        self.max_staleness = max_staleness
+        self.stats = {"hits": 0, "misses": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    async def lookup(self, state: Dict) -> Tuple[Optional[Dict], str]:
+        """Return (cached explanation or None, fingerprint to store under on a miss)"""
+        symbol = state["symbol"]
+        digests = candidate_fingerprints(state)
+        values = await self.client.mget([FINGERPRINT_KEY.format(symbol=symbol, digest=d) for d in digests])
+
+        for value in values:
+            if value is None:
+                continue
+            entry = json.loads(value)
+            if time.time() - entry["created_at"] <= self.max_staleness:
+                await self._count(hit=True)
+                return entry["explanation"], digests[0]
+
+        await self._count(hit=False)
+        return None, digests[0]
+
+    async def store(self, symbol: str, digest: str, explanation: Dict):
+        entry = {"created_at": time.time(), "explanation": explanation}
+        await self.client.setex(
+            FINGERPRINT_KEY.format(symbol=symbol, digest=digest), self.max_staleness, json.dumps(entry)
+        )
+
+    async def _count(self, hit: bool):
+        self.stats["hits" if hit else "misses"] += 1
+        try:
+            # Shared counters so the hit rate covers every worker replica
+            await self.client.incr(HIT_COUNTER if hit else MISS_COUNTER)
+        except Exception as e:
+            print(f"[ExplanationCache] Failed to update hit counter: {e}")
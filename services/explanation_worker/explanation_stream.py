@@ -0,0 +1,79 @@
+"""
+Publishes a job's explanation text incrementally on its per-job NATS subject
+
+Ollama emits roughly one message per token; fragments are coalesced so a
+reader sees the first text immediately and then at most one message per
+``flush_interval``.
+
+Messages (JSON):
+    {"job_id", "seq", "type": "token", "text"}
+    {"job_id", "seq", "type": "done", "explanation"}
+    {"job_id", "seq", "type": "error", "error"}
+"""
+
+import json
+import time
+from typing import Dict, List
+
+from services.common.subjects import explanation_stream_subject
+
+
+class ExplanationStream:
+    def __init__(self, nats, job_id: str, flush_interval: float = 0.05):
+        self.nats = nats
+        self.job_id = job_id
+        self.subject = explanation_stream_subject(job_id)
+        self.flush_interval = flush_interval
+        self.seq = 0
+
+        self._buffer = ""
+        self._last_flush = 0.0
+        self.first_token_at = None
+
+    async def push(self, text: str):
+        self._buffer += text
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        if now - self._last_flush >= self.flush_interval:
+            await self._flush(now)
+
+    async def finish(self, explanation: Dict):
+        await self._flush(time.monotonic())
+        await self._publish({"type": "done", "explanation": explanation})
+
+    async def fail(self, error: str):
+        await self._flush(time.monotonic())
+        await self._publish({"type": "error", "error": error})
+
+    async def _flush(self, now: float):
+        if self._buffer:
+            text, self._buffer = self._buffer, ""
+            await self._publish({"type": "token", "text": text})
+        self._last_flush = now
+
+    async def _publish(self, message: Dict):
+        self.seq += 1
+        await self.nats.publish(self.subject, json.dumps({"job_id": self.job_id, "seq": self.seq, **message}).encode())
+
+
+class StreamFanout:
+    """Feeds one generation's text to every stream attached to it
+
+    Used when several jobs are deduplicated onto a single LLM call; a stream
+    that attaches mid-generation first receives the text produced so far.
+    """
+
+    def __init__(self):
+        self.streams: List[ExplanationStream] = []
+        self.text = ""
+
+    async def attach(self, stream: ExplanationStream):
+        self.streams.append(stream)
+        if self.text:
+            await stream.push(self.text)
+
+    async def push(self, text: str):
+        self.text += text
+        for stream in list(self.streams):
+            await stream.push(text)
@@ -0,0 +1,430 @@
+"""
+Feature 1: Explanation Worker
+Generates prediction explanations with an Ollama-served LLM and RAG context
+"""
+
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import redis.asyncio as redis
+from nats.aio.client import Client as NATS
+from qdrant_client import AsyncQdrantClient
+
+from services.common.metrics import METRICS_PORTS, ServiceMetrics, start_metrics_server
+from services.common.profiling import install_profiling
+from services.common.qdrant_profiles import get_profile
+from services.common.subjects import EXPLAIN_GENERATE, EXPLANATION_READY
+from services.explanation_worker.embedding_service import (
+    EMBEDDING_DIM,
+    EmbeddingClient,
+    check_collection_dimension,
+)
+from services.explanation_worker.explanation_cache import ExplanationCache, prediction_state
+from services.explanation_worker.explanation_stream import ExplanationStream, StreamFanout
+from services.explanation_worker.ingestion import ensure_payload_indexes
+from services.explanation_worker.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMScheduler,
+    LoadShedError,
+)
+from services.explanation_worker.ollama_client import OllamaClient, estimate_tokens
+from services.explanation_worker.retrieval import KnowledgeRetriever, RetrievalCache, format_context
+from services.routing_agent.router import EARNINGS
+
+NATS_URL = os.getenv("NATS_URL", "nats://localhost:4222")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+
+KNOWLEDGE_COLLECTION = "financial_knowledge"
+
+# RAG context gets whatever fits in num_ctx after instructions, data and the answer,
+# up to this many tokens
+RAG_MAX_TOKENS = int(os.getenv("RAG_MAX_TOKENS", "512"))
+PROMPT_SAFETY_TOKENS = 64
+
+# Static instructions: sent as the system prompt so every request shares this prefix
+# and Ollama reuses its evaluated KV cache instead of re-processing it
+EXPLANATION_SYSTEM = """You are a financial analyst providing clear, data-driven explanations of stock price predictions.
+
+INSTRUCTIONS:
+1. Explain the prediction in 2-3 clear sentences (focus on key drivers)
+2. Highlight the uncertainty and what it means for investors
+3. If earnings day: emphasize fundamental quality and historical patterns
+4. Cite specific data points from the context
+5. Be honest about limitations (e.g., "data is 60 seconds old")
+6. Keep language professional but accessible
+"""
+
+# Per-request data
+EXPLANATION_PROMPT = """PREDICTION DATA:
+- Symbol: {symbol}
+- Predicted Return (1-day): {predicted_return:.2%}
+- Predicted Price: ${predicted_price:.2f}
+- Confidence: {confidence:.0%}
+- Uncertainty (σ): {sigma:.2%}
+- 90% Confidence Interval: [{p10:.2%}, {p90:.2%}]
+- Model Type: {model_type}
+
+TECHNICAL CONTEXT:
+{technical_summary}
+
+{earnings_summary}
+
+RETRIEVED CONTEXT (from knowledge base):
+{rag_context}
+
+EXPLANATION:
+"""
+
+
+class ExplanationWorker:
+    """
+    Worker that generates explanations using an Ollama-served LLM
+    """
+
+    def __init__(self):
+        self.nats = NATS()
+        self.redis = redis.from_url(REDIS_URL)
+        self.qdrant = AsyncQdrantClient(url=QDRANT_URL)
+
+        # Embeddings come from the shared embedding service (model loaded once per host)
+        self.embeddings = EmbeddingClient(self.nats)
+        self.retriever = KnowledgeRetriever(
+            self.qdrant,
+            self.embeddings,
+            cache=RetrievalCache(self.redis),
+            collection=KNOWLEDGE_COLLECTION,
+            max_age_days=int(os.getenv("RAG_MAX_AGE_DAYS", "365")),
+            search_params=get_profile().search_params(),
+        )
+        # Near-identical prediction states reuse an earlier explanation instead of calling the LLM
+        self.explanation_cache = ExplanationCache(self.redis)
+
+        self.llm_options = {
+            "temperature": 0.3,  # Low temperature for factual explanations
+            "num_predict": 512,  # Max tokens
+            "top_p": 0.9,
+        }
+        self.ollama = OllamaClient(options=self.llm_options, system=EXPLANATION_SYSTEM)
+
+        # Caps concurrent generations at Ollama's parallel slots; dedups per symbol/depth
+        self.scheduler = LLMScheduler()
+        self._fanouts: Dict[str, StreamFanout] = {}
+        # Jobs in progress, referenced so they are not garbage-collected mid-generation
+        self._jobs: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start the explanation worker"""
+        await self.nats.connect(servers=[NATS_URL])
+        await check_collection_dimension(self.qdrant, KNOWLEDGE_COLLECTION, EMBEDDING_DIM)
+        await ensure_payload_indexes(self.qdrant, KNOWLEDGE_COLLECTION)
+        await self.scheduler.start()
+
+        # Load the model and evaluate the shared prefix before the first user request
+        try:
+            await self.ollama.preload()
+            print(f"[ExplanationWorker] Model preloaded ({self.ollama.last_timings['total_ms']:.0f} ms)")
+        except Exception as e:
+            print(f"[ExplanationWorker] Model preload failed, first request will load it: {e}")
+
+        # Subscribe to explanation jobs (queue group: each job goes to one worker replica)
+        subscription = await self.nats.subscribe(EXPLAIN_GENERATE, queue="explanation-workers", cb=self.on_job)
+        self.start_metrics(subscription)
+
+        print("[ExplanationWorker] Started and ready to generate explanations")
+
+        # Keep running
+        while True:
+            await asyncio.sleep(60)
+            stats = self.explanation_cache.stats
+            print(f"[ExplanationWorker] Explanation cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({self.explanation_cache.hit_rate:.0%} hit rate)")
+            print(f"[ExplanationWorker] LLM scheduler: {self.scheduler.summary()}")
+            print(f"[ExplanationWorker] {self.loop_monitor.summary()}")
+            llm = self.ollama.stats
+            if llm["calls"]:
+                print(f"[ExplanationWorker] Ollama: {llm['calls']} calls, avg prompt eval "
+                      f"{llm['prompt_eval_ms'] / llm['calls']:.0f} ms ({llm['prompt_tokens'] / llm['calls']:.0f} tok), "
+                      f"avg generation {llm['eval_ms'] / llm['calls']:.0f} ms ({llm['eval_tokens'] / llm['calls']:.0f} tok)")
+
+    def start_metrics(self, subscription):
+        metrics = ServiceMetrics()
+        metrics.counters("explanation_cache_lookups", "Explanation cache hits and misses", self.explanation_cache.stats,
+                         labels=("result",))
+        metrics.counters("rag_retrievals", "Knowledge searches and context cache hits", self.retriever.stats)
+        metrics.counters("llm_requests", "LLM requests per scheduler lane", self.scheduler.stats, labels=("lane", "event"))
+        metrics.counters("ollama_usage", "Ollama calls, tokens and milliseconds", self.ollama.stats, labels=("field",))
+        metrics.gauge("llm_queue_depth", "Generations waiting for an Ollama slot", lambda: self.scheduler.queued)
+        metrics.gauge("llm_running", "Generations in progress", lambda: self.scheduler.running)
+        metrics.histogram("llm_queue_wait_seconds", "Time from submit to an Ollama slot",
+                          self.scheduler.wait_histograms, label="lane")
+        metrics.histogram("llm_generation_seconds", "Time per LLM generation", self.scheduler.generation_seconds)
+        metrics.watch_subscription(subscription, EXPLAIN_GENERATE)
+        self.profiler, self.loop_monitor = install_profiling("explanation_worker", metrics)
+        start_metrics_server(METRICS_PORTS["explanation_worker"])
+
+    async def on_job(self, msg):
+        """Handle explanation generation job"""
+        # NATS runs a subscription's callbacks one at a time; the scheduler decides concurrency
+        task = asyncio.create_task(self._handle_job(msg))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def stop(self):
+        """Cancel jobs in progress and close connections"""
+        for task in list(self._jobs):
+            task.cancel()
+        await asyncio.gather(*self._jobs, return_exceptions=True)
+        await self.scheduler.stop()
+        if self.nats.is_connected:
+            await self.nats.close()
+        await self.ollama.close()
+        await self.redis.close()
+
+    async def _handle_job(self, msg):
+        stream = None
+        key = None
+        try:
+            data = json.loads(msg.data.decode())
+            symbol = data["symbol"]
+            depth = data.get("depth", "medium")
+            priority = BACKGROUND if data.get("priority") == "background" else INTERACTIVE
+
+            # Identical requests share one generation; each job still gets its own text stream
+            key = f"{symbol}:{depth}"
+            fanout = self._fanouts.setdefault(key, StreamFanout())
+            if data.get("job_id"):
+                stream = ExplanationStream(self.nats, data["job_id"])
+                await fanout.attach(stream)
+
+            explanation = await self.scheduler.submit(
+                key, lambda: self._run_job(symbol, depth, key, fanout), priority=priority
+            )
+            if stream:
+                await stream.finish(explanation)
+
+        except LoadShedError as e:
+            print(f"[ExplanationWorker] Shed explanation job: {e}")
+            if stream:
+                await stream.fail("Explanation service busy, retry shortly")
+        except Exception as e:
+            print(f"[ExplanationWorker] Error generating explanation: {e}")
+            if stream:
+                await stream.fail(str(e))
+        finally:
+            # Jobs that never ran (shed, failed to parse) leave no fanout behind
+            if key and not self.scheduler.is_active(key):
+                self._fanouts.pop(key, None)
+
+    async def _run_job(self, symbol: str, depth: str, key: str, fanout: StreamFanout) -> Dict:
+        """One generation under the scheduler; result is shared by deduplicated jobs"""
+        try:
+            print(f"[ExplanationWorker] Generating explanation for {symbol} (depth: {depth})")
+
+            # Generate explanation
+            explanation = await self.generate_explanation(symbol, depth, on_token=fanout.push)
+        finally:
+            if self._fanouts.get(key) is fanout:
+                del self._fanouts[key]
+
+        # Store in Redis cache
+        await self.redis.setex(
+            f"explanation:{symbol}",
+            300,  # 5 minute TTL
+            json.dumps(explanation)
+        )
+
+        # Publish completion event
+        await self.nats.publish(
+            EXPLANATION_READY,
+            json.dumps({
+                "symbol": symbol,
+                "status": "completed"
+            }).encode()
+        )
+
+        print(f"[ExplanationWorker] Completed explanation for {symbol}")
+        return explanation
+
+    async def generate_explanation(
+        self,
+        symbol: str,
+        depth: str = "medium",
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict:
+        """Generate explanation using LLM + RAG (text fragments go to `on_token` as they arrive)"""
+
+        # 1. Fetch prediction data from Redis
+        prediction_data = await self.redis.get(f"pred:{symbol}")
+        if not prediction_data:
+            raise ValueError(f"No prediction found for {symbol}")
+
+        prediction = json.loads(prediction_data)
+
+        # 2. Fetch features for technical summary
+        features = await self.redis.hgetall(f"features:{symbol}")
+        technical_summary = self._format_technical_summary(features)
+
+        # 3. Fetch earnings context if earnings day
+        earnings_summary = ""
+        earnings_data = None
+        if prediction.get("model_type") == EARNINGS:
+            earnings_data = await self.redis.hgetall(f"earnings_analysis:{symbol}")
+            earnings_summary = self._format_earnings_summary(earnings_data)
+
+        # 4. Retrieve relevant context from RAG (filtered by symbol, cached per symbol)
+        rag_docs = await self.retriever.retrieve(symbol)
+
+        # 5. Reuse an explanation of a near-identical prediction state if one is fresh enough
+        state = prediction_state(symbol, prediction, features, earnings_data, [d["id"] for d in rag_docs])
+        cached, digest = await self.explanation_cache.lookup(state)
+        if cached is not None:
+            return cached
+
+        # 6. Build prompt, giving RAG context the tokens left over in the context window
+        prompt_fields = dict(
+            symbol=symbol,
+            predicted_return=prediction["predicted_return_1d"],
+            predicted_price=prediction["predicted_price"],
+            confidence=0.7,  # Placeholder - compute from sigma
+            sigma=prediction.get("uncertainty_sigma", 0.02),
+            p10=prediction.get("p10", -0.01),
+            p90=prediction.get("p90", 0.03),
+            model_type=prediction["model_type"],
+            technical_summary=technical_summary,
+            earnings_summary=earnings_summary,
+        )
+        rag_budget = self._rag_token_budget(EXPLANATION_PROMPT.format(rag_context="", **prompt_fields))
+        prompt = EXPLANATION_PROMPT.format(
+            rag_context=format_context(rag_docs, max_tokens=rag_budget), **prompt_fields
+        )
+
+        # 7. Generate explanation with Ollama
+        explanation_text = await self._generate(prompt, on_token)
+
+        # 8. Extract key drivers (simple parsing)
+        key_drivers = self._extract_key_drivers(features, prediction)
+
+        # 9. Return structured explanation
+        explanation = {
+            "text": explanation_text.strip(),
+            "confidence": 0.7,
+            "key_drivers": key_drivers,
+            "uncertainties": [
+                f"Market volatility elevated ({float(features.get(b'volatility_20d', 0)):.1%} annualized)",
+                "Data freshness: ~60 seconds old"
+            ],
+            "sources": [
+                {
+                    "title": doc["source"],
+                    "excerpt": doc["text"][:200] + "...",
+                    "relevance": doc["score"]
+                }
+                for doc in rag_docs[:2]
+            ],
+            "generated_at": prediction["predicted_at"]
+        }
+        await self.explanation_cache.store(symbol, digest, explanation)
+        return explanation
+
+    def _rag_token_budget(self, prompt_without_context: str) -> int:
+        """Tokens available for retrieved context within num_ctx"""
+        used = (
+            estimate_tokens(EXPLANATION_SYSTEM)
+            + estimate_tokens(prompt_without_context)
+            + self.llm_options["num_predict"]
+            + PROMPT_SAFETY_TOKENS
+        )
+        return max(0, min(RAG_MAX_TOKENS, self.ollama.num_ctx - used))
+
+    async def _generate(self, prompt: str, on_token: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        if on_token is None:
+            text = await self.ollama.generate(prompt)
+        else:
+            parts = []
+            async for piece in self.ollama.stream(prompt):
+                parts.append(piece)
+                await on_token(piece)
+            text = "".join(parts)
+
+        t = self.ollama.last_timings
+        print(f"[ExplanationWorker] LLM timings: prompt eval {t['prompt_tokens']} tok / {t['prompt_eval_ms']:.0f} ms, "
+              f"generation {t['eval_tokens']} tok / {t['eval_ms']:.0f} ms, load {t['load_ms']:.0f} ms")
+        return text
+
+    def _format_technical_summary(self, features: Dict) -> str:
+        """Format technical features into readable summary"""
+        if not features:
+            return "Technical data unavailable."
+
+        return_20d = float(features.get(b"return_20d", 0))
+        volatility_20d = float(features.get(b"volatility_20d", 0))
+        rsi_14 = float(features.get(b"rsi_14", 50))
+        market_beta = float(features.get(b"market_beta", 1))
+
+        return f"""
+- 20-day Momentum: {return_20d:+.2%}
+- Volatility (20d): {volatility_20d:.1%} annualized
+- RSI (14-day): {rsi_14:.1f} {'(Overbought)' if rsi_14 > 70 else '(Oversold)' if rsi_14 < 30 else '(Neutral)'}
+- Market Beta: {market_beta:.2f}
+"""
+
+    def _format_earnings_summary(self, earnings: Dict) -> str:
+        """Format earnings data into readable summary"""
+        if not earnings:
+            return ""
+
+        eps_surprise = float(earnings.get(b"eps_surprise_pct", 0))
+        revenue_surprise = float(earnings.get(b"revenue_surprise_pct", 0))
+        fundamental_score = float(earnings.get(b"fundamental_score", 50))
+        return_12m_avg = float(earnings.get(b"return_12m_avg", 0))
+
+        return f"""
+EARNINGS CONTEXT (Today is Earnings Day):
+- EPS Surprise: {eps_surprise:+.1%}
+- Revenue Surprise: {revenue_surprise:+.1%}
+- Fundamental Quality Score: {fundamental_score:.0f}/100
+- Historical 12M Avg Return (post-earnings): {return_12m_avg:+.1%}
+"""
+
+    def _extract_key_drivers(self, features: Dict, prediction: Dict) -> List[str]:
+        """Extract key drivers from features"""
+        drivers = []
+
+        if not features:
+            return ["Insufficient data for detailed analysis"]
+
+        # Momentum driver
+        return_20d = float(features.get(b"return_20d", 0))
+        if abs(return_20d) > 0.05:
+            direction = "Strong upward" if return_20d > 0 else "Downward"
+            drivers.append(f"{direction} momentum ({return_20d:+.2%} over 20 days)")
+
+        # Volatility driver
+        volatility = float(features.get(b"volatility_20d", 0))
+        if volatility > 0.4:
+            drivers.append(f"High volatility environment ({volatility:.1%})")
+
+        # RSI driver
+        rsi = float(features.get(b"rsi_14", 50))
+        if rsi > 70:
+            drivers.append(f"Overbought conditions (RSI: {rsi:.0f})")
+        elif rsi < 30:
+            drivers.append(f"Oversold conditions (RSI: {rsi:.0f})")
+
+        return drivers if drivers else ["Normal market conditions"]
+
+
+async def main():
+    worker = ExplanationWorker()
+    try:
+        await worker.start()
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,298 @@
+"""
+Bulk document ingestion into Qdrant
+
+Streams filings, transcripts and playbooks from a directory, chunks them,
+embeds chunks in batches and upserts them to the knowledge collection:
+
+- point IDs are derived from (source path, chunk index), so re-running the
+  indexer overwrites points in place instead of duplicating them
+- every chunk carries the document's content hash; unchanged documents are
+  skipped without re-embedding, and chunks left over from a longer previous
+  version are deleted
+- HNSW indexing is deferred (``indexing_threshold=0``) for the duration of a
+  bulk load and restored afterwards, so segments are indexed once at the end
+- cached retrieval contexts (retrieval.RetrievalCache) are invalidated for
+  every symbol whose documents changed
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, models
+
+DOCUMENT_SUFFIXES = {".txt", ".md", ".json"}
+POINT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "riskee/financial_knowledge")
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces; ~180 words stays under that
+DEFAULT_CHUNK_WORDS = 180
+DEFAULT_OVERLAP_WORDS = 30
+
+TICKER_PREFIX = re.compile(r"^([A-Z][A-Z.]{0,5})[_-]")
+DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# Qdrant's default; restored when the collection had no explicit threshold
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+# Filtered retrieval (see retrieval.py) relies on these being indexed.
+# scripts/setup_qdrant.py creates the same indexes from this mapping.
+PAYLOAD_INDEXES = {
+    "ticker": models.PayloadSchemaType.KEYWORD,
+    "source": models.PayloadSchemaType.KEYWORD,
+    "doc_type": models.PayloadSchemaType.KEYWORD,
+    "date": models.PayloadSchemaType.DATETIME,
+}
+
+
+@dataclass
+class Document:
+    source: str  # Path relative to the ingestion root; stable across runs
+    text: str
+    metadata: Dict = field(default_factory=dict)
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+
+def point_id(source: str, chunk_index: int) -> str:
+    """Deterministic point ID for a chunk of a document"""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{source}#{chunk_index}"))
+
+
+def chunk_text(text: str, chunk_words: int = DEFAULT_CHUNK_WORDS, overlap: int = DEFAULT_OVERLAP_WORDS) -> List[str]:
+    """Split text into overlapping word windows"""
+    if overlap >= chunk_words:
+        raise ValueError("overlap must be smaller than chunk_words")
+
+    words = text.split()
+    if not words:
+        return []
+
+    step = chunk_words - overlap
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def load_document(path: Path, root: Path) -> Optional[Document]:
+    """Read one file; metadata comes from its location and name (or JSON fields)"""
+    source = path.relative_to(root).as_posix()
+    parts = path.relative_to(root).parts
+    metadata = {"doc_type": parts[0] if len(parts) > 1 else "general"}
+
+    match = TICKER_PREFIX.match(path.name)
+    if match:
+        metadata["ticker"] = match.group(1)
+    match = DATE_IN_NAME.search(path.name)
+    if match:
+        metadata["date"] = match.group(1)
+
+    if path.suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        text = data.pop("text", "")
+        metadata.update({k: v for k, v in data.items() if isinstance(v, (str, int, float, bool))})
+    else:
+        text = path.read_text(encoding="utf-8", errors="replace")
+
+    if not text.strip():
+        return None
+    return Document(source=source, text=text, metadata=metadata)
+
+
+def iter_documents(root: Path) -> Iterator[Document]:
+    """Stream documents from a directory tree (files are read lazily)"""
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix in DOCUMENT_SUFFIXES:
+            document = load_document(path, root)
+            if document:
+                yield document
+
+
+async def ensure_payload_indexes(qdrant: AsyncQdrantClient, collection: str):
+    """Create the payload indexes used by filtered search (idempotent)"""
+    for name, schema in PAYLOAD_INDEXES.items():
+        await qdrant.create_payload_index(collection, name, field_schema=schema)
+
+
+async def defer_indexing(qdrant: AsyncQdrantClient, collection: str) -> Optional[int]:
+    """Disable HNSW indexing during bulk load; returns the previous threshold"""
+    info = await qdrant.get_collection(collection)
+    previous = info.config.optimizer_config.indexing_threshold
+    await qdrant.update_collection(
+        collection, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+    )
+    return previous
+
+
+async def restore_indexing(qdrant: AsyncQdrantClient, collection: str, threshold: Optional[int]):
+    await qdrant.update_collection(
+        collection,
+        optimizers_config=models.OptimizersConfigDiff(
+            indexing_threshold=DEFAULT_INDEXING_THRESHOLD if threshold is None else threshold
+        ),
+    )
+
+
+class DocumentIndexer:
+    """Chunk, embed and upsert documents with bounded upsert parallelism"""
+
+    def __init__(
+        self,
+        qdrant: AsyncQdrantClient,
+        embedder,
+        collection: str = "financial_knowledge",
+        chunk_words: int = DEFAULT_CHUNK_WORDS,
+        overlap: int = DEFAULT_OVERLAP_WORDS,
+        doc_batch_size: int = 32,
+        upsert_batch_size: int = 256,
+        parallel: int = 4,
+        retrieval_cache=None,
+    ):
+        self.qdrant = qdrant
+        self.embedder = embedder  # Anything with `async embed(texts) -> np.ndarray`
+        self.collection = collection
+        self.chunk_words = chunk_words
+        self.overlap = overlap
+        self.doc_batch_size = doc_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.retrieval_cache = retrieval_cache
+        self.changed_tickers: set = set()
+        self.changed_general = False
+
+        self._upsert_slots = asyncio.Semaphore(parallel)
+        self._upserts: set = set()
+        self.stats = {"documents": 0, "skipped": 0, "chunks": 0, "deleted_chunks": 0}
+
+    async def ensure_payload_indexes(self):
+        await ensure_payload_indexes(self.qdrant, self.collection)
+
+    async def index(self, documents: Iterable[Document], defer: bool = True) -> Dict:
+        """Index a stream of documents; returns counters plus throughput"""
+        start = time.perf_counter()
+        threshold = await defer_indexing(self.qdrant, self.collection) if defer else None
+
+        try:
+            async for batch in self._batches(documents):
+                await self._index_batch(batch)
+            await self._drain()
+            if self.retrieval_cache and (self.changed_tickers or self.changed_general):
+                await self.retrieval_cache.invalidate(self.changed_tickers, everything=self.changed_general)
+        finally:
+            if defer:
+                await restore_indexing(self.qdrant, self.collection, threshold)
+
+        elapsed = time.perf_counter() - start
+        return {
+            **self.stats,
+            "elapsed_s": elapsed,
+            "docs_per_s": self.stats["documents"] / elapsed if elapsed else 0.0,
+            "chunks_per_s": self.stats["chunks"] / elapsed if elapsed else 0.0,
+        }
+
+    async def _batches(self, documents: Iterable[Document]) -> AsyncIterator[List[Document]]:
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= self.doc_batch_size:
+                yield batch
+                batch = []
+                await asyncio.sleep(0)  # Let in-flight upserts progress
+        if batch:
+            yield batch
+
+    async def _existing(self, documents: List[Document]) -> Dict[str, Dict]:
+        """Payload of the first chunk of each document already in the collection"""
+        points = await self.qdrant.retrieve(
+            self.collection,
+            ids=[point_id(d.source, 0) for d in documents],
+            with_payload=["source", "doc_hash", "chunk_count"],
+            with_vectors=False,
+        )
+        return {p.payload["source"]: p.payload for p in points}
+
+    async def _index_batch(self, documents: List[Document]):
+        existing = await self._existing(documents)
+
+        chunks: List[str] = []
+        payloads: List[Dict] = []
+        for document in documents:
+            doc_hash = document.content_hash
+            previous = existing.get(document.source)
+            if previous and previous.get("doc_hash") == doc_hash:
+                self.stats["skipped"] += 1
+                continue
+
+            texts = chunk_text(document.text, self.chunk_words, self.overlap)
+            for i, text in enumerate(texts):
+                chunks.append(text)
+                payloads.append({
+                    **document.metadata,
+                    "text": text,
+                    "source": document.source,
+                    "chunk_index": i,
+                    "chunk_count": len(texts),
+                    "doc_hash": doc_hash,
+                })
+
+            if previous and previous.get("chunk_count", 0) > len(texts):
+                await self._delete_stale(document.source, len(texts), previous["chunk_count"])
+            self.stats["documents"] += 1
+            if document.metadata.get("ticker"):
+                self.changed_tickers.add(document.metadata["ticker"])
+            else:
+                self.changed_general = True
+
+        if not chunks:
+            return
+
+        vectors = np.asarray(await self.embedder.embed(chunks), dtype=np.float32)
+        points = [
+            models.PointStruct(
+                id=point_id(payload["source"], payload["chunk_index"]),
+                vector=vector.tolist(),
+                payload=payload,
+            )
+            for payload, vector in zip(payloads, vectors)
+        ]
+        self.stats["chunks"] += len(points)
+
+        for i in range(0, len(points), self.upsert_batch_size):
+            await self._submit(points[i:i + self.upsert_batch_size])
+
+    async def _delete_stale(self, source: str, keep: int, previous_count: int):
+        await self.qdrant.delete(
+            self.collection,
+            points_selector=models.PointIdsList(
+                points=[point_id(source, i) for i in range(keep, previous_count)]
+            ),
+        )
+        self.stats["deleted_chunks"] += previous_count - keep
+
+    async def _submit(self, points: List[models.PointStruct]):
+        # Blocks once `parallel` upserts are in flight; embedding of the next batch overlaps them
+        await self._upsert_slots.acquire()
+        task = asyncio.create_task(self._upsert(points))
+        self._upserts.add(task)
+        task.add_done_callback(self._upserts.discard)
+
+    async def _upsert(self, points: List[models.PointStruct]):
+        try:
+            await self.qdrant.upsert(self.collection, points=points, wait=True)
+        finally:
+            self._upsert_slots.release()
+
+    async def _drain(self):
+        if self._upserts:
+            # Surface the first failed upsert instead of reporting a partial load as success
+            await asyncio.gather(*list(self._upserts))
@@ -0,0 +1,185 @@
+"""
+LLM request scheduler
+
+Sits in front of Ollama so the worker never has more generations in flight
+than the server has parallel slots (``OLLAMA_NUM_PARALLEL``):
+
+- two priority lanes: interactive requests (a user is waiting) are always
+  dequeued before background pre-generation
+- single-flight per key: identical requests (same symbol and depth) share one
+  generation; a waiting interactive request promotes a queued background one
+- load shedding: a request whose queue wait would exceed its lane deadline is
+  rejected up front with ``LoadShedError`` (or dropped when it reaches the head
+  of the queue too late) instead of piling onto an overloaded server
+- per-lane counters in ``stats`` and queue-wait samples in ``queue_times``
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from services.common.metrics import LocalHistogram, percentile
+
+INTERACTIVE = 0
+BACKGROUND = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+DEFAULT_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))
+DEFAULT_DEADLINES = {
+    INTERACTIVE: float(os.getenv("LLM_INTERACTIVE_DEADLINE_S", "20")),
+    BACKGROUND: float(os.getenv("LLM_BACKGROUND_DEADLINE_S", "120")),
+}
+
+
+class LoadShedError(RuntimeError):
+    """The request was rejected because the LLM queue is too long"""
+
+
+@dataclass
+class _Job:
+    key: str
+    priority: int
+    factory: Callable[[], Awaitable]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started: bool = False
+
+
+class LLMScheduler:
+    """Priority queue + worker pool limiting concurrent LLM generations"""
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        deadlines: Optional[Dict[int, float]] = None,
+        initial_service_time: float = 8.0,
+    ):
+        self.concurrency = concurrency
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._jobs: Dict[str, _Job] = {}  # Queued or running, by key
+        self._workers = []
+        self._running = 0
+
+        # Moving average of generation time, used to predict queue wait at admission
+        self._service_time = initial_service_time
+
+        self.stats = {
+            lane: {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "shed": 0}
+            for lane in LANE_NAMES.values()
+        }
+        self.queue_times = {lane: deque(maxlen=1000) for lane in LANE_NAMES.values()}
+        self.wait_histograms = {lane: LocalHistogram() for lane in LANE_NAMES.values()}
+        self.generation_seconds = LocalHistogram()
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.started)
+
+    def is_active(self, key: str) -> bool:
+        """Whether a request for `key` is queued or running"""
+        return key in self._jobs
+
+    def estimated_wait(self, priority: int) -> float:
+        """Expected queue wait for a new request in `priority`'s lane"""
+        if self._running + self.queued < self.concurrency:
+            return 0.0  # A slot is free
+        ahead = sum(1 for job in self._jobs.values() if not job.started and job.priority <= priority)
+        return (ahead + 1) * self._service_time / self.concurrency
+
+    async def submit(self, key: str, factory: Callable[[], Awaitable], priority: int = INTERACTIVE):
+        """Run `factory()` under the concurrency limit, sharing the result with identical requests"""
+        lane = LANE_NAMES[priority]
+        self.stats[lane]["submitted"] += 1
+
+        job = self._jobs.get(key)
+        if job:
+            self.stats[lane]["deduplicated"] += 1
+            if priority < job.priority and not job.started:
+                # Re-queue ahead of the background lane; the stale entry is skipped when popped
+                job.priority = priority
+                self._queue.put_nowait((priority, next(self._seq), job))
+            return await asyncio.shield(job.future)
+
+        if self.estimated_wait(priority) > self.deadlines[priority]:
+            self.stats[lane]["shed"] += 1
+            raise LoadShedError(f"LLM queue full: {self.queued} waiting, {lane} deadline {self.deadlines[priority]:.0f}s")
+
+        job = _Job(key, priority, factory, asyncio.get_running_loop().create_future())
+        self._jobs[key] = job
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return await asyncio.shield(job.future)
+
+    async def _worker(self):
+        while True:
+            priority, _, job = await self._queue.get()
+            if job.started or job.future.done() or priority != job.priority:
+                continue  # Promoted duplicate entry
+
+            lane = LANE_NAMES[job.priority]
+            waited = time.monotonic() - job.enqueued_at
+            self.queue_times[lane].append(waited)
+            self.wait_histograms[lane].observe(waited)
+
+            if waited > self.deadlines[job.priority]:
+                self.stats[lane]["shed"] += 1
+                self._finish(job, error=LoadShedError(f"Waited {waited:.1f}s in the {lane} queue"))
+                continue
+
+            job.started = True
+            self._running += 1
+            started = time.monotonic()
+            try:
+                result = await job.factory()
+            except Exception as e:
+                self.stats[lane]["failed"] += 1
+                self._finish(job, error=e)
+            else:
+                self.stats[lane]["completed"] += 1
+                self._finish(job, result=result)
+            finally:
+                self._running -= 1
+                elapsed = time.monotonic() - started
+                self.generation_seconds.observe(elapsed)
+                self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+
+    def _finish(self, job: _Job, result=None, error: Optional[Exception] = None):
+        self._jobs.pop(job.key, None)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+            job.future.exception()  # Retrieved here so unawaited shared futures don't warn
+        else:
+            job.future.set_result(result)
+
+    def queue_time_percentile(self, lane: str, q: float) -> float:
+        return percentile(self.queue_times[lane], q)
+
+    def summary(self) -> str:
+        parts = []
+        for lane, counters in self.stats.items():
+            parts.append(
+                f"{lane}: {counters['completed']} done, {counters['deduplicated']} deduped, "
+                f"{counters['shed']} shed, p95 wait {self.queue_time_percentile(lane, 0.95):.2f}s"
+            )
+        return f"{self._running}/{self.concurrency} running, {self.queued} queued; " + "; ".join(parts)
@@ -0,0 +1,126 @@
+"""
+Ollama HTTP client (blocking and streamed generation)
+
+Requests are shaped so Ollama can reuse work between calls:
+
+- the static instructions go in ``system`` and the per-request data in
+  ``prompt``, so every rendered prompt starts with the same prefix and the
+  server's KV cache for that prefix is reused instead of re-evaluated
+- ``keep_alive`` keeps the model resident between requests, and ``num_ctx`` is
+  fixed (a different context size forces a reload)
+- each call's prompt-eval / generation timings from Ollama's final message are
+  kept in ``last_timings`` and accumulated in ``stats``
+"""
+
+import json
+import math
+import os
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1:8b-instruct-q4_K_M")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "2048"))
+
+CHARS_PER_TOKEN = 4  # English prose with Llama-family tokenizers
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without loading the model's tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def parse_timings(final: Dict) -> Dict:
+    """Millisecond timings and token counts from Ollama's final (done) message"""
+    ns = 1_000_000
+    return {
+        "load_ms": final.get("load_duration", 0) / ns,
+        "prompt_tokens": final.get("prompt_eval_count", 0),
+        "prompt_eval_ms": final.get("prompt_eval_duration", 0) / ns,
+        "eval_tokens": final.get("eval_count", 0),
+        "eval_ms": final.get("eval_duration", 0) / ns,
+        "total_ms": final.get("total_duration", 0) / ns,
+    }
+
+
+class OllamaClient:
+    """Thin wrapper over /api/generate"""
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        model: str = OLLAMA_MODEL,
+        options: Optional[Dict] = None,
+        system: Optional[str] = None,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        num_ctx: int = OLLAMA_NUM_CTX,
+        timeout: float = 60,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.model = model
+        self.options = {"num_ctx": num_ctx, **(options or {})}
+        self.system = system
+        self.keep_alive = keep_alive
+        self.client = client or httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+        self.last_timings: Dict = {}
+        self.stats = {"calls": 0, "prompt_tokens": 0, "prompt_eval_ms": 0.0, "eval_tokens": 0, "eval_ms": 0.0, "load_ms": 0.0}
+
+    @property
+    def num_ctx(self) -> int:
+        return self.options["num_ctx"]
+
+    def _body(self, prompt: str, stream: bool) -> Dict:
+        body = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self.options,
+        }
+        if self.system:
+            body["system"] = self.system
+        return body
+
+    def _record(self, final: Dict):
+        self.last_timings = parse_timings(final)
+        self.stats["calls"] += 1
+        for key in ("prompt_tokens", "prompt_eval_ms", "eval_tokens", "eval_ms", "load_ms"):
+            self.stats[key] += self.last_timings[key]
+
+    async def generate(self, prompt: str) -> str:
+        """Full response in one piece"""
+        response = await self.client.post("/api/generate", json=self._body(prompt, stream=False))
+        response.raise_for_status()
+        data = response.json()
+        self._record(data)
+        return data.get("response", "")
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield response fragments as Ollama produces them (NDJSON, one object per line)"""
+        async with self.client.stream("POST", "/api/generate", json=self._body(prompt, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    self._record(chunk)
+                    return
+
+    async def preload(self):
+        """Load the model and evaluate the shared system prefix once, ahead of real traffic"""
+        body = self._body("Ready?", stream=False)
+        body["options"] = {**self.options, "num_predict": 1}
+        response = await self.client.post("/api/generate", json=body)
+        response.raise_for_status()
+        self.last_timings = parse_timings(response.json())
+
+    async def close(self):
+        await self.client.aclose()
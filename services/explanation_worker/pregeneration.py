@@ -0,0 +1,143 @@
+"""
+Speculative explanation pre-generation for the most requested tickers
+
+Watches `event.prediction.updated.*` and, for tickers in the top N of
+`stats:tickers:most_requested`, immediately queues a background-priority
+explanation job. The worker's scheduler runs those behind interactive
+requests, and the result lands in `explanation:{symbol}` before most users ask.
+
+LLM spend is bounded two ways:
+
+- a token bucket caps pre-generation jobs per minute across all tickers
+- a ticker is not regenerated more often than every ``min_interval`` seconds
+
+Run one instance (it only publishes jobs; the worker replicas do the work):
+
+    python -m services.explanation_worker.pregeneration
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, Set
+
+import redis.asyncio as redis
+from nats.aio.client import Client as NATS
+
+from services.common.demand import DemandTracker
+from services.common.metrics import METRICS_PORTS, ServiceMetrics, start_metrics_server
+from services.common.profiling import install_profiling
+from services.common.subjects import EXPLAIN_GENERATE, PREDICTION_UPDATED_ALL
+
+PREGEN_TOP_N = int(os.getenv("PREGEN_TOP_N", "20"))
+PREGEN_MAX_PER_MINUTE = float(os.getenv("PREGEN_MAX_PER_MINUTE", "6"))
+PREGEN_MIN_INTERVAL_SEC = float(os.getenv("PREGEN_MIN_INTERVAL_SEC", "300"))
+PREGEN_REFRESH_SEC = float(os.getenv("PREGEN_REFRESH_SEC", "60"))
+
+
+class Pregenerator:
+    """Turns prediction updates for high-demand tickers into background explanation jobs"""
+
+    def __init__(
+        self,
+        nats,
+        demand: DemandTracker,
+        top_n: int = PREGEN_TOP_N,
+        max_per_minute: float = PREGEN_MAX_PER_MINUTE,
+        min_interval: float = PREGEN_MIN_INTERVAL_SEC,
+        depth: str = "medium",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.nats = nats
+        self.demand = demand
+        self.top_n = top_n
+        self.min_interval = min_interval
+        self.depth = depth
+        self.clock = clock
+
+        self.targets: Set[str] = set()
+        self.last_submitted: Dict[str, float] = {}
+
+        self.capacity = max_per_minute
+        self.refill_per_sec = max_per_minute / 60
+        self._tokens = max_per_minute
+        self._refilled_at = clock()
+
+        self.stats = {"updates": 0, "submitted": 0, "skipped_recent": 0, "skipped_budget": 0}
+
+    async def refresh_targets(self):
+        self.targets = set(await self.demand.top(self.top_n))
+        # Forget tickers that fell out of the top N
+        for symbol in list(self.last_submitted):
+            if symbol not in self.targets:
+                del self.last_submitted[symbol]
+
+    async def on_prediction_updated(self, msg):
+        try:
+            event = json.loads(msg.data.decode())
+            symbol = event["payload"]["ticker"].upper()
+        except Exception as e:
+            print(f"[Pregenerator] Bad prediction update: {e}")
+            return
+
+        if symbol in self.targets:
+            self.stats["updates"] += 1
+            await self.maybe_generate(symbol)
+
+    async def maybe_generate(self, symbol: str) -> bool:
+        now = self.clock()
+        last = self.last_submitted.get(symbol)
+        if last is not None and now - last < self.min_interval:
+            self.stats["skipped_recent"] += 1
+            return False
+        if not self._take_token(now):
+            self.stats["skipped_budget"] += 1
+            return False
+
+        self.last_submitted[symbol] = now
+        # No job_id: nobody is listening, so the worker skips streaming
+        await self.nats.publish(EXPLAIN_GENERATE, json.dumps({
+            "symbol": symbol,
+            "depth": self.depth,
+            "priority": "background",
+        }).encode())
+        self.stats["submitted"] += 1
+        return True
+
+    def _take_token(self, now: float) -> bool:
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_per_sec)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+async def main():
+    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    nats = NATS()
+    await nats.connect(servers=[os.getenv("NATS_URL", "nats://localhost:4222")])
+
+    pregenerator = Pregenerator(nats, DemandTracker(redis_client))
+    await pregenerator.refresh_targets()
+    subscription = await nats.subscribe(PREDICTION_UPDATED_ALL, cb=pregenerator.on_prediction_updated)
+
+    metrics = ServiceMetrics()
+    metrics.counters("pregeneration_updates", "Prediction updates seen and jobs submitted or skipped", pregenerator.stats)
+    metrics.gauge("pregeneration_targets", "Tickers currently pre-generated", lambda: len(pregenerator.targets))
+    metrics.watch_subscription(subscription, PREDICTION_UPDATED_ALL)
+    install_profiling("pregeneration", metrics)
+    start_metrics_server(METRICS_PORTS["pregeneration"])
+
+    print(f"[Pregenerator] Watching top {pregenerator.top_n} tickers "
+          f"(max {pregenerator.capacity:g} jobs/min, {pregenerator.min_interval:g}s per ticker)")
+
+    while True:
+        await asyncio.sleep(PREGEN_REFRESH_SEC)
+        await pregenerator.refresh_targets()
+        print(f"[Pregenerator] Targets: {len(pregenerator.targets)}, stats: {pregenerator.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
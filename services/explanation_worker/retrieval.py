@@ -0,0 +1,162 @@
+"""
+Filtered RAG retrieval for explanations
+
+Searches ``financial_knowledge`` with the symbol and date restrictions applied
+inside the ANN search (payload indexes on ticker/source/date, see
+ingestion.PAYLOAD_INDEXES): chunks about the symbol plus general documents
+(playbooks, no ticker), recent or undated.
+
+Retrieved contexts are cached per symbol in Redis (``rag:ctx:{symbol}``) until
+the indexer writes new documents for that symbol, so explanation bursts for
+one ticker skip both embedding and vector search.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import redis.asyncio as redis
+from qdrant_client import AsyncQdrantClient, models
+
+from services.explanation_worker.ollama_client import CHARS_PER_TOKEN, estimate_tokens
+
+CONTEXT_KEY = "rag:ctx:{symbol}"
+CONTEXT_TTL = 24 * 3600  # Upper bound; normally invalidated by the indexer
+
+QUERY_TEMPLATE = "{symbol} stock prediction technical analysis earnings fundamental quality"
+
+
+def symbol_filter(symbol: str, max_age_days: Optional[int] = None, now: Optional[datetime] = None) -> models.Filter:
+    """Chunks about `symbol` or about no symbol, optionally no older than max_age_days"""
+    about_symbol = models.Filter(should=[
+        models.FieldCondition(key="ticker", match=models.MatchValue(value=symbol)),
+        models.IsEmptyCondition(is_empty=models.PayloadField(key="ticker")),
+    ])
+    must = [about_symbol]
+
+    if max_age_days is not None:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=max_age_days)
+        must.append(models.Filter(should=[
+            models.FieldCondition(key="date", range=models.DatetimeRange(gte=cutoff)),
+            models.IsEmptyCondition(is_empty=models.PayloadField(key="date")),
+        ]))
+
+    return models.Filter(must=must)
+
+
+def format_context(docs: List[Dict], max_tokens: int = 512) -> str:
+    """Join whole chunks (best first) up to a token budget"""
+    parts = []
+    used = 0
+    for doc in docs:
+        text = doc["text"]
+        tokens = estimate_tokens(text)
+        if used + tokens > max_tokens:
+            if not parts:
+                parts.append(text[:max_tokens * CHARS_PER_TOKEN])
+            break
+        parts.append(text)
+        used += tokens
+    return "\n\n".join(parts)
+
+
+class RetrievalCache:
+    """Per-symbol cache of retrieved chunks, invalidated when documents are indexed"""
+
+    def __init__(self, client: redis.Redis, ttl: int = CONTEXT_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    async def get(self, symbol: str) -> Optional[List[Dict]]:
+        cached = await self.client.get(CONTEXT_KEY.format(symbol=symbol))
+        return json.loads(cached) if cached else None
+
+    async def set(self, symbol: str, docs: List[Dict]):
+        await self.client.setex(CONTEXT_KEY.format(symbol=symbol), self.ttl, json.dumps(docs))
+
+    async def invalidate(self, symbols: Iterable[str] = (), everything: bool = False):
+        """Drop cached contexts; general documents affect every symbol"""
+        if everything:
+            keys = [key async for key in self.client.scan_iter(match=CONTEXT_KEY.format(symbol="*"))]
+        else:
+            keys = [CONTEXT_KEY.format(symbol=s) for s in symbols]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class KnowledgeRetriever:
+    """Embeds a per-symbol query and runs a filtered search, with caching"""
+
+    def __init__(
+        self,
+        qdrant: AsyncQdrantClient,
+        embeddings,
+        cache: Optional[RetrievalCache] = None,
+        collection: str = "financial_knowledge",
+        limit: int = 3,
+        max_age_days: Optional[int] = 365,
+        search_params: Optional[models.SearchParams] = None,
+    ):
+        self.qdrant = qdrant
+        self.embeddings = embeddings  # Anything with `async embed_one(text) -> np.ndarray`
+        self.cache = cache
+        self.collection = collection
+        self.limit = limit
+        self.max_age_days = max_age_days
+        self.search_params = search_params  # From the collection's profile (hnsw_ef, rescoring)
+
+        # Concurrent misses for one symbol share a single search
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"cache_hits": 0, "searches": 0}
+
+    async def retrieve(self, symbol: str) -> List[Dict]:
+        if self.cache:
+            docs = await self.cache.get(symbol)
+            if docs is not None:
+                self.stats["cache_hits"] += 1
+                return docs
+
+        future = self._inflight.get(symbol)
+        if future:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[symbol] = future
+        try:
+            docs = await self._search(symbol)
+            if self.cache:
+                await self.cache.set(symbol, docs)
+            future.set_result(docs)
+            return docs
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the exception; mark it retrieved so an unawaited future doesn't warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(symbol, None)
+
+    async def _search(self, symbol: str) -> List[Dict]:
+        self.stats["searches"] += 1
+        vector = await self.embeddings.embed_one(QUERY_TEMPLATE.format(symbol=symbol))
+        points = (await self.qdrant.query_points(
+            collection_name=self.collection,
+            query=vector.tolist(),
+            query_filter=symbol_filter(symbol, self.max_age_days),
+            search_params=self.search_params,
+            limit=self.limit,
+            with_payload=["text", "source", "ticker", "date", "title"],
+        )).points
+
+        return [
+            {
+                "id": str(p.id),
+                "text": p.payload.get("text", ""),
+                "source": p.payload.get("title") or p.payload.get("source", "Internal Knowledge"),
+                "ticker": p.payload.get("ticker"),
+                "date": p.payload.get("date"),
+                "score": p.score,
+            }
+            for p in points
+        ]
@@ -0,0 +1,97 @@
+"""
+Stub Ollama server for tests and local load experiments
+
+Implements the parts of the Ollama API the worker uses (``/api/generate``,
+streamed or not, and ``/api/tags``) with a canned response and configurable
+latency, and records how many generations ran concurrently.
+
+    python -m services.explanation_worker.stub_ollama   # then OLLAMA_URL=http://localhost:11435
+"""
+
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_RESPONSE = (
+    "The model expects a modest gain driven by positive 20-day momentum and a neutral RSI. "
+    "Uncertainty is elevated, so the 90% interval spans both gains and losses."
+)
+
+
+def create_app(
+    response_text: str = DEFAULT_RESPONSE,
+    first_token_delay: float = 0.2,
+    token_delay: float = 0.02,
+    model: str = "stub",
+) -> FastAPI:
+    app = FastAPI(title="Stub Ollama")
+    app.state.stats = {"requests": 0, "active": 0, "max_active": 0}
+    tokens = [word + " " for word in response_text.split()]
+
+    def timings(body):
+        """Duration fields of Ollama's final message (nanoseconds), scaled from the configured delays"""
+        prompt_tokens = (len(body.get("system", "")) + len(body.get("prompt", ""))) // 4
+        return {
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(first_token_delay * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(token_delay * len(tokens) * 1e9),
+            "total_duration": int((first_token_delay + token_delay * len(tokens)) * 1e9),
+        }
+
+    def begin():
+        stats = app.state.stats
+        stats["requests"] += 1
+        stats["active"] += 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+
+    def end():
+        app.state.stats["active"] -= 1
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": model, "size": 0}]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        begin()
+
+        if not body.get("stream", True):
+            try:
+                await asyncio.sleep(first_token_delay + token_delay * len(tokens))
+                return JSONResponse({
+                    "model": body.get("model", model), "response": "".join(tokens), "done": True, **timings(body),
+                })
+            finally:
+                end()
+
+        async def stream():
+            try:
+                await asyncio.sleep(first_token_delay)
+                for token in tokens:
+                    yield json.dumps({"response": token, "done": False}) + "\n"
+                    await asyncio.sleep(token_delay)
+                yield json.dumps({"response": "", "done": True, **timings(body)}) + "\n"
+            finally:
+                end()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        create_app(
+            first_token_delay=float(os.getenv("STUB_FIRST_TOKEN_DELAY", "0.2")),
+            token_delay=float(os.getenv("STUB_TOKEN_DELAY", "0.02")),
+        ),
+        port=int(os.getenv("STUB_OLLAMA_PORT", "11435")),
+    )
@@ -0,0 +1,3 @@
+"""
+Monitoring (online prediction accuracy evaluation)
+"""
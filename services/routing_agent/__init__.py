@@ -0,0 +1,3 @@
+"""
+Routing agent (normal vs earnings prediction pipelines)
+"""
@@ -0,0 +1,148 @@
+"""
+In-memory earnings calendar for routing decisions
+
+The whole relevant slice of ``earnings_calendar`` (recent and upcoming dates)
+is loaded once into a ticker -> sorted date array index, so routing a batch
+never touches Redis or TimescaleDB. The index is kept current by calendar
+messages on NATS instead of polling:
+
+    data.earnings.calendar  {"payload": {"ticker", "earnings_date", "action": "add" | "remove"}}
+    data.earnings.reported  {"payload": {"ticker", "earnings_date", ...}}   (treated as "add")
+
+A symbol is in its earnings window on the earnings date and on the next
+weekday: the table has no report time, and an after-close report moves the
+price in the following session (``post_market_days``).
+"""
+
+import json
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from services.common.subjects import EARNINGS_CALENDAR, EARNINGS_REPORTED
+
+MARKET_TZ = ZoneInfo("America/New_York")
+
+LOAD_QUERY = """
+    SELECT ticker, array_agg(earnings_date ORDER BY earnings_date) AS dates
+    FROM earnings_calendar
+    WHERE earnings_date >= $1
+    GROUP BY ticker
+"""
+
+
+def market_today() -> date:
+    return datetime.now(MARKET_TZ).date()
+
+
+def previous_weekday(day: date) -> date:
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class EarningsCalendarIndex:
+    """ticker -> sorted earnings dates (as date ordinals in a compact int array)"""
+
+    def __init__(self, history_days: int = 7, post_market_days: int = 1):
+        self.history_days = history_days
+        self.post_market_days = post_market_days
+
+        self._dates: Dict[str, array] = {}
+        self._window_cache: Dict[date, FrozenSet[str]] = {}
+        # Messages received while a bulk load is running, re-applied on top of it
+        self._replay: Optional[List[Tuple[str, str, date]]] = None
+        self.stats = {"loaded_tickers": 0, "loaded_dates": 0, "updates": 0}
+
+    async def load(self, db, today: Optional[date] = None) -> int:
+        """Bulk-load dates from `history_days` ago onwards; returns the number of tickers"""
+        since = (today or market_today()) - timedelta(days=self.history_days)
+        self._replay = []
+        try:
+            rows = await db.fetch(LOAD_QUERY, since)
+            self._dates = {row["ticker"].upper(): array("i", (d.toordinal() for d in row["dates"])) for row in rows}
+            self._window_cache.clear()
+            for action, ticker, earnings_date in self._replay:
+                self._apply(action, ticker, earnings_date)
+        finally:
+            self._replay = None
+        self.stats["loaded_tickers"] = len(self._dates)
+        self.stats["loaded_dates"] = sum(len(d) for d in self._dates.values())
+        return len(self._dates)
+
+    def add(self, ticker: str, earnings_date: date):
+        dates = self._dates.setdefault(ticker.upper(), array("i"))
+        ordinal = earnings_date.toordinal()
+        i = bisect_left(dates, ordinal)
+        if i == len(dates) or dates[i] != ordinal:
+            insort(dates, ordinal)
+            self._window_cache.clear()
+
+    def remove(self, ticker: str, earnings_date: date):
+        dates = self._dates.get(ticker.upper())
+        if not dates:
+            return
+        ordinal = earnings_date.toordinal()
+        i = bisect_left(dates, ordinal)
+        if i < len(dates) and dates[i] == ordinal:
+            del dates[i]
+            self._window_cache.clear()
+
+    def _window_start(self, day: date) -> int:
+        start = day
+        for _ in range(self.post_market_days):
+            start = previous_weekday(start)
+        return start.toordinal()
+
+    def is_earnings_window(self, ticker: str, day: Optional[date] = None) -> bool:
+        dates = self._dates.get(ticker.upper())
+        if not dates:
+            return False
+        day = day or market_today()
+        i = bisect_left(dates, self._window_start(day))
+        return i < len(dates) and dates[i] <= day.toordinal()
+
+    def earnings_symbols(self, day: Optional[date] = None) -> FrozenSet[str]:
+        """Every ticker in its earnings window on `day` (computed once per day and update)"""
+        day = day or market_today()
+        symbols = self._window_cache.get(day)
+        if symbols is None:
+            symbols = frozenset(t for t in self._dates if self.is_earnings_window(t, day))
+            self._window_cache = {day: symbols}
+        return symbols
+
+    def next_earnings(self, ticker: str, day: Optional[date] = None) -> Optional[date]:
+        dates = self._dates.get(ticker.upper())
+        if not dates:
+            return None
+        i = bisect_left(dates, (day or market_today()).toordinal())
+        return date.fromordinal(dates[i]) if i < len(dates) else None
+
+    async def on_calendar_message(self, msg):
+        """Apply a `data.earnings.calendar` / `data.earnings.reported` message"""
+        try:
+            payload = json.loads(msg.data.decode())["payload"]
+            ticker = payload["ticker"]
+            earnings_date = date.fromisoformat(payload["earnings_date"])
+        except Exception as e:
+            print(f"[RoutingAgent] Bad earnings calendar message: {e}")
+            return
+
+        action = "remove" if msg.subject == EARNINGS_CALENDAR and payload.get("action") == "remove" else "add"
+        self._apply(action, ticker, earnings_date)
+        if self._replay is not None:
+            self._replay.append((action, ticker, earnings_date))
+        self.stats["updates"] += 1
+
+    def _apply(self, action: str, ticker: str, earnings_date: date):
+        if action == "remove":
+            self.remove(ticker, earnings_date)
+        else:
+            self.add(ticker, earnings_date)
+
+    async def subscribe(self, nats):
+        await nats.subscribe(EARNINGS_CALENDAR, cb=self.on_calendar_message)
+        await nats.subscribe(EARNINGS_REPORTED, cb=self.on_calendar_message)
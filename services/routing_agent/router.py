@@ -0,0 +1,35 @@
+"""
+Routing decisions: normal-day vs earnings-day prediction pipeline
+
+Backed entirely by the in-memory ``EarningsCalendarIndex``; a batch is split
+with one set lookup per symbol and no network I/O.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from services.routing_agent.calendar_checker import EarningsCalendarIndex, market_today
+
+NORMAL = "normal"
+EARNINGS = "earnings"
+
+
+class SymbolRouter:
+    def __init__(self, calendar: EarningsCalendarIndex):
+        self.calendar = calendar
+        self.stats = {NORMAL: 0, EARNINGS: 0}
+
+    def route_symbol(self, symbol: str, day: Optional[date] = None) -> str:
+        route = EARNINGS if self.calendar.is_earnings_window(symbol, day) else NORMAL
+        self.stats[route] += 1
+        return route
+
+    def route_batch(self, symbols: Iterable[str], day: Optional[date] = None) -> Dict[str, List[str]]:
+        """Split symbols into {"normal": [...], "earnings": [...]}, preserving order"""
+        earnings = self.calendar.earnings_symbols(day or market_today())
+        routes = {NORMAL: [], EARNINGS: []}
+        for symbol in symbols:
+            routes[EARNINGS if symbol.upper() in earnings else NORMAL].append(symbol)
+        self.stats[NORMAL] += len(routes[NORMAL])
+        self.stats[EARNINGS] += len(routes[EARNINGS])
+        return routes
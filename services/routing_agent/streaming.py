@@ -0,0 +1,171 @@
+"""
+Streaming router: `data.features.ready` -> batched `job.predict.{normal,earnings}`
+
+Instead of collecting symbols for a fixed 10-second window, each routed
+symbol is queued for its pipeline and the queue is flushed as soon as it
+holds ``max_batch`` symbols or its oldest entry has waited ``max_delay``
+seconds (default 20 ms), so a lone tick is delayed by at most that much.
+
+Routing is idempotent per symbol-tick (ticker + quote timestamp):
+
+- a tick that is already queued or was already published is dropped
+- a newer tick for a queued symbol replaces the older one; the agent only
+  needs the latest features
+
+Every job entry carries its quote timestamp so downstream stages can measure
+quote -> prediction latency; the router itself records quote -> publish.
+Ticks that arrive with a pipeline trace (services/common/tracing.py) get the
+``route`` stage marked at publish, and the trace travels in the entry.
+
+Job message (one per flush):
+    {"message_id", "correlation_id", "timestamp", "version", "source",
+     "payload": {"symbols": [{"ticker", "quote_time", "correlation_id", "trace"?}, ...]}}
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from services.common.metrics import SIZE_BUCKETS, LocalHistogram, percentile
+from services.common.subjects import PREDICT_EARNINGS, PREDICT_NORMAL
+from services.common.tracing import STAGE_ROUTE, Trace, TraceRecorder, get_recorder
+from services.routing_agent.router import EARNINGS, NORMAL, SymbolRouter
+
+ROUTE_SUBJECTS = {NORMAL: PREDICT_NORMAL, EARNINGS: PREDICT_EARNINGS}
+
+
+def parse_quote_time(value: str) -> Optional[float]:
+    """Epoch seconds of an ISO 8601 quote timestamp (None if missing/invalid)"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+class StreamingRouter:
+    def __init__(
+        self,
+        nats,
+        router: SymbolRouter,
+        max_batch: int = 64,
+        max_delay: float = 0.02,
+        source: str = "routing-agent",
+        clock=time.time,
+        recorder: Optional[TraceRecorder] = None,
+    ):
+        self.nats = nats
+        self.router = router
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.source = source
+        self.clock = clock
+        self.recorder = recorder or get_recorder()
+
+        self.pending: Dict[str, Dict[str, dict]] = {NORMAL: {}, EARNINGS: {}}
+        self.last_tick: Dict[str, str] = {}  # ticker -> latest tick queued or published
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+        self.latencies = deque(maxlen=10000)  # quote -> publish, seconds
+        self.latency_histogram = LocalHistogram()
+        self.batch_sizes = LocalHistogram(SIZE_BUCKETS)
+        self.stats = {"received": 0, "duplicates": 0, "superseded": 0, "published": 0, "messages": 0}
+
+    async def on_features_ready(self, msg):
+        try:
+            event = json.loads(msg.data.decode())
+            payload = event["payload"]
+            ticker = payload["ticker"].upper()
+        except Exception as e:
+            print(f"[RoutingAgent] Bad features message: {e}")
+            return
+        trace = Trace.from_headers(getattr(msg, "headers", None), event.get("correlation_id"))
+        await self.submit(ticker, payload.get("timestamp", ""), event.get("correlation_id"), trace)
+
+    async def submit(
+        self, ticker: str, quote_time: str, correlation_id: Optional[str] = None, trace: Optional[Trace] = None
+    ):
+        """Route one tick; the quote timestamp identifies the tick"""
+        self.stats["received"] += 1
+        # ISO timestamps from one producer share a format, so they compare correctly as strings
+        previous = self.last_tick.get(ticker)
+        if quote_time and previous is not None and quote_time <= previous:
+            self.stats["duplicates"] += 1
+            return
+        self.last_tick[ticker] = quote_time
+
+        route = self.router.route_symbol(ticker)
+        queue = self.pending[route]
+        if ticker in queue:
+            self.stats["superseded"] += 1
+        queue[ticker] = {"ticker": ticker, "quote_time": quote_time, "correlation_id": correlation_id}
+        if trace is not None:
+            queue[ticker]["trace"] = trace
+
+        if len(queue) >= self.max_batch:
+            await self.flush(route)
+        elif route not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[route] = loop.call_later(self.max_delay, lambda r=route: asyncio.ensure_future(self._flush_due(r)))
+
+    async def _flush_due(self, route: str):
+        try:
+            await self.flush(route)
+        except Exception as e:
+            print(f"[RoutingAgent] Failed to publish {route} batch: {e}")
+
+    async def flush(self, route: str):
+        timer = self._timers.pop(route, None)
+        if timer:
+            timer.cancel()
+        queue = self.pending[route]
+        if not queue:
+            return
+        entries = list(queue.values())
+        queue.clear()
+
+        now = self.clock()
+        for entry in entries:
+            trace = entry.get("trace")
+            if trace is not None:
+                self.recorder.record(trace.mark(STAGE_ROUTE, now))
+                entry["trace"] = trace.encode()
+
+        await self.nats.publish(ROUTE_SUBJECTS[route], json.dumps({
+            "message_id": str(uuid.uuid4()),
+            "correlation_id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version": "1.0",
+            "source": self.source,
+            "payload": {"symbols": entries},
+        }).encode())
+
+        for entry in entries:
+            quote_time = parse_quote_time(entry["quote_time"])
+            if quote_time is not None:
+                self.latencies.append(now - quote_time)
+                self.latency_histogram.observe(now - quote_time)
+        self.batch_sizes.observe(len(entries))
+        self.stats["published"] += len(entries)
+        self.stats["messages"] += 1
+
+    def queue_depth(self) -> dict:
+        return {route: len(queue) for route, queue in self.pending.items()}
+
+    async def flush_all(self):
+        for route in list(self.pending):
+            await self.flush(route)
+
+    def latency_percentile(self, q: float) -> float:
+        return percentile(self.latencies, q)
+
+    def summary(self) -> str:
+        s = self.stats
+        avg_batch = s["published"] / s["messages"] if s["messages"] else 0
+        return (f"{s['received']} ticks, {s['duplicates']} duplicate, {s['superseded']} superseded, "
+                f"{s['published']} routed in {s['messages']} messages (avg {avg_batch:.1f}); "
+                f"quote->route p50 {self.latency_percentile(0.5) * 1000:.1f} ms, "
+                f"p99 {self.latency_percentile(0.99) * 1000:.1f} ms")
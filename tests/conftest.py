@@ -1,7 +1,13 @@
 """
 Pytest configuration and shared fixtures
+
+TEST_BACKEND selects what the Redis, NATS and Qdrant fixtures talk to:
+
+- ``memory`` (default): in-process stand-ins from services.common.local_backends.
+  Nothing needs to be running, and tests marked ``integration`` are skipped.
+- ``live``: the docker-compose services at TEST_REDIS_URL, TEST_NATS_URL,
+  TEST_QDRANT_HOST and TEST_DATABASE_URL, with integration tests enabled.
 """
-import asyncio
 import os
 from typing import AsyncGenerator, Generator
 
@@ -11,16 +17,32 @@ from redis import Redis
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from services.common.local_backends import LocalNats, LocalRedis, local_qdrant
+
 # Set test environment
 os.environ["ENVIRONMENT"] = "test"
 
+BACKEND_MEMORY = "memory"
+BACKEND_LIVE = "live"
+TEST_BACKEND = os.getenv("TEST_BACKEND", BACKEND_MEMORY)
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    """Create an event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+
+def pytest_report_header(config):
+    return f"test backend: {TEST_BACKEND}"
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_BACKEND == BACKEND_LIVE:
+        return
+    skip = pytest.mark.skip(reason="needs the compose stack (TEST_BACKEND=live)")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip)
+
+
+def require_live():
+    if TEST_BACKEND != BACKEND_LIVE:
+        pytest.skip("needs the compose stack (TEST_BACKEND=live)")
 
 
 @pytest.fixture(scope="session")
@@ -38,9 +60,16 @@ def redis_url() -> str:
     return os.getenv("TEST_REDIS_URL", "redis://localhost:6379/1")
 
 
+@pytest.fixture(scope="session")
+def nats_url() -> str:
+    """NATS URL for testing."""
+    return os.getenv("TEST_NATS_URL", "nats://localhost:4222")
+
+
 @pytest.fixture(scope="function")
 def db_session(db_url: str) -> Generator[Session, None, None]:
-    """Create a database session for testing."""
+    """Create a database session for testing (live backend only)."""
+    require_live()
     engine = create_engine(db_url)
     SessionLocal = sessionmaker(bind=engine)
     session = SessionLocal()
@@ -54,7 +83,8 @@ def db_session(db_url: str) -> Generator[Session, None, None]:
 
 @pytest.fixture(scope="function")
 def redis_client(redis_url: str) -> Generator[Redis, None, None]:
-    """Create a Redis client for testing."""
+    """Create a Redis client for testing (live backend only)."""
+    require_live()
     client = Redis.from_url(redis_url, decode_responses=True)
 
     try:
@@ -66,12 +96,32 @@ def redis_client(redis_url: str) -> Generator[Redis, None, None]:
 
 
 @pytest_asyncio.fixture
-async def nats_client():
+async def async_redis(redis_url: str) -> AsyncGenerator:
+    """redis.asyncio client, or an in-process LocalRedis (fresh per test)."""
+    if TEST_BACKEND != BACKEND_LIVE:
+        yield LocalRedis()
+        return
+
+    import redis.asyncio as aioredis
+
+    client = aioredis.from_url(redis_url)
+    try:
+        yield client
+    finally:
+        await client.flushdb()
+        await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def nats_client(nats_url: str):
     """Create a NATS client for testing."""
-    from nats.aio.client import Client as NATS
+    if TEST_BACKEND == BACKEND_LIVE:
+        from nats.aio.client import Client as NATS
 
-    nc = NATS()
-    await nc.connect("nats://localhost:4222")
+        nc = NATS()
+    else:
+        nc = LocalNats()
+    await nc.connect(nats_url)
 
     try:
         yield nc
@@ -84,7 +134,13 @@ def qdrant_client():
     """Create a Qdrant client for testing."""
     from qdrant_client import QdrantClient
 
-    client = QdrantClient(host="localhost", port=6333)
+    if TEST_BACKEND != BACKEND_LIVE:
+        client = QdrantClient(location=":memory:")
+        yield client
+        client.close()
+        return
+
+    client = QdrantClient(host=os.getenv("TEST_QDRANT_HOST", "localhost"), port=6333)
 
     try:
         yield client
@@ -96,6 +152,28 @@ def qdrant_client():
                 client.delete_collection(collection.name)
 
 
+@pytest_asyncio.fixture
+async def async_qdrant():
+    """AsyncQdrantClient; in memory mode a fresh local-mode instance per test."""
+    if TEST_BACKEND != BACKEND_LIVE:
+        client = local_qdrant()
+        yield client
+        await client.close()
+        return
+
+    from qdrant_client import AsyncQdrantClient
+
+    client = AsyncQdrantClient(host=os.getenv("TEST_QDRANT_HOST", "localhost"), port=6333)
+    try:
+        yield client
+    finally:
+        collections = (await client.get_collections()).collections
+        for collection in collections:
+            if collection.name.startswith("test_"):
+                await client.delete_collection(collection.name)
+        await client.close()
+
+
 @pytest.fixture
 def sample_prediction():
     """Sample prediction data for testing."""
@@ -0,0 +1,167 @@
+"""
+Online accuracy evaluator tests (target-time matching, streaming metrics, flush)
+"""
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services.common.subjects import MODEL_ACCURACY
+from services.monitoring.accuracy_evaluator import AccuracyEvaluator, PendingPrediction
+
+T0 = datetime(2026, 10, 19, 14, 30, tzinfo=timezone.utc).timestamp()
+
+
+class FakeDB:
+    def __init__(self, pending=(), fail=False):
+        self.pending = list(pending)
+        self.fail = fail
+        self.rows = []
+
+    async def fetch(self, query, since, target_since):
+        return [r for r in self.pending if r["target_time"].timestamp() >= target_since.timestamp()]
+
+    async def executemany(self, query, rows):
+        if self.fail:
+            raise ConnectionError("database down")
+        self.rows.extend(rows)
+
+
+class RecordingNats:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, data):
+        self.published.append((subject, json.loads(data)))
+
+
+def prediction(pid, ticker="AAPL", target=T0, predicted=101.0, current=100.0, version="v1", agent_type="normal"):
+    return PendingPrediction(pid, ticker, target, predicted, current, 0.8, version, agent_type)
+
+
+def rows_by_ticker(db):
+    return {row[3]: row for row in db.rows}
+
+
+@pytest.mark.unit
+class TestMatching:
+    """Test heap matching of predictions to realized quotes."""
+
+    def test_quote_scores_only_due_predictions_of_its_ticker(self):
+        evaluator = AccuracyEvaluator()
+        evaluator.add_prediction(prediction("p1", target=T0))
+        evaluator.add_prediction(prediction("p2", target=T0 + 3600))
+        evaluator.add_prediction(prediction("p3", ticker="MSFT", target=T0))
+
+        assert evaluator.on_quote("AAPL", T0 - 1, 100.0) == 0
+        assert evaluator.on_quote("AAPL", T0 + 5, 102.0) == 1
+        assert evaluator.pending_count == 2
+
+    def test_late_quote_expires_prediction(self):
+        evaluator = AccuracyEvaluator(match_tolerance=60)
+        evaluator.add_prediction(prediction("p1"))
+
+        assert evaluator.on_quote("AAPL", T0 + 3600, 102.0) == 0
+        assert evaluator.stats["expired"] == 1
+        assert evaluator.pending_count == 0
+
+    def test_expire_drops_predictions_without_quotes(self):
+        evaluator = AccuracyEvaluator(match_tolerance=60)
+        evaluator.add_prediction(prediction("p1"))
+        evaluator.add_prediction(prediction("p2", target=T0 + 3600))
+
+        assert evaluator.expire(now=T0 + 120) == 1
+        assert evaluator.pending_count == 1
+
+    def test_repeated_prediction_id_replaces_earlier(self):
+        evaluator = AccuracyEvaluator()
+        evaluator.add_prediction(prediction("p1", predicted=90.0))
+        evaluator.add_prediction(prediction("p1", predicted=101.0))
+
+        assert evaluator.on_quote("AAPL", T0, 101.0) == 1
+        accumulator = evaluator.take_window()[("v1", "normal", "AAPL")]
+        assert accumulator.count == 1
+        assert accumulator.abs_error == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestFlush:
+    """Test window metrics written to model_metrics and NATS."""
+
+    async def test_flush_writes_per_ticker_and_model_rows(self):
+        db, nats = FakeDB(), RecordingNats()
+        evaluator = AccuracyEvaluator(db, nats, flush_interval=60, clock=lambda: T0 + 30)
+        evaluator.add_prediction(prediction("p1", predicted=102.0))  # up, right, error 0
+        evaluator.add_prediction(prediction("p2", predicted=98.0))  # down, wrong, error 4
+        evaluator.add_prediction(prediction("p3", ticker="MSFT", predicted=210.0, current=200.0))  # error 10
+        evaluator.on_quote("AAPL", T0, 102.0)
+        evaluator.on_quote("MSFT", T0, 200.0)
+
+        assert await evaluator.flush() == 3
+
+        rows = rows_by_ticker(db)
+        _, _, _, _, mae, rmse, mape, accuracy, count, avg_confidence, metadata = rows["AAPL"]
+        assert (mae, accuracy, count) == (2.0, 0.5, 2)
+        assert rmse == pytest.approx(8 ** 0.5)
+        assert mape == pytest.approx(100 * 2 / 102)
+        assert avg_confidence == pytest.approx(0.8)
+        assert json.loads(metadata) == {"time_window": "1m"}
+        total = rows[None]
+        assert total[4] == pytest.approx(14 / 3)
+        assert total[8] == 3
+
+        [(subject, message)] = nats.published
+        assert subject == MODEL_ACCURACY
+        assert message["payload"]["sample_count"] == 3
+        assert message["payload"]["metrics"]["accuracy"] == pytest.approx(1 / 3)
+
+        assert await evaluator.flush() == 0  # windows do not repeat
+
+    async def test_failed_write_keeps_window(self):
+        db = FakeDB(fail=True)
+        evaluator = AccuracyEvaluator(db, clock=lambda: T0)
+        evaluator.add_prediction(prediction("p1"))
+        evaluator.on_quote("AAPL", T0, 101.0)
+
+        with pytest.raises(ConnectionError):
+            await evaluator.flush()
+        db.fail = False
+        assert await evaluator.flush() == 2
+
+    async def test_window_dropped_after_max_retries(self):
+        db = FakeDB(fail=True)
+        evaluator = AccuracyEvaluator(db, clock=lambda: T0, max_flush_retries=2)
+        evaluator.add_prediction(prediction("p1"))
+        evaluator.on_quote("AAPL", T0, 101.0)
+
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await evaluator.flush()
+
+        assert evaluator.stats["flush_failures"] == 3
+        assert evaluator.stats["windows_dropped"] == 1 and evaluator.stats["samples_dropped"] == 1
+        db.fail = False
+        assert await evaluator.flush() == 0
+
+    async def test_messages_and_startup_load(self):
+        target = datetime.fromtimestamp(T0, timezone.utc)
+        db = FakeDB(pending=[{
+            "id": 7, "ticker": "aapl", "target_time": target, "predicted_price": 101, "current_price": 100,
+            "confidence_score": None, "model_version": "v1", "agent_type": "earnings",
+        }])
+        evaluator = AccuracyEvaluator(db, clock=lambda: T0 - 60)
+        assert await evaluator.load_pending() == 1
+
+        await evaluator.on_prediction_updated(SimpleNamespace(data=json.dumps({"payload": {
+            "prediction_id": "pred_8", "ticker": "AAPL", "target_time": target.isoformat(),
+            "predicted_price": 99.0, "current_price": 100.0, "confidence": 0.9,
+            "model_type": "normal", "model_version": "v1",
+        }}).encode()))
+        await evaluator.on_market_quote(SimpleNamespace(data=json.dumps({"payload": {
+            "ticker": "AAPL", "timestamp": target.isoformat(), "close": 101.0,
+        }}).encode()))
+        await evaluator.on_market_quote(SimpleNamespace(data=b"{}"))
+
+        assert set(evaluator.take_window()) == {("v1", "earnings", "AAPL"), ("v1", "normal", "AAPL")}
@@ -0,0 +1,192 @@
+"""
+Prediction endpoint serialization and gateway startup tests
+"""
+import asyncio
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from services.api_gateway import main
+from services.api_gateway.responses import encode_record, splice_field
+from services.common.local_backends import LocalNats, LocalRedis
+
+
+class CachedRedis:
+    def __init__(self, value=None, features=None):
+        self.value = value
+        self.features = features or {}
+
+    async def get(self, key):
+        return self.value
+
+    async def hgetall(self, key):
+        return self.features
+
+
+class BlockedPipeline:
+    """Demand pipeline whose execute() waits until released"""
+
+    def __init__(self, released, executed):
+        self.released = released
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def zincrby(self, key, amount, member):
+        pass
+
+    def expire(self, key, seconds, nx=False):
+        pass
+
+    async def execute(self):
+        await self.released.wait()
+        self.executed.append(True)
+
+
+class SlowDemandRedis(CachedRedis):
+    def __init__(self, value):
+        super().__init__(value)
+        self.released = asyncio.Event()
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return BlockedPipeline(self.released, self.executed)
+
+
+class IdlePool:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class SingleRowDB:
+    def __init__(self, row):
+        self.row = row
+
+    async def fetchrow(self, query, *args):
+        return self.row
+
+
+@pytest.mark.unit
+class TestSerializers:
+    """Test the raw JSON helpers."""
+
+    def test_splice_field_into_object(self):
+        spliced = splice_field(b'{"ticker": "AAPL"}', "features", {"rsi_14": "55"})
+        assert json.loads(spliced) == {"ticker": "AAPL", "features": {"rsi_14": "55"}}
+
+    def test_splice_field_into_empty_object(self):
+        assert json.loads(splice_field(b"{}", "a", 1)) == {"a": 1}
+
+    def test_splice_field_replaces_existing_key(self):
+        spliced = splice_field(b'{"ticker": "AAPL", "features": {"old": 1}}', "features", {"rsi_14": "55"})
+        assert spliced.count(b'"features"') == 1
+        assert json.loads(spliced) == {"ticker": "AAPL", "features": {"rsi_14": "55"}}
+
+    def test_splice_field_rejects_non_object(self):
+        with pytest.raises(ValueError):
+            splice_field(b"[1, 2]", "a", 1)
+
+    def test_encode_record_handles_decimal_and_datetime(self):
+        encoded = encode_record({
+            "predicted_price": Decimal("155.5000"),
+            "prediction_time": datetime(2025, 12, 19, 10, 30, tzinfo=timezone.utc),
+        })
+        assert json.loads(encoded) == {
+            "predicted_price": 155.5,
+            "prediction_time": "2025-12-19T10:30:00+00:00",
+        }
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestPredictionEndpoint:
+    """Test GET /api/prediction/{symbol} with in-memory backends."""
+
+    async def _get(self, redis_client, db, path="/api/prediction/aapl"):
+        async def get_redis():
+            return redis_client
+
+        async def get_db():
+            yield db
+
+        main.app.dependency_overrides[main.get_redis] = get_redis
+        main.app.dependency_overrides[main.get_db] = get_db
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path)
+        finally:
+            main.app.dependency_overrides.clear()
+
+    async def test_cache_hit_returns_stored_bytes(self):
+        cached = b'{"ticker":"AAPL","predicted_price":155.5}'
+        response = await self._get(CachedRedis(cached), SingleRowDB(None))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == cached
+
+    async def test_cache_hit_with_features(self):
+        redis_client = CachedRedis(b'{"ticker":"AAPL"}', {b"rsi_14": b"55.0"})
+        response = await self._get(
+            redis_client, SingleRowDB(None), "/api/prediction/AAPL?include_features=true"
+        )
+
+        assert response.json() == {"ticker": "AAPL", "features": {"rsi_14": "55.0"}}
+
+    async def test_db_hit_encodes_row(self):
+        row = {"ticker": "AAPL", "predicted_price": Decimal("155.5000")}
+        response = await self._get(CachedRedis(None), SingleRowDB(row))
+
+        assert response.json() == {"ticker": "AAPL", "predicted_price": 155.5}
+
+    async def test_missing_prediction_is_404(self):
+        response = await self._get(CachedRedis(None), SingleRowDB(None))
+        assert response.status_code == 404
+
+    async def test_demand_recording_does_not_delay_response(self):
+        redis_client = SlowDemandRedis(b'{"ticker":"AAPL"}')
+
+        response = await asyncio.wait_for(self._get(redis_client, SingleRowDB(None)), timeout=1)
+        assert response.status_code == 200
+        assert redis_client.executed == []
+
+        redis_client.released.set()
+        await asyncio.gather(*main.demand_tasks)
+        assert redis_client.executed == [True]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLifespan:
+    """Test gateway startup and shutdown with in-memory backends."""
+
+    async def test_startup_registers_loop_metrics(self, monkeypatch):
+        pool = IdlePool()
+
+        async def create_pool(*args, **kwargs):
+            return pool
+
+        monkeypatch.setattr(main.redis, "from_url", lambda url: LocalRedis())
+        monkeypatch.setattr(main.asyncpg, "create_pool", create_pool)
+        monkeypatch.setattr(main, "NATS", LocalNats)
+
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "event_loop_lag_seconds_bucket" in response.text
+        assert "prediction_cache_lookups_total" in response.text
+        assert pool.closed
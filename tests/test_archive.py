@@ -0,0 +1,186 @@
+"""
+Cold-tier archive tests (chunk selection, Parquet layout, archive + hypertable reads)
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from scripts.archive_chunks import chunks_to_archive  # noqa: E402
+from services.common.cold_storage import (  # noqa: E402
+    HistoryQuery,
+    ParquetArchive,
+    arrow_schema,
+    records_to_table,
+)
+
+NOW = datetime(2026, 10, 19, 15, 0, tzinfo=timezone.utc)
+RETENTION = {"market_data": timedelta(days=90)}
+COLUMNS = [("timestamp", "timestamptz"), ("ticker", "varchar"), ("close", "numeric"),
+           ("volume", "int8"), ("metadata", "jsonb")]
+SCHEMA = arrow_schema(COLUMNS)
+
+
+def chunk(days_ago, hypertable="market_data"):
+    start = datetime(2026, 10, 19, tzinfo=timezone.utc) - timedelta(days=days_ago)
+    return {
+        "hypertable_schema": "public", "hypertable_name": hypertable,
+        "chunk_schema": "_timescaledb_internal", "chunk_name": f"_hyper_1_{days_ago}_chunk",
+        "primary_dimension": "timestamp", "range_start": start, "range_end": start + timedelta(days=1),
+    }
+
+
+def row(ts, ticker, close, volume=100):
+    return {"timestamp": ts, "ticker": ticker, "close": Decimal(str(close)), "volume": volume,
+            "metadata": '{"source": "test"}'}
+
+
+def day(d, hour=14):
+    return datetime(2026, 7, d, hour, tzinfo=timezone.utc)
+
+
+def write_chunk(archive, name, rows, schema=SCHEMA):
+    rows = sorted(rows, key=lambda r: (r["timestamp"].date(), r["ticker"], r["timestamp"]))
+    writer = archive.writer("market_data", name, schema, "timestamp")
+    writer.write(records_to_table(rows, schema))
+    files = writer.close()
+    archive.record_chunk("market_data", "timestamp", name, {"rows": sum(files.values()), "files": files}, schema)
+    return files
+
+
+class FakeDB:
+    """information_schema, timescaledb_information.chunks and the hypertable itself"""
+
+    def __init__(self, rows, hot_start):
+        self.rows = rows
+        self.hot_start = hot_start
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        if "information_schema" in query:
+            return [{"column_name": n, "udt_name": t} for n, t in COLUMNS]
+        self.queries.append((query, args))
+        start, end = args[:2]
+        tickers = args[2] if len(args) > 2 else None
+        return [r for r in self.rows
+                if start <= r["timestamp"] < end and (tickers is None or r["ticker"] in tickers)]
+
+    async def fetchrow(self, query, *args):
+        return {"primary_dimension": "timestamp", "hot_start": self.hot_start}
+
+
+@pytest.mark.unit
+class TestChunkSelection:
+    """Test which chunks a run archives."""
+
+    def test_archives_chunks_due_within_lead(self):
+        chunks = [chunk(95), chunk(85), chunk(82), chunk(40), chunk(0)]
+
+        selected = chunks_to_archive(chunks, RETENTION, {"market_data": {"_hyper_1_95_chunk"}}, NOW,
+                                     lead=timedelta(days=7))
+
+        # 85 days ago: dropped in 4 days; 82 days ago: its range ended 81 days ago, dropped in 9
+        assert [c["chunk_name"] for c in selected] == ["_hyper_1_85_chunk"]
+
+    def test_all_takes_every_sealed_chunk(self):
+        chunks = [chunk(40), chunk(0), chunk(40, hypertable="predictions")]
+
+        selected = chunks_to_archive(chunks, RETENTION, {}, NOW, everything=True)
+
+        assert [(c["hypertable_name"], c["chunk_name"]) for c in selected] == [
+            ("market_data", "_hyper_1_40_chunk"), ("predictions", "_hyper_1_40_chunk")
+        ]
+        assert chunks_to_archive(chunks, RETENTION, {}, NOW) == []
+
+
+@pytest.mark.unit
+class TestParquetArchive:
+    """Test the on-disk layout and filtered reads."""
+
+    def test_chunk_split_into_date_partitions(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+
+        files = write_chunk(archive, "_hyper_1_1_chunk", [
+            row(day(1, 23), "MSFT", 400.5), row(day(1, 22), "AAPL", 190.25), row(day(2, 1), "AAPL", 191.0),
+        ])
+
+        assert files == {"date=2026-07-01/_hyper_1_1_chunk.parquet": 2,
+                         "date=2026-07-02/_hyper_1_1_chunk.parquet": 1}
+        assert not list(tmp_path.rglob(".*.tmp"))
+        assert archive.manifest("market_data")["time_column"] == "timestamp"
+
+    def test_read_filters_by_ticker_and_time(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+        write_chunk(archive, "_hyper_1_1_chunk", [row(day(1), t, 10.0) for t in ("AAPL", "MSFT", "NVDA")])
+        write_chunk(archive, "_hyper_1_2_chunk", [row(day(2), t, 11.0) for t in ("AAPL", "MSFT", "NVDA")])
+
+        table = archive.read("market_data", start=day(2, 0), end=day(3, 0), tickers=["AAPL", "NVDA"],
+                             columns=["ticker", "close"])
+
+        assert table.column_names == ["ticker", "close"]
+        assert sorted(table.to_pydict()["ticker"]) == ["AAPL", "NVDA"]
+        assert table.to_pydict()["close"] == [11.0, 11.0]
+        assert archive.read("predictions") is None
+
+    def test_column_added_after_older_chunks(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+        # The old file sorts first; a dataset taking the first file's schema would drop close
+        old = arrow_schema([c for c in COLUMNS if c[0] != "close"])
+        write_chunk(archive, "_hyper_1_1_chunk", [row(day(1), "AAPL", 1.0)], schema=old)
+        write_chunk(archive, "_hyper_1_2_chunk", [row(day(1), "MSFT", 2.0)])
+
+        table = archive.read("market_data", columns=["ticker", "close"])
+
+        assert sorted(zip(*table.to_pydict().values())) == [("AAPL", None), ("MSFT", 2.0)]
+
+    def test_older_manifest_unifies_file_schemas(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+        old = arrow_schema([c for c in COLUMNS if c[0] != "close"])
+        write_chunk(archive, "_hyper_1_1_chunk", [row(day(1), "AAPL", 1.0)], schema=old)
+        write_chunk(archive, "_hyper_1_2_chunk", [row(day(1), "MSFT", 2.0)])
+        manifest = archive.manifest("market_data")
+        del manifest["schema"]
+        (tmp_path / "market_data" / "_manifest.json").write_text(json.dumps(manifest))
+
+        assert "close" in archive.read("market_data").column_names
+
+    def test_records_keep_types(self):
+        table = records_to_table([row(day(1), "AAPL", 190.1234), {**row(day(1), "MSFT", 1), "close": None}], SCHEMA)
+
+        assert str(table.schema.field("timestamp").type) == "timestamp[us, tz=UTC]"
+        assert table.to_pydict()["close"] == [190.1234, None]
+        assert table.to_pydict()["metadata"][0] == '{"source": "test"}'
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestHistoryQuery:
+    """Test reads spanning the archive and the live hypertable."""
+
+    async def test_unions_archive_with_hypertable(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+        write_chunk(archive, "_hyper_1_1_chunk", [row(day(1), "AAPL", 1.0), row(day(1), "MSFT", 2.0)])
+        write_chunk(archive, "_hyper_1_2_chunk", [row(day(2), "AAPL", 3.0)])
+        # Day 2 was archived but not dropped yet; the hypertable copy wins
+        db = FakeDB([row(day(2), "AAPL", 3.5), row(day(3), "AAPL", 4.0), row(day(3), "MSFT", 5.0)],
+                    hot_start=day(2, 0))
+
+        table = await HistoryQuery(db, archive).fetch("market_data", day(1, 0), day(4, 0), tickers=["AAPL"])
+
+        assert table.column_names == [name for name, _ in COLUMNS]
+        assert table.to_pydict()["close"] == [1.0, 3.5, 4.0]
+        ((_, args),) = db.queries
+        assert args == (day(2, 0), day(4, 0), ["AAPL"])
+
+    async def test_range_entirely_in_archive_skips_postgres(self, tmp_path):
+        archive = ParquetArchive(tmp_path)
+        write_chunk(archive, "_hyper_1_1_chunk", [row(day(1), "AAPL", 1.0)])
+        db = FakeDB([], hot_start=day(5, 0))
+
+        table = await HistoryQuery(db, archive).fetch("market_data", day(1, 0), day(2, 0), columns=["close"])
+
+        assert table.to_pydict() == {"close": [1.0]}
+        assert db.queries == []
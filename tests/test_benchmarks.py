@@ -0,0 +1,72 @@
+"""
+Benchmark suite tests (baseline comparison and a scaled-down pipeline run)
+"""
+import pytest
+
+from benchmarks.harness import BenchmarkReport, Measurement
+from benchmarks.pipeline import PipelineBenchmark, run_suite
+from services.common.local_backends import LocalRedis
+
+
+def report(**values):
+    r = BenchmarkReport()
+    for name, (value, higher_is_better) in values.items():
+        r.add(Measurement(name, value, "x", higher_is_better=higher_is_better))
+    return r
+
+
+@pytest.mark.unit
+class TestBaselineComparison:
+    """Test regression detection against a stored baseline."""
+
+    def test_flags_only_changes_beyond_tolerance(self):
+        baseline = report(latency=(10.0, False), qps=(1000.0, True))
+
+        assert report(latency=(12.0, False), qps=(800.0, True)).compare(baseline, 0.25) == []
+
+        regressions = report(latency=(13.0, False), qps=(700.0, True)).compare(baseline, 0.25)
+        assert {r.name for r in regressions} == {"latency", "qps"}
+        assert all(r.change == pytest.approx(0.3) for r in regressions)
+
+    def test_improvements_and_new_measurements_pass(self):
+        baseline = report(latency=(10.0, False))
+
+        assert report(latency=(2.0, False), extra=(1.0, False)).compare(baseline) == []
+
+    def test_round_trips_through_json(self, tmp_path):
+        original = report(latency=(10.0, False))
+        original.measurements["latency"].target = 50.0
+        original.save(tmp_path / "baseline.json")
+
+        loaded = BenchmarkReport.load(tmp_path / "baseline.json")
+        assert loaded.measurements["latency"] == original.measurements["latency"]
+        assert loaded.measurements["latency"].meets_target is True
+        assert loaded.meta["commit"] == original.meta["commit"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_pipeline_writes_a_prediction_per_symbol():
+    redis = LocalRedis()
+    bench = PipelineBenchmark(300, redis=redis, max_batch=32)
+    try:
+        await bench.start()
+        await bench.run_update()
+    finally:
+        bench.close()
+        await bench.bus.close()
+
+    assert bench.written == 300
+    assert len(await redis.keys("pred:*")) == 300 and len(await redis.keys("features:*")) == 300
+    assert bench.router.stats["published"] == 300
+    assert {"features", "route", "inference", "redis", "end_to_end"} <= set(bench.recorder.samples)
+
+
+@pytest.mark.benchmark
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_suite_meets_section_9_targets():
+    result = await run_suite(symbols=1000, reads=1000)
+
+    missed = [m.name for m in result.measurements.values() if m.meets_target is False]
+    assert missed == []
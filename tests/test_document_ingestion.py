@@ -0,0 +1,129 @@
+"""
+Knowledge base ingestion tests (chunking, deterministic IDs, incremental re-runs)
+"""
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from services.explanation_worker.ingestion import (
+    Document,
+    DocumentIndexer,
+    chunk_text,
+    iter_documents,
+    point_id,
+    restore_indexing,
+)
+
+DIM = 4
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        return np.array([[len(t), 1.0, 2.0, 3.0] for t in texts], dtype=np.float32)
+
+
+def words(n, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+@pytest.mark.unit
+class TestChunking:
+    """Test chunking and point identity."""
+
+    def test_windows_overlap(self):
+        chunks = chunk_text(words(25), chunk_words=10, overlap=2)
+
+        assert [c.split()[0] for c in chunks] == ["w0", "w8", "w16"]
+        assert chunks[-1].split()[-1] == "w24"
+
+    def test_short_and_empty_text(self):
+        assert chunk_text("one two", chunk_words=10, overlap=2) == ["one two"]
+        assert chunk_text("   ", chunk_words=10, overlap=2) == []
+
+    def test_point_ids_are_deterministic(self):
+        assert point_id("filings/AAPL.txt", 0) == point_id("filings/AAPL.txt", 0)
+        assert point_id("filings/AAPL.txt", 0) != point_id("filings/AAPL.txt", 1)
+
+    def test_metadata_from_path(self, tmp_path):
+        (tmp_path / "filings").mkdir()
+        (tmp_path / "filings" / "AAPL_10K_2024.txt").write_text("Revenue grew")
+        (tmp_path / "notes.bin").write_text("ignored")
+
+        documents = list(iter_documents(tmp_path))
+
+        assert len(documents) == 1
+        assert documents[0].source == "filings/AAPL_10K_2024.txt"
+        assert documents[0].metadata == {"doc_type": "filings", "ticker": "AAPL"}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestDocumentIndexer:
+    """Test indexing against an in-process Qdrant."""
+
+    @pytest.fixture
+    async def qdrant(self):
+        client = AsyncQdrantClient(location=":memory:")
+        await client.create_collection(
+            "financial_knowledge",
+            vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+        )
+        yield client
+        await client.close()
+
+    def _indexer(self, qdrant, embedder):
+        return DocumentIndexer(qdrant, embedder, chunk_words=10, overlap=2, upsert_batch_size=2, parallel=2)
+
+    async def test_indexes_all_chunks(self, qdrant):
+        documents = [Document(f"filings/doc{i}.txt", words(25)) for i in range(3)]
+
+        stats = await self._indexer(qdrant, FakeEmbedder()).index(documents)
+
+        assert stats["documents"] == 3
+        assert stats["chunks"] == 9
+        assert (await qdrant.count("financial_knowledge")).count == 9
+
+    async def test_rerun_skips_unchanged_documents(self, qdrant):
+        documents = [Document("filings/doc.txt", words(25))]
+        await self._indexer(qdrant, FakeEmbedder()).index(documents)
+
+        embedder = FakeEmbedder()
+        stats = await self._indexer(qdrant, embedder).index(documents)
+
+        assert stats["skipped"] == 1
+        assert embedder.calls == 0
+        assert (await qdrant.count("financial_knowledge")).count == 3
+
+    async def test_shrunk_document_drops_stale_chunks(self, qdrant):
+        await self._indexer(qdrant, FakeEmbedder()).index([Document("filings/doc.txt", words(25))])
+
+        stats = await self._indexer(qdrant, FakeEmbedder()).index(
+            [Document("filings/doc.txt", words(8, prefix="v"))]
+        )
+
+        assert stats["deleted_chunks"] == 2
+        points, _ = await qdrant.scroll("financial_knowledge")
+        assert [p.payload["text"] for p in points] == [words(8, prefix="v")]
+
+
+class RecordingQdrant:
+    def __init__(self):
+        self.thresholds = []
+
+    async def update_collection(self, collection, optimizers_config):
+        self.thresholds.append(optimizers_config.indexing_threshold)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_restore_indexing_keeps_explicit_zero():
+    qdrant = RecordingQdrant()
+
+    await restore_indexing(qdrant, "financial_knowledge", 0)
+    await restore_indexing(qdrant, "financial_knowledge", None)
+
+    assert qdrant.thresholds == [0, 20000]
@@ -0,0 +1,105 @@
+"""
+Earnings calendar index tests (bulk load, earnings windows, NATS updates, batch routing)
+"""
+import json
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from services.common.subjects import EARNINGS_CALENDAR, EARNINGS_REPORTED
+from services.routing_agent.calendar_checker import EarningsCalendarIndex
+from services.routing_agent.router import EARNINGS, NORMAL, SymbolRouter
+
+MONDAY = date(2026, 10, 19)
+FRIDAY = date(2026, 10, 16)
+
+
+class FakeDB:
+    def __init__(self, rows, during_fetch=None):
+        self.rows = rows
+        self.during_fetch = during_fetch
+        self.queries = 0
+
+    async def fetch(self, query, since):
+        self.queries += 1
+        if self.during_fetch:
+            await self.during_fetch()
+        return [{"ticker": t, "dates": sorted(d for d in dates if d >= since)} for t, dates in self.rows.items()]
+
+
+def message(subject, ticker, earnings_date, **extra):
+    payload = {"ticker": ticker, "earnings_date": earnings_date.isoformat(), **extra}
+    return SimpleNamespace(subject=subject, data=json.dumps({"payload": payload}).encode())
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestEarningsCalendarIndex:
+    """Test earnings window lookups."""
+
+    async def test_window_covers_earnings_day_and_next_session(self):
+        calendar = EarningsCalendarIndex()
+        await calendar.load(FakeDB({"AAPL": [FRIDAY], "MSFT": [date(2026, 10, 22)]}), today=MONDAY)
+
+        assert calendar.is_earnings_window("AAPL", FRIDAY)
+        assert calendar.is_earnings_window("aapl", MONDAY)  # Friday after-close report
+        assert not calendar.is_earnings_window("AAPL", date(2026, 10, 20))
+        assert not calendar.is_earnings_window("MSFT", MONDAY)
+        assert calendar.next_earnings("MSFT", MONDAY) == date(2026, 10, 22)
+
+    async def test_load_skips_old_history(self):
+        calendar = EarningsCalendarIndex(history_days=7)
+        await calendar.load(FakeDB({"AAPL": [date(2025, 10, 30), FRIDAY]}), today=MONDAY)
+
+        assert calendar.stats["loaded_dates"] == 1
+
+    async def test_messages_update_index(self):
+        calendar = EarningsCalendarIndex()
+        await calendar.load(FakeDB({"AAPL": [date(2026, 11, 2)]}), today=MONDAY)
+        assert calendar.earnings_symbols(MONDAY) == frozenset()
+
+        await calendar.on_calendar_message(message(EARNINGS_REPORTED, "NVDA", MONDAY, actual_eps=1.1))
+        assert calendar.earnings_symbols(MONDAY) == {"NVDA"}
+
+        await calendar.on_calendar_message(message(EARNINGS_CALENDAR, "NVDA", MONDAY, action="remove"))
+        await calendar.on_calendar_message(message(EARNINGS_CALENDAR, "AAPL", MONDAY, action="add"))
+        assert calendar.earnings_symbols(MONDAY) == {"AAPL"}
+
+    async def test_updates_during_load_survive(self):
+        calendar = EarningsCalendarIndex()
+
+        async def update_mid_load():
+            await calendar.on_calendar_message(message(EARNINGS_CALENDAR, "TSLA", MONDAY, action="add"))
+
+        await calendar.load(FakeDB({"AAPL": [FRIDAY]}, during_fetch=update_mid_load), today=MONDAY)
+
+        assert calendar.earnings_symbols(MONDAY) == {"AAPL", "TSLA"}
+
+    async def test_bad_message_ignored(self):
+        calendar = EarningsCalendarIndex()
+
+        await calendar.on_calendar_message(SimpleNamespace(subject=EARNINGS_CALENDAR, data=b"{}"))
+
+        assert calendar.stats["updates"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_route_5000_symbol_batch_in_memory():
+    symbols = [f"S{i:04d}" for i in range(5000)]
+    db = FakeDB({s: [MONDAY] for s in symbols[:100]} | {s: [date(2026, 12, 1)] for s in symbols[100:]})
+    calendar = EarningsCalendarIndex()
+    await calendar.load(db, today=MONDAY)
+    router = SymbolRouter(calendar)
+
+    start = time.perf_counter()
+    routes = router.route_batch(symbols, MONDAY)
+    elapsed = time.perf_counter() - start
+
+    assert routes[EARNINGS] == symbols[:100]
+    assert len(routes[NORMAL]) == 4900
+    assert db.queries == 1
+    assert elapsed < 0.5
+    assert router.route_symbol("S0000", MONDAY) == EARNINGS
@@ -0,0 +1,189 @@
+"""
+Embedding service tests (batching, caching, dimension checks)
+"""
+import asyncio
+from types import SimpleNamespace
+
+import msgpack
+import numpy as np
+import pytest
+
+from services.common.local_backends import LocalNats
+from services.explanation_worker.embedding_service import (
+    EmbeddingClient,
+    EmbeddingServer,
+    EmbeddingService,
+    LRUCache,
+    check_collection_dimension,
+    pack_vectors,
+    unpack_vectors,
+)
+
+DIM = 4
+
+
+class CountingEncoder:
+    """Deterministic encoder that records every batch it is given"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[len(t), 1, 2, 3] for t in texts], dtype=np.float32)
+
+
+class DictCache:
+    def __init__(self):
+        self.data = {}
+
+    async def get_many(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def set_many(self, items):
+        self.data.update(items)
+
+
+@pytest.mark.unit
+class TestLRUCache:
+    """Test LRU eviction order."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestEmbeddingService:
+    """Test dynamic batching and caching."""
+
+    async def _service(self, **kwargs):
+        encoder = CountingEncoder()
+        service = EmbeddingService(encoder, dim=DIM, max_wait_ms=20, **kwargs)
+        await service.start(warmup=False)
+        return service, encoder
+
+    async def test_concurrent_requests_share_a_batch(self):
+        service, encoder = await self._service()
+        results = await asyncio.gather(*(service.embed_one(f"text {i}") for i in range(10)))
+        await service.stop()
+
+        assert len(encoder.batches) == 1
+        assert len(encoder.batches[0]) == 10
+        assert all(r.shape == (DIM,) for r in results)
+
+    async def test_batch_size_is_capped(self):
+        service, encoder = await self._service(max_batch_size=4)
+        await asyncio.gather(*(service.embed_one(f"text {i}") for i in range(10)))
+        await service.stop()
+
+        assert [len(b) for b in encoder.batches] == [4, 4, 2]
+
+    async def test_identical_texts_are_embedded_once(self):
+        service, encoder = await self._service()
+        await asyncio.gather(*(service.embed_one("same query") for _ in range(5)))
+        matrix = await service.embed(["same query", "same query"])
+        await service.stop()
+
+        assert encoder.batches == [["same query"]]
+        assert matrix.shape == (2, DIM)
+        assert service.stats["lru_hits"] == 2
+
+    async def test_cancelled_caller_does_not_cancel_shared_text(self):
+        service, encoder = await self._service()
+        cancelled = asyncio.create_task(service.embed_one("shared"))
+        waiting = asyncio.create_task(service.embed_one("shared"))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        later = await service.embed_one("shared")
+        await service.stop()
+
+        assert (await waiting)[0] == len("shared")
+        assert later[0] == len("shared")
+        assert cancelled.cancelled()
+        assert encoder.batches == [["shared"]]
+
+    async def test_persistent_cache_is_consulted(self):
+        persistent = DictCache()
+        service, encoder = await self._service(persistent=persistent)
+        await service.embed(["chunk"])
+        await service.stop()
+
+        fresh, fresh_encoder = await self._service(persistent=persistent)
+        vector = await fresh.embed_one("chunk")
+        await fresh.stop()
+
+        assert fresh_encoder.batches == []
+        assert fresh.stats["persistent_hits"] == 1
+        assert vector[0] == len("chunk")
+
+    async def test_encoder_errors_propagate(self):
+        def broken(texts):
+            raise RuntimeError("model crashed")
+
+        service = EmbeddingService(broken, dim=DIM, max_wait_ms=1)
+        await service.start(warmup=False)
+        with pytest.raises(RuntimeError):
+            await service.embed_one("text")
+        await service.stop()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestDimensionCheck:
+    """Test collection dimension validation."""
+
+    class FakeQdrant:
+        def __init__(self, size):
+            self.size = size
+
+        async def get_collection(self, name):
+            vectors = SimpleNamespace(size=self.size)
+            return SimpleNamespace(config=SimpleNamespace(params=SimpleNamespace(vectors=vectors)))
+
+    async def test_matching_dimension_passes(self):
+        await check_collection_dimension(self.FakeQdrant(384), "financial_knowledge", 384)
+
+    async def test_mismatched_dimension_raises(self):
+        with pytest.raises(ValueError, match="768-dim"):
+            await check_collection_dimension(self.FakeQdrant(768), "financial_knowledge", 384)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestEmbeddingServer:
+    """Test serving embeddings over NATS request/reply."""
+
+    async def test_request_reply_and_stop(self):
+        nats = LocalNats()
+        await nats.connect()
+        service = EmbeddingService(CountingEncoder(), dim=DIM, max_wait_ms=1)
+        await service.start(warmup=False)
+        server = EmbeddingServer(service, nats)
+        await server.start()
+
+        vectors = await EmbeddingClient(nats, timeout=1).embed(["a", "bb"])
+        assert vectors[:, 0].tolist() == [1.0, 2.0]
+
+        await service.stop()  # batch loop gone: the next request never completes
+        await server.on_request(SimpleNamespace(data=msgpack.packb({"texts": ["stuck"]})))
+        (task,) = server._requests
+        await server.stop()
+
+        assert task.cancelled()
+        assert not server._requests
+        assert server.subscription is None
+
+
+@pytest.mark.unit
+def test_vector_wire_format_roundtrip():
+    matrix = np.arange(8, dtype=np.float32).reshape(2, 4)
+    np.testing.assert_array_equal(unpack_vectors(pack_vectors(matrix)), matrix)
@@ -0,0 +1,162 @@
+"""
+Explanation reuse cache tests (fingerprints, staleness, worker integration)
+"""
+import json
+
+import pytest
+
+from services.explanation_worker import explanation_cache
+from services.explanation_worker.explanation_cache import (
+    ExplanationCache,
+    candidate_fingerprints,
+    fingerprint,
+    prediction_state,
+)
+from services.explanation_worker.explanation_worker import ExplanationWorker
+
+FEATURES = {b"return_20d": b"0.062", b"volatility_20d": b"0.31", b"rsi_14": b"58.2", b"market_beta": b"1.12"}
+EARNINGS_ANALYSIS = {b"eps_surprise_pct": b"0.08", b"revenue_surprise_pct": b"0.03", b"fundamental_score": b"72"}
+
+
+def prediction(ret=0.0121, **overrides):
+    return {
+        "predicted_return_1d": ret,
+        "predicted_price": 190.5,
+        "uncertainty_sigma": 0.018,
+        "model_type": "normal",
+        "predicted_at": "2026-10-19T14:30:00Z",
+        **overrides,
+    }
+
+
+class FakeRedis:
+    def __init__(self, values=None):
+        self.data = dict(values or {})
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+
+    async def hgetall(self, key):
+        if key.startswith("earnings_analysis:"):
+            return EARNINGS_ANALYSIS
+        return FEATURES if key.startswith("features:") else {}
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    """Test prediction state quantization."""
+
+    def test_small_moves_share_a_fingerprint(self):
+        a = prediction_state("AAPL", prediction(0.0121), FEATURES, doc_ids=["d1"])
+        b = prediction_state("AAPL", prediction(0.0124), {**FEATURES, b"rsi_14": b"57.0"}, doc_ids=["d1"])
+
+        assert fingerprint(a) == fingerprint(b)
+
+    def test_material_changes_change_the_fingerprint(self):
+        base = prediction_state("AAPL", prediction(), FEATURES, doc_ids=["d1"])
+
+        assert fingerprint(base) != fingerprint(prediction_state("AAPL", prediction(0.03), FEATURES, doc_ids=["d1"]))
+        assert fingerprint(base) != fingerprint(prediction_state("AAPL", prediction(), FEATURES, doc_ids=["d2"]))
+        assert fingerprint(base) != fingerprint(
+            prediction_state("AAPL", prediction(model_type="earnings"), FEATURES, doc_ids=["d1"])
+        )
+
+    def test_neighbouring_return_buckets_are_candidates(self):
+        below_edge = prediction_state("AAPL", prediction(0.0124), FEATURES)
+        above_edge = prediction_state("AAPL", prediction(0.0126), FEATURES)
+
+        assert fingerprint(above_edge) in candidate_fingerprints(below_edge)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestExplanationCache:
+    """Test lookup, staleness and hit accounting."""
+
+    async def test_store_then_hit(self):
+        cache = ExplanationCache(FakeRedis(), max_staleness=600)
+        state = prediction_state("AAPL", prediction(), FEATURES)
+
+        cached, digest = await cache.lookup(state)
+        await cache.store("AAPL", digest, {"text": "Momentum-driven"})
+        hit, _ = await cache.lookup(state)
+
+        assert cached is None
+        assert hit == {"text": "Momentum-driven"}
+        assert cache.hit_rate == 0.5
+        assert cache.client.data[explanation_cache.HIT_COUNTER] == 1
+
+    async def test_stale_entries_are_ignored(self, monkeypatch):
+        cache = ExplanationCache(FakeRedis(), max_staleness=60)
+        state = prediction_state("AAPL", prediction(), FEATURES)
+        _, digest = await cache.lookup(state)
+        await cache.store("AAPL", digest, {"text": "old"})
+
+        real_time = explanation_cache.time.time
+        monkeypatch.setattr(explanation_cache.time, "time", lambda: real_time() + 120)
+
+        assert (await cache.lookup(state))[0] is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_worker_reuses_explanations_for_near_identical_predictions():
+    class FakeRetriever:
+        async def retrieve(self, symbol):
+            return [{"id": "d1", "text": "10-K excerpt", "source": "10-K", "score": 0.9}]
+
+    redis = FakeRedis({"pred:AAPL": json.dumps(prediction(0.0121)).encode()})
+    worker = ExplanationWorker()
+    worker.redis = redis
+    worker.retriever = FakeRetriever()
+    worker.explanation_cache = ExplanationCache(redis)
+
+    calls = []
+
+    async def fake_generate(prompt, on_token=None):
+        calls.append(prompt)
+        return "Momentum and earnings quality support a modest gain."
+
+    worker._generate = fake_generate
+
+    first = await worker.generate_explanation("AAPL")
+    redis.data["pred:AAPL"] = json.dumps(prediction(0.0123)).encode()
+    second = await worker.generate_explanation("AAPL")
+
+    assert len(calls) == 1
+    assert second == first
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_worker_adds_earnings_context_for_earnings_model():
+    class FakeRetriever:
+        async def retrieve(self, symbol):
+            return []
+
+    redis = FakeRedis({"pred:AAPL": json.dumps(prediction(model_type="earnings")).encode()})
+    worker = ExplanationWorker()
+    worker.redis = redis
+    worker.retriever = FakeRetriever()
+    worker.explanation_cache = ExplanationCache(redis)
+
+    prompts = []
+
+    async def fake_generate(prompt, on_token=None):
+        prompts.append(prompt)
+        return "A strong EPS beat drives the call."
+
+    worker._generate = fake_generate
+
+    await worker.generate_explanation("AAPL")
+
+    assert "EPS Surprise: +8.0%" in prompts[0]
@@ -0,0 +1,175 @@
+"""
+Streamed explanation tests (Ollama NDJSON, chunk coalescing, SSE relay)
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from nats.errors import TimeoutError as NatsTimeoutError
+
+from services.api_gateway import main
+from services.api_gateway.streaming import relay_explanation_stream
+from services.common.subjects import EXPLAIN_GENERATE, explanation_stream_subject
+from services.explanation_worker.explanation_stream import ExplanationStream
+from services.explanation_worker.ollama_client import OllamaClient
+
+
+class RecordingNats:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, data):
+        self.published.append((subject, json.loads(data)))
+
+
+class QueueSubscription:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.unsubscribed = False
+
+    async def next_msg(self, timeout=1.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            raise NatsTimeoutError
+
+    async def unsubscribe(self):
+        self.unsubscribed = True
+
+    def put(self, chunk):
+        self.queue.put_nowait(SimpleNamespace(data=json.dumps(chunk).encode()))
+
+
+class WorkerSimulatingNats:
+    """Answers every explanation job on its stream subject, like a worker would"""
+
+    def __init__(self):
+        self.subscriptions = {}
+
+    async def subscribe(self, subject):
+        self.subscriptions[subject] = QueueSubscription()
+        return self.subscriptions[subject]
+
+    async def publish(self, subject, data):
+        assert subject == EXPLAIN_GENERATE
+        job = json.loads(data)
+        subscription = self.subscriptions[explanation_stream_subject(job["job_id"])]
+        subscription.put({"job_id": job["job_id"], "seq": 1, "type": "token", "text": "AAPL is "})
+        subscription.put({"job_id": job["job_id"], "seq": 2, "type": "token", "text": "up."})
+        subscription.put({"job_id": job["job_id"], "seq": 3, "type": "done", "explanation": {"text": "AAPL is up."}})
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestOllamaStreaming:
+    """Test NDJSON parsing of /api/generate."""
+
+    async def test_yields_fragments_until_done(self):
+        body = "\n".join(json.dumps(c) for c in [
+            {"response": "Strong", "done": False},
+            {"response": " momentum", "done": False},
+            {"response": "", "done": True},
+        ])
+
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, text=body)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama")
+        ollama = OllamaClient(client=client)
+
+        assert [t async for t in ollama.stream("prompt")] == ["Strong", " momentum"]
+
+    async def test_error_line_raises(self):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda r: httpx.Response(200, text='{"error": "model not found"}')),
+            base_url="http://ollama",
+        )
+
+        with pytest.raises(RuntimeError, match="model not found"):
+            [t async for t in OllamaClient(client=client).stream("prompt")]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestExplanationStream:
+    """Test chunk publishing from the worker."""
+
+    async def test_first_token_immediate_then_coalesced(self):
+        nats = RecordingNats()
+        stream = ExplanationStream(nats, "exp_1", flush_interval=60)
+
+        for token in ["AAPL", " is", " up", "."]:
+            await stream.push(token)
+        await stream.finish({"text": "AAPL is up."})
+
+        messages = [m for _, m in nats.published]
+        assert {s for s, _ in nats.published} == {"thought.explanation.stream.exp_1"}
+        assert [(m["type"], m.get("text")) for m in messages] == [
+            ("token", "AAPL"), ("token", " is up."), ("done", None)
+        ]
+        assert [m["seq"] for m in messages] == [1, 2, 3]
+
+    async def test_failure_is_published(self):
+        nats = RecordingNats()
+        await ExplanationStream(nats, "exp_2").fail("Ollama unavailable")
+
+        assert nats.published[-1][1]["type"] == "error"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSSERelay:
+    """Test the gateway side of streaming."""
+
+    async def test_relay_stops_after_done(self):
+        subscription = QueueSubscription()
+        subscription.put({"seq": 1, "type": "token", "text": "Hi"})
+        subscription.put({"seq": 2, "type": "done", "explanation": {"text": "Hi"}})
+        subscription.put({"seq": 3, "type": "token", "text": "ignored"})
+
+        events = [e async for e in relay_explanation_stream(subscription)]
+
+        assert parse_sse(b"".join(events).decode()) == [
+            ("token", {"seq": 1, "text": "Hi"}),
+            ("done", {"seq": 2, "explanation": {"text": "Hi"}}),
+        ]
+        assert subscription.unsubscribed
+
+    async def test_relay_times_out_when_worker_is_silent(self):
+        events = [e async for e in relay_explanation_stream(QueueSubscription(), idle_timeout=0.01)]
+
+        assert parse_sse(b"".join(events).decode())[0][0] == "error"
+
+    async def test_stream_endpoint(self):
+        class EmptyRedis:
+            async def get(self, key):
+                return None
+
+        async def get_redis():
+            return EmptyRedis()
+
+        main.app.dependency_overrides[main.get_redis] = get_redis
+        main.app.state.nats = WorkerSimulatingNats()
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/api/explanation/aapl/stream")
+        finally:
+            main.app.dependency_overrides.clear()
+            del main.app.state.nats
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [e for e, _ in events] == ["token", "token", "done"]
+        assert "".join(d["text"] for e, d in events if e == "token") == "AAPL is up."
@@ -0,0 +1,123 @@
+"""
+Multi-process inference pool tests (shared-memory batches, parallel workers)
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+
+from services.common.inference_pool import InferencePool  # noqa: E402
+from services.common.inference_runtime import SessionConfig  # noqa: E402
+
+WEIGHTS = np.array([[1.0], [2.0], [3.0]], dtype=np.float32)
+
+
+def linear_model(path, weights=WEIGHTS, bias=0.5):
+    """y = x @ weights + bias, input [batch, 3]"""
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["x", "w"], ["xw"]),
+            helper.make_node("Add", ["xw", "b"], ["y"]),
+        ],
+        "linear",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", weights.shape[0]])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch", weights.shape[1]])],
+        initializer=[
+            numpy_helper.from_array(weights, "w"),
+            numpy_helper.from_array(np.full(weights.shape[1], bias, dtype=np.float32), "b"),
+        ],
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), str(path))
+    return str(path)
+
+
+@pytest.fixture
+async def pool(tmp_path):
+    pool = InferencePool(
+        {
+            "normal": linear_model(tmp_path / "normal.onnx"),
+            "earnings": linear_model(tmp_path / "earnings.onnx", weights=np.ones((3, 2), dtype=np.float32), bias=0),
+        },
+        workers=2,
+        max_batch_size=4,
+        config=SessionConfig(intra_op_threads=2),
+    )
+    await pool.start()
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestInferencePool:
+    """Test inference in worker processes."""
+
+    async def test_predictions_match_numpy(self, pool):
+        X = np.random.default_rng(0).standard_normal((10, 3)).astype(np.float32)
+
+        np.testing.assert_allclose(await pool.predict("normal", X), X @ WEIGHTS + 0.5, rtol=1e-5)
+        np.testing.assert_allclose(await pool.predict("earnings", X), np.repeat(X.sum(axis=1, keepdims=True), 2, axis=1), rtol=1e-5)
+        assert pool.stats["rows"] == 20
+        assert pool.config.intra_op_threads == 1
+
+    async def test_batches_spread_over_workers(self, pool):
+        X = np.ones((4, 3), dtype=np.float32)
+
+        results = await asyncio.gather(*(pool.predict("normal", X * i) for i in range(8)))
+
+        for i, result in enumerate(results):
+            np.testing.assert_allclose(result[:, 0], np.full(4, 6.0 * i + 0.5))
+        assert all(worker.batches > 0 for worker in pool.workers)
+
+    async def test_predict_rows(self, pool):
+        rows = [{b"a": b"1", b"b": b"1"}, {b"a": b"0", b"b": b"2", b"c": b"1"}]
+
+        result = await pool.predict_rows("normal", rows, ["a", "b", "c"])
+
+        np.testing.assert_allclose(result[:, 0], [3.5, 7.5])
+
+    async def test_unknown_model(self, pool):
+        with pytest.raises(KeyError):
+            await pool.predict("intraday", np.ones((1, 3), dtype=np.float32))
+
+    async def test_bad_model_fails_start(self, tmp_path):
+        bad = tmp_path / "bad.onnx"
+        bad.write_bytes(b"not a model")
+        pool = InferencePool({"normal": str(bad)}, workers=1, config=SessionConfig(intra_op_threads=1))
+
+        with pytest.raises(RuntimeError, match="failed to start"):
+            await pool.start()
+        assert pool.workers == []
+
+    async def test_exited_worker_is_restarted(self, pool):
+        X = np.ones((4, 3), dtype=np.float32)
+        victim = pool.workers[0]
+        victim.process.kill()
+        await asyncio.to_thread(victim.process.join)
+
+        results = await asyncio.gather(*(pool.predict("normal", X) for _ in range(4)), return_exceptions=True)
+        await asyncio.gather(*pool._restarting)
+
+        assert sum(isinstance(r, RuntimeError) for r in results) <= 1
+        assert pool.stats["restarts"] == 1 and victim.process.is_alive()
+        np.testing.assert_allclose((await pool.predict("normal", X))[:, 0], np.full(4, 6.5))
+
+    async def test_fails_fast_when_every_worker_is_gone(self, tmp_path):
+        pool = InferencePool({"normal": linear_model(tmp_path / "normal.onnx")}, workers=1, max_restarts=0,
+                             config=SessionConfig(intra_op_threads=1))
+        await pool.start()
+        try:
+            pool.workers[0].process.kill()
+            await asyncio.to_thread(pool.workers[0].process.join)
+            X = np.ones((1, 3), dtype=np.float32)
+
+            with pytest.raises(RuntimeError, match="Inference failed on worker 0"):
+                await pool.predict("normal", X)
+            with pytest.raises(RuntimeError, match="No inference workers left"):
+                await asyncio.wait_for(pool.predict("normal", X), timeout=1)
+            assert pool.live_workers == 0 and pool.stats["retired"] == 1
+        finally:
+            await pool.close()
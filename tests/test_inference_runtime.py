@@ -0,0 +1,131 @@
+"""
+ONNX inference runtime tests (session options, IO-bound buffers, multi-model runtime)
+"""
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+
+from services.common.inference_runtime import (  # noqa: E402
+    InferenceRuntime,
+    ModelSession,
+    SessionConfig,
+    fill_features,
+)
+
+WEIGHTS = np.array([[1.0], [2.0], [3.0]], dtype=np.float32)
+
+
+def linear_model(path, weights=WEIGHTS, bias=0.5):
+    """y = x @ weights + bias, input [batch, 3]"""
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["x", "w"], ["xw"]),
+            helper.make_node("Add", ["xw", "b"], ["y"]),
+        ],
+        "linear",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", weights.shape[0]])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch", weights.shape[1]])],
+        initializer=[
+            numpy_helper.from_array(weights, "w"),
+            numpy_helper.from_array(np.full(weights.shape[1], bias, dtype=np.float32), "b"),
+        ],
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), str(path))
+    return str(path)
+
+
+@pytest.mark.unit
+class TestSessionConfig:
+    """Test CPU session tuning."""
+
+    def test_options_applied(self):
+        options = SessionConfig(intra_op_threads=3, graph_optimization="extended", enable_mem_arena=False).session_options()
+
+        assert options.intra_op_num_threads == 3
+        assert options.inter_op_num_threads == 1
+        assert options.enable_cpu_mem_arena is False
+
+    def test_unknown_optimization_level(self):
+        with pytest.raises(ValueError):
+            SessionConfig(graph_optimization="max").session_options()
+
+
+@pytest.mark.unit
+class TestModelSession:
+    """Test IO-bound batched inference."""
+
+    def test_predict_matches_numpy_across_chunks(self, tmp_path):
+        session = ModelSession("normal", linear_model(tmp_path / "m.onnx"), SessionConfig(intra_op_threads=1), max_batch_size=4)
+        X = np.random.default_rng(0).standard_normal((10, 3)).astype(np.float32)
+
+        np.testing.assert_allclose(session.predict(X), X @ WEIGHTS + 0.5, rtol=1e-5)
+        assert session.stats == {"batches": 3, "rows": 10}
+
+    def test_run_writes_into_preallocated_buffers(self, tmp_path):
+        session = ModelSession("normal", linear_model(tmp_path / "m.onnx"), SessionConfig(intra_op_threads=1), max_batch_size=8)
+        output_buffer = session._outputs[0]
+
+        session.input_buffer(2)[:] = [[1, 0, 0], [0, 0, 1]]
+        (first,) = session.run(2)
+        assert np.shares_memory(first, output_buffer)
+        np.testing.assert_allclose(first[:, 0], [1.5, 3.5])
+
+        session.input_buffer(2)[:] = [[0, 1, 0], [1, 1, 1]]
+        (second,) = session.run(2)
+        np.testing.assert_allclose(second[:, 0], [2.5, 6.5])
+
+    def test_predict_rows_from_redis_hashes(self, tmp_path):
+        session = ModelSession("normal", linear_model(tmp_path / "m.onnx"), SessionConfig(intra_op_threads=1))
+        rows = [{b"a": b"1", b"b": b"1"}, {b"a": b"0", b"b": b"2", b"c": b"1"}]
+
+        np.testing.assert_allclose(session.predict_rows(rows, ["a", "b", "c"])[:, 0], [3.5, 7.5])
+
+    def test_batch_larger_than_buffer_rejected(self, tmp_path):
+        session = ModelSession("normal", linear_model(tmp_path / "m.onnx"), SessionConfig(intra_op_threads=1), max_batch_size=2)
+
+        with pytest.raises(ValueError):
+            session.input_buffer(3)
+
+
+@pytest.mark.unit
+class TestInferenceRuntime:
+    """Test several models in one process."""
+
+    def test_models_share_thread_budget(self, tmp_path):
+        runtime = InferenceRuntime(SessionConfig(intra_op_threads=4))
+        runtime.load({
+            "normal": linear_model(tmp_path / "normal.onnx"),
+            "earnings": linear_model(tmp_path / "earnings.onnx", weights=np.ones((3, 2), dtype=np.float32), bias=0),
+        })
+
+        X = np.ones((1, 3), dtype=np.float32)
+        np.testing.assert_allclose(runtime.get("normal").predict(X), [[6.5]])
+        np.testing.assert_allclose(runtime.get("earnings").predict(X), [[3.0, 3.0]])
+        assert runtime.get("normal").session.get_session_options().intra_op_num_threads == 2
+
+    def test_later_load_shrinks_earlier_sessions(self, tmp_path):
+        runtime = InferenceRuntime(SessionConfig(intra_op_threads=4))
+        (normal,) = runtime.load({"normal": linear_model(tmp_path / "normal.onnx")}).values()
+        assert normal.session.get_session_options().intra_op_num_threads == 4
+
+        runtime.load({"earnings": linear_model(tmp_path / "earnings.onnx")})
+
+        for name in ("normal", "earnings"):
+            assert runtime.get(name).session.get_session_options().intra_op_num_threads == 2
+        assert runtime.get("normal") is normal
+        np.testing.assert_allclose(normal.predict(np.ones((1, 3), dtype=np.float32)), [[6.5]])
+
+    def test_unknown_model(self):
+        with pytest.raises(KeyError):
+            InferenceRuntime(SessionConfig(intra_op_threads=1)).get("normal")
+
+
+@pytest.mark.unit
+def test_fill_features_defaults_missing():
+    out = np.zeros((2, 2), dtype=np.float32)
+
+    fill_features(out, [{"a": "1.5"}], ["a", "b"], default=-1)
+
+    np.testing.assert_array_equal(out, [[1.5, -1], [0, 0]])
@@ -0,0 +1,216 @@
+"""
+LLM scheduler tests (concurrency limit, priority lanes, dedup, load shedding)
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from services.explanation_worker.explanation_worker import ExplanationWorker
+from services.explanation_worker.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMScheduler,
+    LoadShedError,
+)
+from services.explanation_worker.ollama_client import OllamaClient
+from services.explanation_worker.stub_ollama import create_app
+
+
+@pytest.fixture
+async def scheduler_factory():
+    schedulers = []
+
+    async def make(**kwargs):
+        scheduler = LLMScheduler(**kwargs)
+        await scheduler.start()
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        await scheduler.stop()
+
+
+def blocker():
+    """A job that runs until released"""
+    release = asyncio.Event()
+
+    async def run():
+        await release.wait()
+        return "released"
+
+    return run, release
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLLMScheduler:
+    """Test scheduling policies."""
+
+    async def test_concurrency_limit_against_stub_server(self, scheduler_factory):
+        app = create_app(first_token_delay=0.02, token_delay=0)
+        ollama = OllamaClient(client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub"))
+        scheduler = await scheduler_factory(concurrency=2, initial_service_time=0.1)
+
+        results = await asyncio.gather(*(
+            scheduler.submit(f"SYM{i}:medium", lambda: ollama.generate("prompt")) for i in range(6)
+        ))
+
+        assert len(results) == 6
+        assert app.state.stats["requests"] == 6
+        assert app.state.stats["max_active"] == 2
+
+    async def test_interactive_lane_goes_first(self, scheduler_factory):
+        scheduler = await scheduler_factory(concurrency=1)
+        run, release = blocker()
+        order = []
+
+        def job(name):
+            async def run_job():
+                order.append(name)
+            return run_job
+
+        first = asyncio.create_task(scheduler.submit("busy", run))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(scheduler.submit("bg", job("background"), priority=BACKGROUND))
+        interactive = asyncio.create_task(scheduler.submit("ui", job("interactive"), priority=INTERACTIVE))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, background, interactive)
+
+        assert order == ["interactive", "background"]
+
+    async def test_identical_requests_share_one_generation(self, scheduler_factory):
+        scheduler = await scheduler_factory(concurrency=2)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"text": "shared"}
+
+        results = await asyncio.gather(*(scheduler.submit("AAPL:medium", generate) for _ in range(50)))
+
+        assert len(calls) == 1
+        assert all(r == {"text": "shared"} for r in results)
+        assert scheduler.stats["interactive"]["deduplicated"] == 49
+
+    async def test_interactive_duplicate_promotes_background_job(self, scheduler_factory):
+        scheduler = await scheduler_factory(concurrency=1)
+        run, release = blocker()
+        order = []
+
+        def job(name):
+            async def run_job():
+                order.append(name)
+            return run_job
+
+        busy = asyncio.create_task(scheduler.submit("busy", run))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(scheduler.submit("MSFT", job("MSFT"), priority=BACKGROUND))
+        pregen = asyncio.create_task(scheduler.submit("AAPL", job("AAPL"), priority=BACKGROUND))
+        user = asyncio.create_task(scheduler.submit("AAPL", job("unused"), priority=INTERACTIVE))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(busy, other, pregen, user)
+
+        assert order == ["AAPL", "MSFT"]
+
+    async def test_sheds_when_predicted_wait_exceeds_deadline(self, scheduler_factory):
+        scheduler = await scheduler_factory(concurrency=1, deadlines={INTERACTIVE: 5}, initial_service_time=10)
+        run, release = blocker()
+
+        busy = asyncio.create_task(scheduler.submit("busy", run))
+        await asyncio.sleep(0)
+        with pytest.raises(LoadShedError):
+            await scheduler.submit("AAPL", run)
+
+        release.set()
+        await busy
+        assert scheduler.stats["interactive"]["shed"] == 1
+
+    async def test_drops_requests_that_waited_past_deadline(self, scheduler_factory):
+        scheduler = await scheduler_factory(concurrency=1, deadlines={BACKGROUND: 0.01}, initial_service_time=0)
+        run, release = blocker()
+
+        busy = asyncio.create_task(scheduler.submit("busy", run))
+        await asyncio.sleep(0)
+        late = asyncio.create_task(scheduler.submit("AAPL", run, priority=BACKGROUND))
+        await asyncio.sleep(0.05)
+        release.set()
+
+        with pytest.raises(LoadShedError):
+            await late
+        await busy
+        assert not scheduler.is_active("AAPL")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_worker_dedups_jobs_and_streams_to_each():
+    class RecordingNats:
+        def __init__(self):
+            self.published = []
+
+        async def publish(self, subject, data):
+            self.published.append((subject, json.loads(data)))
+
+    class NullRedis:
+        async def setex(self, key, ttl, value):
+            pass
+
+    worker = ExplanationWorker()
+    worker.nats = RecordingNats()
+    worker.redis = NullRedis()
+    await worker.scheduler.start()
+    calls = []
+
+    async def fake_generate(symbol, depth="medium", on_token=None):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        await on_token("AAPL looks ")
+        await asyncio.sleep(0.01)
+        await on_token("strong.")
+        return {"text": "AAPL looks strong."}
+
+    worker.generate_explanation = fake_generate
+
+    jobs = [
+        SimpleNamespace(data=json.dumps({"job_id": f"exp_{i}", "symbol": "AAPL"}).encode())
+        for i in range(3)
+    ]
+    await asyncio.gather(*(worker._handle_job(job) for job in jobs))
+    await worker.scheduler.stop()
+
+    assert calls == ["AAPL"]
+    for i in range(3):
+        messages = [m for s, m in worker.nats.published if s == f"thought.explanation.stream.exp_{i}"]
+        text = "".join(m["text"] for m in messages if m["type"] == "token")
+        assert text == "AAPL looks strong."
+        assert messages[-1]["type"] == "done"
+    assert worker._fanouts == {}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_worker_stop_cancels_jobs_in_progress():
+    worker = ExplanationWorker()
+    await worker.scheduler.start()
+    started = asyncio.Event()
+
+    async def stuck_generate(symbol, depth="medium", on_token=None):
+        started.set()
+        await asyncio.Event().wait()
+
+    worker.generate_explanation = stuck_generate
+
+    await worker.on_job(SimpleNamespace(data=json.dumps({"symbol": "AAPL"}).encode()))
+    await asyncio.wait_for(started.wait(), timeout=1)
+    (job,) = worker._jobs
+    await worker.stop()
+
+    assert job.done()
+    assert not worker._jobs
@@ -0,0 +1,208 @@
+"""
+In-process backend tests (Redis semantics, NATS routing, JetStream delivery)
+"""
+import asyncio
+
+import pytest
+from nats.errors import NoRespondersError, TimeoutError
+from nats.js.api import ConsumerConfig
+from redis.exceptions import ResponseError
+
+from services.common.local_backends import LocalNats, LocalRedis, subject_matches
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLocalRedis:
+    """Test the redis.asyncio subset against Redis semantics."""
+
+    async def test_expiry_and_ttl(self):
+        clock = Clock()
+        redis = LocalRedis(clock=clock)
+        await redis.setex("pred:AAPL", 300, b"{}")
+        await redis.set("plain", 1)
+
+        assert await redis.ttl("pred:AAPL") == 300
+        assert await redis.ttl("plain") == -1
+        assert await redis.expire("plain", 10, nx=True) is True
+        assert await redis.expire("plain", 99, nx=True) is False
+
+        clock.now += 300
+        assert await redis.get("pred:AAPL") is None
+        assert await redis.ttl("pred:AAPL") == -2
+        assert await redis.mget(["pred:AAPL", "plain"]) == [None, None]
+
+    async def test_values_are_encoded_like_redis_py(self):
+        redis = LocalRedis()
+        await redis.hset("features:AAPL", mapping={"rsi_14": 55.5, "volume": 10})
+
+        assert await redis.hgetall("features:AAPL") == {b"rsi_14": b"55.5", b"volume": b"10"}
+        assert await LocalRedis(decode_responses=True).get("missing") is None
+        with pytest.raises(ResponseError):
+            await redis.get("features:AAPL")
+
+    async def test_sorted_set_ordering(self):
+        redis = LocalRedis(decode_responses=True)
+        async with redis.pipeline(transaction=False) as pipe:
+            for symbol, score in (("MSFT", 2), ("AAPL", 5), ("NVDA", 2)):
+                pipe.zincrby("stats:tickers:most_requested", score, symbol)
+            assert await pipe.execute() == [2.0, 5.0, 2.0]
+
+        assert await redis.zrevrange("stats:tickers:most_requested", 0, -1) == ["AAPL", "NVDA", "MSFT"]
+        assert await redis.zrange("stats:tickers:most_requested", 0, 0, withscores=True) == [("MSFT", 2.0)]
+
+    async def test_scan_iter_matches_glob(self):
+        redis = LocalRedis()
+        await redis.set("rag:context:AAPL", b"1")
+        await redis.set("rag:context:MSFT", b"1")
+        await redis.set("pred:AAPL", b"1")
+
+        keys = sorted([key async for key in redis.scan_iter(match="rag:context:*")])
+
+        assert keys == [b"rag:context:AAPL", b"rag:context:MSFT"]
+        assert await redis.delete(*keys) == 2
+
+
+@pytest.mark.unit
+def test_subject_wildcards():
+    assert subject_matches("event.prediction.updated.*", "event.prediction.updated.AAPL")
+    assert not subject_matches("event.prediction.updated.*", "event.prediction.updated")
+    assert subject_matches("event.>", "event.prediction.updated.AAPL")
+    assert not subject_matches("event.>", "event")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLocalNats:
+    """Test core NATS routing."""
+
+    async def test_queue_group_gets_one_copy(self, nats_client):
+        received = {"a": [], "b": [], "all": []}
+
+        def handler(name):
+            async def cb(msg):
+                received[name].append(msg.data)
+            return cb
+
+        await nats_client.subscribe("job.>", queue="workers", cb=handler("a"))
+        await nats_client.subscribe("job.>", queue="workers", cb=handler("b"))
+        await nats_client.subscribe("job.*", cb=handler("all"))
+        for i in range(4):
+            await nats_client.publish("job.explain", str(i).encode())
+        await nats_client.flush()
+
+        assert len(received["a"]) == len(received["b"]) == 2
+        assert received["all"] == [b"0", b"1", b"2", b"3"]
+
+    async def test_flush_waits_for_chained_handlers(self):
+        nats = LocalNats()
+        done = []
+
+        async def first(msg):
+            await asyncio.sleep(0.01)
+            await nats.publish("second", msg.data, headers=msg.headers)
+
+        async def second(msg):
+            done.append(msg.headers)
+
+        await nats.subscribe("first", cb=first)
+        await nats.subscribe("second", cb=second)
+        await nats.publish("first", b"x", headers={"Pipeline-Trace": "ingest=1.0"})
+        await nats.flush()
+
+        assert done == [{"Pipeline-Trace": "ingest=1.0"}]
+
+    async def test_request_reply_and_no_responders(self):
+        nats = LocalNats()
+
+        async def echo(msg):
+            await msg.respond(msg.data.upper())
+
+        await nats.subscribe("embed.request", queue="embedding", cb=echo)
+
+        assert (await nats.request("embed.request", b"text")).data == b"TEXT"
+        with pytest.raises(NoRespondersError):
+            await nats.request("nobody.home", b"")
+
+    async def test_next_msg_times_out(self):
+        nats = LocalNats()
+        sub = await nats.subscribe("thought.explanation.stream.job1")
+        await nats.publish("thought.explanation.stream.job1", b"token")
+
+        assert (await sub.next_msg(timeout=0.1)).data == b"token"
+        with pytest.raises(TimeoutError):
+            await sub.next_msg(timeout=0.01)
+        await sub.unsubscribe()
+        assert nats.subscriptions == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestLocalJetStream:
+    """Test streams, durable consumers and redelivery."""
+
+    async def _stream(self):
+        nats = LocalNats()
+        js = nats.jetstream()
+        await js.add_stream(name="JOBS", subjects=["job.>"])
+        return nats, js
+
+    async def test_nak_redelivers_and_ack_does_not(self):
+        nats, js = await self._stream()
+        for i in range(2):
+            ack = await js.publish("job.predict.normal", str(i).encode())
+        assert (ack.stream, ack.seq) == ("JOBS", 2)
+
+        sub = await js.pull_subscribe("job.>", durable="workers")
+        first, second = await sub.fetch(2, timeout=0.1)
+        await first.ack()
+        await second.nak()
+
+        (again,) = await sub.fetch(2, timeout=0.1)
+        assert again.data == b"1"
+        assert again.metadata.num_delivered == 2
+        assert again.metadata.sequence.stream == 2
+        await again.term()
+        with pytest.raises(TimeoutError):
+            await sub.fetch(1, timeout=0.01)
+        await nats.close()
+
+    async def test_unacked_message_redelivered_after_ack_wait(self):
+        nats, js = await self._stream()
+        await js.publish("job.predict.normal", b"x")
+        sub = await js.pull_subscribe("job.>", durable="workers", config=ConsumerConfig(ack_wait=0.02))
+
+        (msg,) = await sub.fetch(1, timeout=0.1)
+        (redelivered,) = await sub.fetch(1, timeout=0.5)
+
+        assert redelivered.metadata.num_delivered == 2
+        await nats.close()
+
+    async def test_durable_push_consumer_resumes_and_auto_acks(self):
+        nats, js = await self._stream()
+        seen = []
+
+        async def handler(msg):
+            seen.append(msg.data)
+
+        await nats.publish("job.a", b"before")  # core publishes are captured by the stream
+        sub = await js.subscribe("job.>", durable="push", cb=handler)
+        await js.publish("job.b", b"after")
+        await nats.flush()
+        await sub.unsubscribe()
+
+        await js.publish("job.c", b"while away")
+        await js.subscribe("job.>", durable="push", cb=handler)
+        await nats.flush()
+
+        assert seen == [b"before", b"after", b"while away"]
+        assert (await js.stream_info("JOBS")).state.messages == 3
+        await nats.close()
@@ -0,0 +1,234 @@
+"""
+Model hot-swap tests (background load + warm-up, atomic swap, drain, shadow scoring)
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from services.common.local_backends import LocalRedis
+from services.common.model_registry import HotSwapModel, ModelRegistryWatcher, ModelVersion
+
+
+class FakeSession:
+    """Stands in for ModelSession: predicts a constant per model file"""
+
+    n_features = 3
+    max_batch_size = 8
+
+    def __init__(self, value, release=None):
+        self.value = value
+        self.release = release
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return np.full((len(X), 1), self.value, dtype=np.float32)
+
+    def predict_rows(self, rows, feature_names):
+        return self.predict(np.zeros((len(rows), len(feature_names))))
+
+
+def version(v, path=None):
+    return ModelVersion("normal", "lgbm", v, path or f"models/lgbm_{v}.onnx")
+
+
+class FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchrow(self, query, model_type):
+        return self.rows.get(model_type)
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.conn = FakeConn(rows)
+
+    def acquire(self):
+        pool = self
+
+        class Ctx:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Ctx()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    async def hset(self, key, mapping):
+        self.hashes[key] = mapping
+
+    async def expire(self, key, ttl):
+        pass
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestHotSwapModel:
+    """Test swapping sessions under traffic."""
+
+    async def test_serves_old_model_while_new_one_loads(self):
+        sessions = {"models/lgbm_v1.onnx": FakeSession(1.0)}
+        loading = threading.Event()
+        finish_loading = threading.Event()
+
+        def loader(path):
+            if path == "models/lgbm_v2.onnx":
+                loading.set()
+                finish_loading.wait(5)
+                return FakeSession(2.0)
+            return sessions[path]
+
+        model = HotSwapModel("normal", loader=loader)
+        await model.swap_to(version("v1"))
+
+        swap = asyncio.create_task(model.swap_to(version("v2")))
+        await asyncio.to_thread(loading.wait, 5)
+        assert (await model.predict(np.zeros((2, 3))))[0, 0] == 1.0
+
+        finish_loading.set()
+        assert await swap is True
+        assert (await model.predict(np.zeros((2, 3))))[0, 0] == 2.0
+        assert model.version.model_version == "v2"
+
+    async def test_new_session_warmed_before_swap(self):
+        new = FakeSession(2.0)
+        model = HotSwapModel("normal", loader=lambda path: new, warmup_rounds=2)
+
+        await model.swap_to(version("v1"))
+
+        assert new.calls == 6  # 2 rounds x batch sizes {1, 2, 8}
+
+    async def test_in_flight_batch_finishes_on_old_session(self):
+        release = threading.Event()
+        old = FakeSession(1.0, release=release)
+        model = HotSwapModel("normal", loader=lambda path: old if path.endswith("v1.onnx") else FakeSession(2.0), warmup_rounds=0)
+        await model.swap_to(version("v1"))
+        old_loaded = model.current
+
+        running = asyncio.create_task(model.predict(np.zeros((1, 3))))
+        await asyncio.sleep(0.01)
+        await model.swap_to(version("v2"))
+
+        assert old_loaded.retired and not old_loaded.drained.is_set()
+        release.set()
+        assert (await running)[0, 0] == 1.0
+        await model.drain(old_loaded, timeout=1)
+        assert old_loaded.session is None
+
+    async def test_warmup_capped_then_serves_with_full_threads(self, tmp_path, monkeypatch):
+        pytest.importorskip("onnx")
+        from services.common.inference_runtime import ModelSession, SessionConfig
+        from tests.test_inference_runtime import linear_model
+
+        threads = []
+        predict = ModelSession.predict
+
+        def recording_predict(self, X):
+            threads.append(self.config.intra_op_threads)
+            return predict(self, X)
+
+        monkeypatch.setattr(ModelSession, "predict", recording_predict)
+        model = HotSwapModel("normal", config=SessionConfig(intra_op_threads=4), warmup_threads=1, warmup_rounds=1)
+
+        assert await model.swap_to(version("v1", linear_model(tmp_path / "m.onnx")))
+
+        assert threads[:-1] == [1, 1, 1] and threads[-1] == 4
+        assert model.current.session.config.intra_op_threads == 4
+        np.testing.assert_allclose(await model.predict(np.ones((2, 3), dtype=np.float32)), [[6.5], [6.5]])
+
+    async def test_failed_warmup_keeps_current_model(self):
+        def loader(path):
+            return FakeSession(float("nan") if "v2" in path else 1.0)
+
+        model = HotSwapModel("normal", loader=loader)
+        await model.swap_to(version("v1"))
+
+        assert await model.swap_to(version("v2")) is False
+        assert model.version.model_version == "v1"
+        assert model.stats["failed_swaps"] == 1
+
+    async def test_shadow_scores_fraction_on_previous_model(self):
+        model = HotSwapModel(
+            "normal", loader=lambda path: FakeSession(2.0 if "v2" in path else 1.5), shadow_fraction=1.0, warmup_rounds=0
+        )
+        await model.swap_to(version("v1"))
+        await model.swap_to(version("v2"))
+
+        await model.predict(np.zeros((4, 3)))
+        await asyncio.sleep(0.05)
+
+        assert model.shadow_stats["rows"] == 4
+        assert model.shadow_stats["max_abs_diff"] == pytest.approx(0.5)
+
+    async def test_close_cancels_shadow_scoring(self):
+        release = threading.Event()
+        model = HotSwapModel(
+            "normal", loader=lambda path: FakeSession(2.0) if "v2" in path else FakeSession(1.5, release),
+            shadow_fraction=1.0, warmup_rounds=0,
+        )
+        await model.swap_to(version("v1"))
+        await model.swap_to(version("v2"))
+        await model.predict(np.zeros((4, 3)))
+        (task,) = model._shadow_tasks
+
+        await model.close()
+        release.set()
+
+        assert task.cancelled()
+        assert not model._shadow_tasks
+        assert model.shadow_stats["batches"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestModelRegistryWatcher:
+    """Test detection of newly activated model_metadata rows."""
+
+    async def test_swaps_when_active_row_changes(self):
+        row = {
+            "model_type": "normal", "model_name": "lgbm", "model_version": "v1",
+            "deployment_date": datetime(2026, 10, 1, tzinfo=timezone.utc), "metadata": '{"model_path": "/m/v1.onnx"}',
+        }
+        pool = FakePool({"normal": row})
+        paths = []
+        model = HotSwapModel("normal", loader=lambda path: paths.append(path) or FakeSession(1.0), warmup_rounds=0)
+        redis = FakeRedis()
+        watcher = ModelRegistryWatcher(pool, {"normal": model}, redis_client=redis)
+
+        assert await watcher.check() == ["normal"]
+        assert await watcher.check() == []
+
+        pool.conn.rows["normal"] = {**row, "model_version": "v2", "metadata": None}
+        assert await watcher.check() == ["normal"]
+
+        assert paths == ["/m/v1.onnx", "models/lgbm_v2.onnx"]
+        assert redis.hashes["model:normal:active"]["model_version"] == "v2"
+
+    async def test_active_hash_outlives_its_ttl_while_serving(self):
+        row = {
+            "model_type": "normal", "model_name": "lgbm", "model_version": "v1",
+            "deployment_date": None, "metadata": None,
+        }
+        now = [1000.0]
+        redis = LocalRedis(clock=lambda: now[0])
+        model = HotSwapModel("normal", loader=lambda path: FakeSession(1.0), warmup_rounds=0)
+        watcher = ModelRegistryWatcher(FakePool({"normal": row}), {"normal": model}, redis_client=redis)
+
+        assert await watcher.check() == ["normal"]
+        for _ in range(3):
+            now[0] += 1800
+            assert await watcher.check() == []
+
+        assert (await redis.hgetall("model:normal:active"))[b"model_version"] == b"v1"
@@ -0,0 +1,96 @@
+"""
+Ollama request shaping tests (shared system prefix, keep_alive/num_ctx, timings, RAG token budget)
+"""
+import json
+
+import httpx
+import pytest
+
+from services.explanation_worker.explanation_worker import (
+    EXPLANATION_PROMPT,
+    EXPLANATION_SYSTEM,
+    RAG_MAX_TOKENS,
+    ExplanationWorker,
+)
+from services.explanation_worker.ollama_client import OllamaClient, estimate_tokens, parse_timings
+
+
+def recording_client(final):
+    """httpx client answering /api/generate with ``final`` and keeping request bodies"""
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json=final)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama"), bodies
+
+
+@pytest.mark.unit
+class TestPromptLayout:
+    """Test the static/variable prompt split."""
+
+    def test_instructions_not_in_variable_prompt(self):
+        assert "INSTRUCTIONS" in EXPLANATION_SYSTEM
+        assert "INSTRUCTIONS" not in EXPLANATION_PROMPT
+        assert "{" not in EXPLANATION_SYSTEM
+
+    def test_rag_budget_fits_context_window(self):
+        worker = ExplanationWorker()
+        worker.ollama = OllamaClient(num_ctx=1024, client=httpx.AsyncClient())
+        prompt = "x" * 400
+
+        budget = worker._rag_token_budget(prompt)
+
+        used = estimate_tokens(EXPLANATION_SYSTEM) + estimate_tokens(prompt) + worker.llm_options["num_predict"]
+        assert 0 < budget <= 1024 - used
+
+        worker.ollama = OllamaClient(num_ctx=32768, client=httpx.AsyncClient())
+        assert worker._rag_token_budget(prompt) == RAG_MAX_TOKENS
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestOllamaRequests:
+    """Test request body and timing capture."""
+
+    async def test_body_carries_system_keep_alive_and_num_ctx(self):
+        client, bodies = recording_client({"response": "ok", "done": True})
+        ollama = OllamaClient(system="You are terse.", keep_alive="1h", num_ctx=4096, options={"num_predict": 10}, client=client)
+
+        await ollama.generate("Explain AAPL")
+
+        body = bodies[0]
+        assert body["system"] == "You are terse."
+        assert body["prompt"] == "Explain AAPL"
+        assert body["keep_alive"] == "1h"
+        assert body["options"] == {"num_ctx": 4096, "num_predict": 10}
+
+    async def test_timings_recorded_per_call(self):
+        final = {
+            "response": "ok", "done": True, "load_duration": 5_000_000,
+            "prompt_eval_count": 120, "prompt_eval_duration": 40_000_000,
+            "eval_count": 30, "eval_duration": 600_000_000, "total_duration": 650_000_000,
+        }
+        client, _ = recording_client(final)
+        ollama = OllamaClient(client=client)
+
+        await ollama.generate("a")
+        await ollama.generate("b")
+
+        assert ollama.last_timings == parse_timings(final)
+        assert ollama.last_timings["prompt_eval_ms"] == 40
+        assert ollama.stats["calls"] == 2
+        assert ollama.stats["eval_tokens"] == 60
+        assert ollama.stats["eval_ms"] == 1200
+
+    async def test_preload_generates_one_token(self):
+        client, bodies = recording_client({"response": "", "done": True, "load_duration": 2_000_000_000})
+        ollama = OllamaClient(system="sys", client=client)
+
+        await ollama.preload()
+
+        assert bodies[0]["options"]["num_predict"] == 1
+        assert bodies[0]["system"] == "sys"
+        assert ollama.last_timings["load_ms"] == 2000
+        assert ollama.stats["calls"] == 0
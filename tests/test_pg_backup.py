@@ -0,0 +1,200 @@
+"""
+Backup tool tests (restore list filtering, compression choice, incremental chunk selection, restore cleanup)
+"""
+import json
+import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scripts import pg_backup
+from scripts.pg_backup import (
+    MANIFEST,
+    chunk_key,
+    chunks_to_export,
+    chunks_to_replay,
+    compression_arg,
+    dump_command,
+    filter_restore_list,
+    is_sealed,
+    restore,
+    restore_chunks,
+)
+
+NOW = datetime(2026, 10, 19, 15, 0, tzinfo=timezone.utc)
+
+
+def chunk(day, hypertable="market_data"):
+    start = datetime(2026, 10, day, tzinfo=timezone.utc)
+    return {
+        "hypertable_schema": "public", "hypertable_name": hypertable,
+        "chunk_schema": "_timescaledb_internal", "chunk_name": f"_hyper_1_{day}_chunk",
+        "primary_dimension": "timestamp", "range_start": start, "range_end": start + timedelta(days=1),
+    }
+
+
+class Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        self.conn.statements.append("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class RecordingConn:
+    """Records statements; COPY drains its source"""
+
+    def __init__(self):
+        self.statements = []
+        self.copied = b""
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+
+    def transaction(self):
+        return Transaction(self)
+
+    async def copy_to_table(self, table, schema_name=None, source=None, format=None):
+        async for data in source:
+            self.copied += data
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.unit
+class TestFullBackup:
+    """Test pg_dump / pg_restore arguments."""
+
+    def test_restore_list_skips_timescaledb_extension(self):
+        listing = "\n".join([
+            "; Archive created at 2026-10-19",
+            "2; 3079 16385 EXTENSION - timescaledb ",
+            "4561; 0 0 COMMENT - EXTENSION timescaledb ",
+            "3; 3079 16386 EXTENSION - pg_trgm ",
+            "231; 1259 17000 TABLE public market_data postgres",
+            "4600; 0 17000 TABLE DATA public market_data postgres",
+        ])
+
+        kept = [line for line in filter_restore_list(listing).splitlines() if not line.startswith(";")]
+
+        assert kept == [
+            "3; 3079 16386 EXTENSION - pg_trgm ",
+            "231; 1259 17000 TABLE public market_data postgres",
+            "4600; 0 17000 TABLE DATA public market_data postgres",
+        ]
+
+    def test_zstd_only_with_pg16_client(self):
+        assert compression_arg(16, level=3) == "zstd:3"
+        assert compression_arg(15, level=3) == "3"
+        assert compression_arg(15, level=19) == "9"
+
+        cmd = dump_command("backups/daily", jobs=8, compress="zstd:3")
+        assert {"--format=directory", "--jobs=8", "--compress=zstd:3"} <= set(cmd)
+
+
+@pytest.mark.unit
+class TestIncrementalChunks:
+    """Test which chunks a daily run reads and which a restore replays."""
+
+    def test_exports_new_and_open_chunks_only(self):
+        chunks = [chunk(16), chunk(17), chunk(18), chunk(19)]
+        exported = {
+            chunk_key(chunk(16)): {"sealed": True},
+            chunk_key(chunk(17)): {"sealed": True},
+            chunk_key(chunk(18)): {"sealed": False},  # was still open at the last run
+        }
+
+        selected = [c["chunk_name"] for c in chunks_to_export(chunks, exported)]
+
+        assert selected == ["_hyper_1_18_chunk", "_hyper_1_19_chunk"]
+
+    def test_chunk_seals_after_grace(self):
+        assert is_sealed(chunk(18), NOW, grace=timedelta(hours=1))
+        assert not is_sealed(chunk(19), NOW, grace=timedelta(hours=1))
+        assert not is_sealed(chunk(18), datetime(2026, 10, 19, 0, 30, tzinfo=timezone.utc), grace=timedelta(hours=1))
+
+    def test_replays_exports_after_backup_in_range_order(self):
+        backup_started = NOW - timedelta(days=2)
+        exported = {
+            "old": {"hypertable": "public.market_data", "range_start": "2026-10-10T00:00:00+00:00",
+                    "exported_at": (backup_started - timedelta(hours=1)).isoformat()},
+            "b": {"hypertable": "public.market_data", "range_start": "2026-10-19T00:00:00+00:00",
+                  "exported_at": NOW.isoformat()},
+            "a": {"hypertable": "public.market_data", "range_start": "2026-10-18T00:00:00+00:00",
+                  "exported_at": NOW.isoformat()},
+            "p": {"hypertable": "public.predictions", "range_start": "2026-10-18T00:00:00+00:00",
+                  "exported_at": NOW.isoformat()},
+        }
+
+        replay = chunks_to_replay(exported, backup_started)
+
+        assert [(e["hypertable"], e["range_start"][:10]) for e in replay] == [
+            ("public.market_data", "2026-10-18"),
+            ("public.market_data", "2026-10-19"),
+            ("public.predictions", "2026-10-18"),
+        ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRestoreCleanup:
+    """Test that failed restores leave the database usable and the chunk range untouched."""
+
+    async def test_post_restore_runs_when_pg_restore_fails(self, tmp_path, monkeypatch):
+        (tmp_path / "full").mkdir()
+        (tmp_path / "full" / MANIFEST).write_text(json.dumps({"timescaledb": "2.14.2"}))
+        conn = RecordingConn()
+
+        def run(cmd):
+            if "--list" in cmd:
+                return ""
+            raise RuntimeError("pg_restore failed (1): out of disk")
+
+        async def recreate_database(database, version):
+            pass
+
+        async def connect(database=None):
+            return conn
+
+        monkeypatch.setattr(pg_backup, "require_tools", lambda *tools: None)
+        monkeypatch.setattr(pg_backup, "run", run)
+        monkeypatch.setattr(pg_backup, "recreate_database", recreate_database)
+        monkeypatch.setattr(pg_backup, "connect", connect)
+
+        with pytest.raises(RuntimeError, match="out of disk"):
+            await restore("full", root=tmp_path)
+
+        assert conn.statements == ["SELECT timescaledb_post_restore()"]
+        assert not (tmp_path / "full" / "restore.list").exists()
+
+    @pytest.mark.skipif(shutil.which("zstd") is None, reason="needs zstd")
+    async def test_corrupt_chunk_export_rolls_back(self, tmp_path, monkeypatch):
+        backup_started = NOW - timedelta(days=1)
+        (tmp_path / "full").mkdir()
+        (tmp_path / "full" / MANIFEST).write_text(json.dumps({"started_at": backup_started.isoformat()}))
+        chunk_dir = tmp_path / "chunks"
+        (chunk_dir / "market_data").mkdir(parents=True)
+        data = subprocess.run(["zstd", "-q", "-c"], input=b"x" * 100000, capture_output=True, check=True).stdout
+        (chunk_dir / "market_data" / "c.bin.zst").write_bytes(data[:len(data) // 2])  # truncated
+        (chunk_dir / MANIFEST).write_text(json.dumps({"chunks": {"c": {
+            "hypertable": "public.market_data", "column": "timestamp", "file": "market_data/c.bin.zst",
+            "range_start": "2026-10-18T00:00:00+00:00", "range_end": "2026-10-19T00:00:00+00:00",
+            "rows": 1, "exported_at": NOW.isoformat(),
+        }}}))
+        conn = RecordingConn()
+
+        async def connect(database=None):
+            return conn
+
+        monkeypatch.setattr(pg_backup, "connect", connect)
+
+        with pytest.raises(RuntimeError, match="zstd failed for market_data/c.bin.zst"):
+            await restore_chunks("full", root=tmp_path)
+
+        assert conn.statements[-1] == "ROLLBACK"
@@ -0,0 +1,112 @@
+"""
+Pipeline tracing tests (header round trip, stage histograms, latency budget)
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from services.common.tracing import (
+    CORRELATION_HEADER,
+    END_TO_END,
+    STAGE_FEATURES,
+    STAGE_INGEST,
+    STAGE_ROUTE,
+    STAGE_WEBSOCKET,
+    TRACE_HEADER,
+    Trace,
+    TraceRecorder,
+)
+from services.routing_agent.calendar_checker import EarningsCalendarIndex
+from services.routing_agent.router import SymbolRouter
+from services.routing_agent.streaming import StreamingRouter
+
+T0 = 1760884200.0
+
+
+def sample(registry, name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.unit
+class TestTrace:
+    """Test trace encoding."""
+
+    def test_headers_round_trip(self):
+        trace = Trace.start(STAGE_INGEST, "c-1", at=T0).mark(STAGE_FEATURES, at=T0 + 0.0125)
+
+        decoded = Trace.from_headers(trace.headers())
+
+        assert decoded.correlation_id == "c-1"
+        assert decoded.marks == [(STAGE_INGEST, T0), (STAGE_FEATURES, pytest.approx(T0 + 0.0125, abs=1e-6))]
+        assert decoded.elapsed == pytest.approx(0.0125, abs=1e-6)
+
+    def test_untraced_and_malformed_headers(self):
+        assert Trace.from_headers(None) is None
+        assert Trace.from_headers({CORRELATION_HEADER: "c-1"}) is None
+
+        trace = Trace.from_headers({TRACE_HEADER: f"ingest={T0},bogus,features=x"}, correlation_id="c-2")
+        assert trace.marks == [(STAGE_INGEST, T0)]
+        assert trace.correlation_id == "c-2"
+
+
+@pytest.mark.unit
+class TestTraceRecorder:
+    """Test histogram aggregation."""
+
+    def test_records_stage_and_end_to_end(self):
+        registry = CollectorRegistry()
+        recorder = TraceRecorder(registry)
+        trace = Trace.start(STAGE_INGEST, at=T0)
+
+        recorder.record(trace.mark(STAGE_FEATURES, at=T0 + 0.02))
+        recorder.record(trace.mark(STAGE_WEBSOCKET, at=T0 + 0.9), final=True)
+
+        assert sample(registry, "pipeline_stage_latency_seconds_count", stage=STAGE_FEATURES) == 1
+        assert sample(registry, "pipeline_stage_latency_seconds_sum", stage=STAGE_WEBSOCKET) == pytest.approx(0.88)
+        assert sample(registry, "pipeline_end_to_end_latency_seconds_sum") == pytest.approx(0.9)
+        assert recorder.percentile(END_TO_END, 0.99) == pytest.approx(0.9)
+
+    def test_counts_samples_over_budget(self):
+        registry = CollectorRegistry()
+        recorder = TraceRecorder(registry)
+
+        recorder.record(Trace.start(STAGE_INGEST, at=T0).mark(STAGE_FEATURES, at=T0 + 0.01))
+        recorder.record(Trace.start(STAGE_INGEST, at=T0).mark(STAGE_FEATURES, at=T0 + 0.2))
+
+        assert sample(registry, "pipeline_budget_exceeded_total", stage=STAGE_FEATURES) == 1
+
+    def test_single_mark_records_nothing(self):
+        recorder = TraceRecorder(CollectorRegistry())
+
+        recorder.record(Trace.start(at=T0), final=True)
+
+        assert recorder.samples == {}
+
+
+class RecordingNats:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, data):
+        self.published.append((subject, json.loads(data)))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_router_marks_route_stage():
+    registry = CollectorRegistry()
+    router = StreamingRouter(
+        RecordingNats(), SymbolRouter(EarningsCalendarIndex()), max_batch=1,
+        clock=lambda: T0 + 0.05, recorder=TraceRecorder(registry),
+    )
+    trace = Trace.start(STAGE_INGEST, "c-1", at=T0).mark(STAGE_FEATURES, at=T0 + 0.03)
+
+    await router.on_features_ready(SimpleNamespace(headers=trace.headers(), data=json.dumps({
+        "correlation_id": "c-1", "payload": {"ticker": "AAPL", "timestamp": "2025-10-19T14:30:00+00:00"},
+    }).encode()))
+
+    entry = router.nats.published[0][1]["payload"]["symbols"][0]
+    assert [stage for stage, _ in Trace.decode(entry["trace"]).marks] == [STAGE_INGEST, STAGE_FEATURES, STAGE_ROUTE]
+    assert sample(registry, "pipeline_stage_latency_seconds_sum", stage=STAGE_ROUTE) == pytest.approx(0.02)
@@ -0,0 +1,149 @@
+"""
+Explanation pre-generation tests (demand ranking, top-N targeting, LLM budget)
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services.common.demand import DemandTracker
+from services.common.subjects import EXPLAIN_GENERATE
+from services.explanation_worker.pregeneration import Pregenerator
+
+
+class FakeRedis:
+    """Sorted-set subset of redis.asyncio used by DemandTracker"""
+
+    def __init__(self):
+        self.scores = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def zrevrange(self, key, start, end):
+        ranked = sorted(self.scores.get(key, {}).items(), key=lambda kv: -kv[1])
+        return [m.encode() for m, _ in ranked[start:end + 1]]
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def zincrby(self, key, amount, member):
+        self.ops.append(("zincrby", key, amount, member))
+
+    def expire(self, key, ttl, nx=False):
+        self.ops.append(("expire", key, ttl, nx))
+
+    async def execute(self):
+        for op, key, a, b in self.ops:
+            if op == "zincrby":
+                scores = self.redis.scores.setdefault(key, {})
+                scores[b] = scores.get(b, 0) + a
+            elif not (b and key in self.redis.ttls):
+                self.redis.ttls[key] = a
+
+
+class RecordingNats:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, data):
+        self.published.append((subject, json.loads(data)))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def update(ticker):
+    return SimpleNamespace(data=json.dumps({"payload": {"ticker": ticker, "predicted_price": 1.0}}).encode())
+
+
+async def make_pregenerator(requests, **kwargs):
+    demand = DemandTracker(FakeRedis())
+    for symbol, count in requests.items():
+        for _ in range(count):
+            await demand.record(symbol)
+    pregenerator = Pregenerator(RecordingNats(), demand, **kwargs)
+    await pregenerator.refresh_targets()
+    return pregenerator
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestDemandTracker:
+    """Test ticker request ranking."""
+
+    async def test_ranks_by_request_count(self):
+        redis = FakeRedis()
+        demand = DemandTracker(redis)
+        for symbol in ["aapl", "MSFT", "AAPL", "TSLA", "AAPL", "MSFT"]:
+            await demand.record(symbol)
+
+        assert await demand.top(2) == ["AAPL", "MSFT"]
+        assert await demand.top(0) == []
+
+    async def test_ttl_set_once_per_day(self):
+        redis = FakeRedis()
+        demand = DemandTracker(redis, ttl=86400)
+        await demand.record("AAPL")
+        redis.ttls[demand.key] = 100  # later in the day
+        await demand.record("AAPL")
+
+        assert redis.ttls[demand.key] == 100
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestPregenerator:
+    """Test which updates become background jobs."""
+
+    async def test_only_top_tickers_are_pregenerated(self):
+        pregenerator = await make_pregenerator({"AAPL": 5, "MSFT": 3, "TSLA": 1}, top_n=2)
+
+        for ticker in ["AAPL", "TSLA", "MSFT"]:
+            await pregenerator.on_prediction_updated(update(ticker))
+
+        jobs = pregenerator.nats.published
+        assert [(s, j["symbol"]) for s, j in jobs] == [(EXPLAIN_GENERATE, "AAPL"), (EXPLAIN_GENERATE, "MSFT")]
+        assert all(j["priority"] == "background" and "job_id" not in j for _, j in jobs)
+
+    async def test_ticker_not_regenerated_within_min_interval(self):
+        clock = Clock()
+        pregenerator = await make_pregenerator({"AAPL": 1}, min_interval=60, clock=clock)
+
+        await pregenerator.on_prediction_updated(update("AAPL"))
+        clock.now = 30
+        await pregenerator.on_prediction_updated(update("AAPL"))
+        clock.now = 61
+        await pregenerator.on_prediction_updated(update("AAPL"))
+
+        assert len(pregenerator.nats.published) == 2
+        assert pregenerator.stats["skipped_recent"] == 1
+
+    async def test_budget_caps_jobs_per_minute(self):
+        clock = Clock()
+        tickers = {f"T{i}": 1 for i in range(10)}
+        pregenerator = await make_pregenerator(tickers, top_n=10, max_per_minute=3, clock=clock)
+
+        for ticker in tickers:
+            await pregenerator.on_prediction_updated(update(ticker))
+        assert pregenerator.stats["submitted"] == 3
+        assert pregenerator.stats["skipped_budget"] == 7
+
+        clock.now = 20  # one token refilled
+        await pregenerator.on_prediction_updated(update("T9"))
+        assert pregenerator.stats["submitted"] == 4
@@ -0,0 +1,97 @@
+"""
+Profiling hook tests (stack sampling, pstats capture, event-loop block detection)
+"""
+import asyncio
+import pstats
+import time
+
+import pytest
+
+from services.common.profiling import (
+    MODE_CPROFILE,
+    MODE_SAMPLE,
+    LoopMonitor,
+    Profiler,
+    StackSampler,
+)
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.mark.unit
+def test_sampler_collects_folded_stacks(tmp_path):
+    sampler = StackSampler(hz=500)
+    sampler.start()
+    busy_wait(0.2)
+    samples = sampler.stop()
+
+    assert sum(samples.values()) > 10
+    assert any("busy_wait (test_profiling.py" in stack for stack in samples)
+
+    path = tmp_path / "out.folded"
+    sampler.write_folded(path)
+    stack, count = path.read_text().splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestProfiler:
+    """Test on-demand captures against the event loop."""
+
+    async def test_sample_capture_sees_loop_work(self, tmp_path):
+        profiler = Profiler("test", out_dir=tmp_path)
+
+        async def work():
+            for _ in range(10):
+                busy_wait(0.02)
+                await asyncio.sleep(0)
+
+        capture = asyncio.create_task(profiler.capture(0.3, MODE_SAMPLE))
+        await work()
+        path = await capture
+
+        assert path.suffix == ".folded"
+        assert "busy_wait" in path.read_text()
+
+    async def test_cprofile_capture_writes_pstats(self, tmp_path):
+        profiler = Profiler("test", out_dir=tmp_path)
+
+        path = await profiler.capture(0.05, MODE_CPROFILE)
+
+        assert path.suffix == ".pstats"
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    async def test_one_capture_at_a_time(self, tmp_path):
+        profiler = Profiler("test", out_dir=tmp_path)
+        first = asyncio.create_task(profiler.capture(0.1, MODE_SAMPLE))
+        await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError):
+            await profiler.capture(0.1, MODE_SAMPLE)
+        with pytest.raises(ValueError):
+            await Profiler("test", out_dir=tmp_path).capture(0.1, "perf")
+        await first
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_loop_monitor_names_blocking_code():
+    monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        busy_wait(0.4)  # blocks the loop
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    assert monitor.stats["blocked"] == 1
+    lag, stack = monitor.blocks[0]
+    assert lag >= 0.3
+    assert any("busy_wait" in frame for frame in stack)
+    assert monitor.lag.count > 3
@@ -0,0 +1,43 @@
+"""
+Qdrant collection profile tests
+"""
+import pytest
+from qdrant_client import models
+
+from services.common.qdrant_profiles import PROFILES, get_profile
+
+
+@pytest.mark.unit
+class TestCollectionProfiles:
+    """Test collection/search configuration of each profile."""
+
+    def test_exact_profile_keeps_float32_in_ram(self):
+        kwargs = PROFILES["exact"].collection_kwargs(384)
+
+        assert "quantization_config" not in kwargs
+        assert kwargs["vectors_config"].on_disk is False
+        assert PROFILES["exact"].search_params().quantization is None
+
+    def test_balanced_profile_quantizes_and_rescores(self):
+        profile = PROFILES["balanced"]
+        kwargs = profile.collection_kwargs(384)
+        params = profile.search_params()
+
+        assert kwargs["quantization_config"].scalar.type == models.ScalarType.INT8
+        assert kwargs["quantization_config"].scalar.always_ram is True
+        assert kwargs["vectors_config"].on_disk is True
+        assert params.quantization.rescore is True
+        assert params.hnsw_ef == profile.hnsw_ef
+
+    def test_quantized_profiles_cut_ram(self):
+        exact = PROFILES["exact"].estimated_ram_bytes(100_000, 384)
+
+        assert PROFILES["balanced"].estimated_ram_bytes(100_000, 384) < exact / 3
+        assert PROFILES["compact"].estimated_ram_bytes(100_000, 384) < exact / 4
+
+    def test_profile_from_environment(self, monkeypatch):
+        monkeypatch.setenv("QDRANT_PROFILE", "compact")
+        assert get_profile().name == "compact"
+
+        with pytest.raises(ValueError, match="Unknown Qdrant profile"):
+            get_profile("fastest")
@@ -0,0 +1,114 @@
+"""
+Filtered RAG retrieval tests (symbol/date filters, per-symbol caching, invalidation)
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from services.explanation_worker.ingestion import Document, DocumentIndexer
+from services.explanation_worker.retrieval import (
+    KnowledgeRetriever,
+    RetrievalCache,
+    format_context,
+    symbol_filter,
+)
+
+DIM = 4
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    async def embed_one(self, text):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return np.ones(DIM, dtype=np.float32)
+
+    async def embed(self, texts):
+        return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+@pytest.fixture
+async def qdrant():
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        "financial_knowledge",
+        vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+    )
+    await client.upsert("financial_knowledge", points=[
+        models.PointStruct(id=1, vector=[1, 1, 1, 1], payload={"text": "AAPL 10-K", "ticker": "AAPL", "date": "2026-03-01"}),
+        models.PointStruct(id=2, vector=[1, 1, 1, 1], payload={"text": "MSFT 10-K", "ticker": "MSFT", "date": "2026-03-01"}),
+        models.PointStruct(id=3, vector=[1, 1, 1, 1], payload={"text": "AAPL 2019 10-K", "ticker": "AAPL", "date": "2019-03-01"}),
+        models.PointStruct(id=4, vector=[1, 1, 1, 1], payload={"text": "Earnings gap playbook"}),
+    ])
+    yield client
+    await client.close()
+
+
+@pytest.mark.unit
+class TestFormatting:
+    """Test context assembly."""
+
+    def test_keeps_whole_chunks_within_budget(self):
+        docs = [{"text": "a" * 40}, {"text": "b" * 40}, {"text": "c" * 40}]
+
+        assert format_context(docs, max_tokens=22) == "a" * 40 + "\n\n" + "b" * 40
+
+    def test_truncates_single_oversized_chunk(self):
+        assert format_context([{"text": "x" * 50}], max_tokens=2) == "x" * 8
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestKnowledgeRetriever:
+    """Test filtered search and caching."""
+
+    async def test_filter_restricts_symbol_and_age(self, qdrant):
+        now = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        points = (await qdrant.query_points(
+            "financial_knowledge",
+            query=[1, 1, 1, 1],
+            query_filter=symbol_filter("AAPL", max_age_days=365, now=now),
+            limit=10,
+        )).points
+
+        assert sorted(p.payload["text"] for p in points) == ["AAPL 10-K", "Earnings gap playbook"]
+
+    async def test_cached_per_symbol(self, qdrant, async_redis):
+        embeddings = FakeEmbeddings()
+        retriever = KnowledgeRetriever(qdrant, embeddings, cache=RetrievalCache(async_redis), max_age_days=None)
+
+        first = await retriever.retrieve("AAPL")
+        second = await retriever.retrieve("AAPL")
+
+        assert first == second
+        assert embeddings.calls == 1
+        assert retriever.stats == {"cache_hits": 1, "searches": 1}
+
+    async def test_concurrent_misses_share_one_search(self, qdrant):
+        embeddings = FakeEmbeddings()
+        retriever = KnowledgeRetriever(qdrant, embeddings, max_age_days=None)
+
+        results = await asyncio.gather(*(retriever.retrieve("MSFT") for _ in range(5)))
+
+        assert embeddings.calls == 1
+        assert all(r == results[0] for r in results)
+
+    async def test_indexing_invalidates_affected_symbols(self, qdrant, async_redis):
+        cache = RetrievalCache(async_redis)
+        retriever = KnowledgeRetriever(qdrant, FakeEmbeddings(), cache=cache, max_age_days=None)
+        await retriever.retrieve("AAPL")
+        await retriever.retrieve("MSFT")
+
+        indexer = DocumentIndexer(qdrant, FakeEmbeddings(), retrieval_cache=cache)
+        await indexer.index([Document("filings/AAPL_8K.txt", "New guidance", {"ticker": "AAPL"})])
+
+        assert await cache.get("AAPL") is None
+        assert await cache.get("MSFT") is not None
+
+        await indexer.index([Document("playbooks/gap.txt", "New playbook", {"doc_type": "playbooks"})])
+        assert await async_redis.keys() == []
@@ -0,0 +1,88 @@
+"""
+Shared metrics module tests (scrape-time collection of stats dicts and local histograms)
+"""
+import timeit
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+from services.common.metrics import SIZE_BUCKETS, LocalHistogram, ServiceMetrics, percentile
+
+
+def sample(registry, name, **labels):
+    return registry.get_sample_value(name, labels)
+
+
+@pytest.mark.unit
+class TestServiceMetrics:
+    """Test stats dicts and histograms read at scrape time."""
+
+    def test_counters_follow_stats_dict(self):
+        registry = CollectorRegistry()
+        stats = {"hits": 0, "misses": 0}
+        ServiceMetrics(registry).counters("cache_lookups", "Lookups", stats, labels=("result",))
+
+        stats["hits"] += 3
+        assert sample(registry, "cache_lookups_total", result="hits") == 3
+        stats["misses"] += 1
+        assert sample(registry, "cache_lookups_total", result="misses") == 1
+
+    def test_nested_stats_use_one_label_per_level(self):
+        registry = CollectorRegistry()
+        stats = {"interactive": {"completed": 2, "shed": 1}, "background": {"completed": 5, "shed": 0}}
+        ServiceMetrics(registry).counters("llm_requests", "Requests", stats, labels=("lane", "event"))
+
+        assert sample(registry, "llm_requests_total", lane="background", event="completed") == 5
+        assert sample(registry, "llm_requests_total", lane="interactive", event="shed") == 1
+
+    def test_gauges_and_subscription_backlog(self):
+        registry = CollectorRegistry()
+        queues = {"normal": 4, "earnings": 1}
+        metrics = ServiceMetrics(registry)
+        metrics.gauge("queue_depth", "Queued", lambda: queues, labels=("route",))
+        metrics.gauge("connections", "Open", lambda: 7)
+        metrics.watch_subscription(SimpleNamespace(pending_msgs=12), "data.features.ready")
+
+        assert sample(registry, "queue_depth", route="normal") == 4
+        assert sample(registry, "connections") == 7
+        assert sample(registry, "nats_subscription_pending_messages", subject="data.features.ready") == 12
+
+    def test_local_histogram_exposition(self):
+        registry = CollectorRegistry()
+        batch_sizes = LocalHistogram(SIZE_BUCKETS)
+        waits = {"interactive": LocalHistogram(), "background": LocalHistogram()}
+        metrics = ServiceMetrics(registry)
+        metrics.histogram("batch_size", "Symbols per batch", batch_sizes)
+        metrics.histogram("queue_wait_seconds", "Wait", waits, label="lane")
+
+        for size in (1, 3, 64, 2000):
+            batch_sizes.observe(size)
+        waits["background"].observe(0.2)
+
+        assert sample(registry, "batch_size_bucket", le="4.0") == 2
+        assert sample(registry, "batch_size_bucket", le="64.0") == 3
+        assert sample(registry, "batch_size_bucket", le="+Inf") == 4
+        assert sample(registry, "batch_size_sum") == 2068
+        assert sample(registry, "queue_wait_seconds_count", lane="background") == 1
+        assert b"queue_wait_seconds_bucket" in generate_latest(registry)
+
+    def test_hot_path_cost(self):
+        histogram = LocalHistogram()
+        stats = {"events": 0}
+
+        def event():
+            stats["events"] += 1
+            histogram.observe(0.003)
+
+        per_event = min(timeit.repeat(event, number=10000, repeat=3)) / 10000
+        assert per_event < 5e-6  # typically a few hundred ns; generous bound for slow CI
+
+
+@pytest.mark.unit
+def test_percentile_is_nearest_rank():
+    samples = [0.5, 0.1, 0.4, 0.2, 0.3]
+
+    assert percentile(samples, 0.5) == 0.3
+    assert percentile(samples, 0.99) == 0.5
+    assert percentile([], 0.99) == 0.0
@@ -0,0 +1,98 @@
+"""
+Streaming router tests (size/time flush, per-tick idempotency, routing, latency)
+"""
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services.common.subjects import PREDICT_EARNINGS, PREDICT_NORMAL
+from services.routing_agent.calendar_checker import EarningsCalendarIndex, market_today
+from services.routing_agent.router import SymbolRouter
+from services.routing_agent.streaming import StreamingRouter
+
+
+class RecordingNats:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, subject, data):
+        self.published.append((subject, json.loads(data)))
+
+    def tickers(self, subject=None):
+        return [
+            [entry["ticker"] for entry in message["payload"]["symbols"]]
+            for s, message in self.published
+            if subject is None or s == subject
+        ]
+
+
+def make_router(earnings=(), **kwargs):
+    calendar = EarningsCalendarIndex()
+    for ticker in earnings:
+        calendar.add(ticker, market_today())
+    return StreamingRouter(RecordingNats(), SymbolRouter(calendar), **kwargs)
+
+
+def tick(second):
+    return f"2026-10-19T14:30:{second:02d}+00:00"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestStreamingRouter:
+    """Test batching and idempotency."""
+
+    async def test_full_batch_published_immediately(self):
+        router = make_router(max_batch=3, max_delay=10)
+
+        for ticker in ["AAPL", "MSFT", "NVDA"]:
+            await router.submit(ticker, tick(0))
+
+        assert router.nats.tickers(PREDICT_NORMAL) == [["AAPL", "MSFT", "NVDA"]]
+
+    async def test_partial_batch_flushed_after_max_delay(self):
+        router = make_router(max_batch=100, max_delay=0.01)
+
+        await router.submit("AAPL", tick(0))
+        assert router.nats.published == []
+        await asyncio.sleep(0.05)
+
+        assert router.nats.tickers() == [["AAPL"]]
+
+    async def test_duplicate_ticks_collapse(self):
+        router = make_router(max_batch=100, max_delay=10)
+
+        await router.submit("AAPL", tick(0))
+        await router.submit("AAPL", tick(0))
+        await router.submit("AAPL", tick(1))  # newer tick replaces the queued one
+        await router.flush_all()
+        await router.submit("AAPL", tick(1))  # already published
+
+        assert router.nats.tickers() == [["AAPL"]]
+        assert router.nats.published[0][1]["payload"]["symbols"][0]["quote_time"] == tick(1)
+        assert router.stats["duplicates"] == 2
+        assert router.stats["superseded"] == 1
+
+    async def test_earnings_symbols_go_to_earnings_subject(self):
+        router = make_router(earnings=["NVDA"], max_batch=100, max_delay=10)
+
+        for ticker in ["AAPL", "NVDA", "MSFT"]:
+            await router.submit(ticker, tick(0))
+        await router.flush_all()
+
+        assert router.nats.tickers(PREDICT_NORMAL) == [["AAPL", "MSFT"]]
+        assert router.nats.tickers(PREDICT_EARNINGS) == [["NVDA"]]
+
+    async def test_records_quote_to_route_latency(self):
+        quote = datetime(2026, 10, 19, 14, 30, tzinfo=timezone.utc)
+        router = make_router(max_batch=1, clock=lambda: quote.timestamp() + 0.015)
+
+        await router.on_features_ready(SimpleNamespace(data=json.dumps({
+            "correlation_id": "c-1", "payload": {"ticker": "aapl", "timestamp": quote.isoformat()},
+        }).encode()))
+
+        assert router.latency_percentile(0.99) == pytest.approx(0.015, abs=1e-6)
+        assert router.nats.published[0][1]["payload"]["symbols"][0]["correlation_id"] == "c-1"
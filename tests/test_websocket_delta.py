@@ -0,0 +1,212 @@
+"""
+WebSocket delta-stream protocol tests
+Exercises ConnectionManager/DeltaStream without a running gateway
+"""
+import asyncio
+import json
+
+import msgpack
+import pytest
+
+from services.api_gateway import main
+from services.api_gateway.websocket import (
+    ConnectionManager,
+    DeltaStream,
+    ProtocolOptions,
+    compute_delta,
+)
+
+
+class FakeWebSocket:
+    """Records every frame the server sends"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.frames.append(data)
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        self.frames.append(msgpack.unpackb(data, raw=False))
+
+
+@pytest.mark.unit
+class TestComputeDelta:
+    """Test field-level diffing."""
+
+    def test_first_state_is_sent_in_full(self):
+        assert compute_delta(None, {"a": 1, "b": 2}) == {"a": 1, "b": 2}
+
+    def test_only_changed_fields(self):
+        assert compute_delta({"a": 1, "b": 2}, {"a": 1, "b": 3}) == {"b": 3}
+
+    def test_removed_fields_are_nulled(self):
+        assert compute_delta({"a": 1, "b": 2}, {"a": 1}) == {"b": None}
+
+    def test_unchanged_state_is_empty(self):
+        assert compute_delta({"a": 1}, {"a": 1}) == {}
+
+
+@pytest.mark.unit
+class TestProtocolOptions:
+    """Test query parameter validation."""
+
+    def test_defaults_to_full_protocol(self):
+        assert ProtocolOptions().protocol == "full"
+
+    @pytest.mark.parametrize("kwargs", [
+        {"protocol": "binary"},
+        {"encoding": "protobuf"},
+        {"max_rate": 0},
+        {"max_rate": 1000},
+    ])
+    def test_rejects_invalid_options(self, kwargs):
+        with pytest.raises(ValueError):
+            ProtocolOptions(**kwargs)
+
+
+@pytest.mark.unit
+class TestDeltaStream:
+    """Test conflation and frame building."""
+
+    def test_updates_within_interval_are_conflated(self):
+        stream = DeltaStream(FakeWebSocket(), ProtocolOptions(protocol="delta"))
+        stream.build_snapshot({"AAPL": {"price": 1.0, "confidence": 0.8}})
+
+        stream.push("AAPL", {"price": 2.0, "confidence": 0.8})
+        stream.push("AAPL", {"price": 3.0, "confidence": 0.8})
+
+        frame = stream.build_delta()
+        assert frame["type"] == "delta"
+        assert frame["updates"] == {"AAPL": {"price": 3.0}}
+
+    def test_no_frame_when_nothing_changed(self):
+        stream = DeltaStream(FakeWebSocket(), ProtocolOptions(protocol="delta"))
+        stream.build_snapshot({"AAPL": {"price": 1.0}})
+        stream.push("AAPL", {"price": 1.0})
+
+        assert stream.build_delta() is None
+
+    def test_sequence_numbers_increase(self):
+        stream = DeltaStream(FakeWebSocket(), ProtocolOptions(protocol="delta"))
+        first = stream.build_snapshot({})
+        stream.push("MSFT", {"price": 1.0})
+        second = stream.build_delta()
+
+        assert second["seq"] == first["seq"] + 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestConnectionManager:
+    """Test fan-out in both protocol modes."""
+
+    async def test_full_protocol_sends_every_update(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws)
+        await manager.subscribe(ws, ["AAPL"])
+
+        await manager.broadcast_update("AAPL", {"predicted_price": 155.5})
+        await manager.broadcast_update("AAPL", {"predicted_price": 155.6})
+        await manager.broadcast_update("MSFT", {"predicted_price": 400.0})
+
+        assert [f["predicted_price"] for f in ws.frames] == [155.5, 155.6]
+        assert ws.frames[0]["type"] == "prediction_update"
+
+    async def test_delta_protocol_snapshot_then_conflated_delta(self):
+        manager = ConnectionManager()
+        manager.seed({"AAPL": {"predicted_price": 155.0, "model_type": "normal"}})
+
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta", max_rate=50))
+        await manager.subscribe(ws, ["AAPL"])
+
+        for price in (155.1, 155.2, 155.3):
+            await manager.broadcast_update("AAPL", {"predicted_price": price, "model_type": "normal"})
+        await asyncio.sleep(0.05)
+        manager.disconnect(ws)
+
+        snapshot, delta = ws.frames
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["predictions"]["AAPL"]["predicted_price"] == 155.0
+        assert delta["updates"] == {"AAPL": {"predicted_price": 155.3}}
+
+    async def test_msgpack_encoding(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta", encoding="msgpack"))
+        await manager.subscribe(ws, ["AAPL"])
+        manager.disconnect(ws)
+
+        assert ws.frames[0]["type"] == "snapshot"
+
+    async def test_disconnect_cleans_up_subscriber_index(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta"))
+        await manager.subscribe(ws, ["AAPL", "MSFT"])
+        manager.disconnect(ws)
+
+        assert manager.subscribers == {}
+        assert manager.streams == {}
+
+    async def test_failed_delta_send_removes_connection(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta", max_rate=50))
+        await manager.subscribe(ws, ["AAPL"])
+
+        async def broken(data):
+            raise ConnectionError("socket closed")
+
+        ws.send_text = broken
+        await manager.broadcast_update("AAPL", {"predicted_price": 155.1})
+        await asyncio.sleep(0.01)
+
+        assert manager.streams == {} and manager.subscribers == {}
+        assert ws not in manager.active_connections
+
+    async def test_snapshot_waits_for_in_flight_delta(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta", max_rate=50))
+        await manager.subscribe(ws, ["AAPL"])
+        sending = []
+
+        async def slow_send(data):
+            sending.append(True)
+            assert len(sending) == 1, "concurrent sends on one socket"
+            await asyncio.sleep(0.01)
+            ws.frames.append(json.loads(data))
+            sending.pop()
+
+        ws.send_text = slow_send
+        await manager.broadcast_update("AAPL", {"predicted_price": 155.1})
+        await asyncio.sleep(0)  # Flush loop is now mid-send
+        await manager.resync(ws)
+        manager.disconnect(ws)
+
+        assert [f["type"] for f in ws.frames] == ["snapshot", "delta", "snapshot"]
+        assert [f["seq"] for f in ws.frames] == [1, 2, 3]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_endpoint_cleans_up_after_malformed_message():
+    class MalformedClient(FakeWebSocket):
+        async def receive_json(self):
+            return {"action": "subscribe"}  # no "symbols"
+
+    ws = MalformedClient()
+    with pytest.raises(KeyError):
+        await main.websocket_endpoint(ws, protocol="delta", max_rate=50, encoding="json")
+
+    assert ws not in main.manager.active_connections
+    assert ws not in main.manager.streams
@@ -0,0 +1,129 @@
+"""
+WebSocket fan-out interest management tests
+"""
+import asyncio
+
+import pytest
+
+from services.api_gateway.fanout import SymbolInterest
+from services.api_gateway.websocket import ConnectionManager, ProtocolOptions
+from tests.test_websocket_delta import FakeWebSocket
+
+
+class FakeSubscription:
+    def __init__(self, nats, subject):
+        self.nats = nats
+        self.subject = subject
+
+    async def unsubscribe(self):
+        self.nats.subjects.remove(self.subject)
+
+
+class FakeNats:
+    """Tracks which subjects currently have a subscription"""
+
+    def __init__(self, delay=0.0, failures=0):
+        self.subjects = set()
+        self.delay = delay
+        self.failures = failures
+
+    async def subscribe(self, subject, cb=None):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("nats unavailable")
+        self.subjects.add(subject)
+        return FakeSubscription(self, subject)
+
+
+async def _noop(msg):
+    pass
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSymbolInterest:
+    """Test that upstream subscriptions follow local client interest."""
+
+    async def test_subscribes_once_per_symbol(self):
+        nats = FakeNats()
+        manager = ConnectionManager(interest=SymbolInterest(nats, _noop))
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws1)
+        await manager.connect(ws2)
+
+        await manager.subscribe(ws1, ["AAPL", "MSFT"])
+        await manager.subscribe(ws2, ["AAPL"])
+
+        assert nats.subjects == {
+            "event.prediction.updated.AAPL",
+            "event.prediction.updated.MSFT",
+        }
+
+    async def test_releases_symbol_after_last_subscriber_leaves(self):
+        nats = FakeNats()
+        interest = SymbolInterest(nats, _noop)
+        manager = ConnectionManager(interest=interest)
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws1)
+        await manager.connect(ws2)
+        await manager.subscribe(ws1, ["AAPL", "MSFT"])
+        await manager.subscribe(ws2, ["AAPL"])
+
+        manager.disconnect(ws1)
+        await interest.sync()
+        assert nats.subjects == {"event.prediction.updated.AAPL"}
+
+        await manager.unsubscribe(ws2, ["AAPL"])
+        await interest.sync()
+        assert nats.subjects == set()
+
+    async def test_snapshot_loads_state_after_upstream_subscribe(self):
+        nats = FakeNats()
+        seen_subjects = []
+
+        async def loader(symbols):
+            seen_subjects.append(set(nats.subjects))
+            return {s: {"predicted_price": 1.0} for s in symbols}
+
+        manager = ConnectionManager(interest=SymbolInterest(nats, _noop), loader=loader)
+        ws = FakeWebSocket()
+        await manager.connect(ws, ProtocolOptions(protocol="delta"))
+        await manager.subscribe(ws, ["AAPL"])
+        manager.disconnect(ws)
+
+        assert seen_subjects == [{"event.prediction.updated.AAPL"}]
+        assert ws.frames[0]["predictions"] == {"AAPL": {"predicted_price": 1.0}}
+
+    async def test_second_subscriber_waits_for_in_flight_subscribe(self):
+        nats = FakeNats(delay=0.02)
+        seen_subjects = []
+
+        async def loader(symbols):
+            seen_subjects.append(set(nats.subjects))
+            return {s: {"predicted_price": 1.0} for s in symbols}
+
+        manager = ConnectionManager(interest=SymbolInterest(nats, _noop), loader=loader)
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws1)
+        await manager.connect(ws2, ProtocolOptions(protocol="delta"))
+
+        first = asyncio.create_task(manager.subscribe(ws1, ["AAPL"]))
+        await asyncio.sleep(0)  # ws1's upstream subscribe is now in flight
+        await manager.subscribe(ws2, ["AAPL"])
+        await first
+        manager.disconnect(ws2)
+
+        assert seen_subjects == [{"event.prediction.updated.AAPL"}]
+
+    async def test_failed_subscribe_is_retried(self):
+        nats = FakeNats(failures=1)
+        interest = SymbolInterest(nats, _noop, retry_delay=0.01)
+
+        interest.retain(["AAPL"])
+        await interest.sync()
+        assert nats.subjects == set()
+
+        await asyncio.sleep(0.05)
+        assert nats.subjects == {"event.prediction.updated.AAPL"}
+        await interest.close()